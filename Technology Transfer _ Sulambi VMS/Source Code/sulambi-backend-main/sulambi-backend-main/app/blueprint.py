@@ -9,6 +9,7 @@ from .routes.dashboard import DashboardBlueprint
 from .routes.reports import ReportsBlueprint
 from .routes.feedback import FeedbackBlueprint
 from .routes.analytics import AnalyticsBlueprint
+from .routes.mail import MailBlueprint
 
 ApiBlueprint = Blueprint('api', __name__, url_prefix='/api')
 
@@ -27,4 +28,5 @@ ApiBlueprint.register_blueprint(AccountsBlueprint)
 ApiBlueprint.register_blueprint(DashboardBlueprint)
 ApiBlueprint.register_blueprint(ReportsBlueprint)
 ApiBlueprint.register_blueprint(FeedbackBlueprint)
-ApiBlueprint.register_blueprint(AnalyticsBlueprint)
\ No newline at end of file
+ApiBlueprint.register_blueprint(AnalyticsBlueprint)
+ApiBlueprint.register_blueprint(MailBlueprint)
\ No newline at end of file
@@ -4,6 +4,7 @@ from ..models.ExternalEventModel import ExternalEventModel
 from ..models.MembershipModel import MembershipModel
 from ..models.EvaluationModel import EvaluationModel
 from ..models.FeedbackModel import FeedbackModel
+from ..modules import ModelRegistry
 import random
 import math
 import json
@@ -1753,4 +1754,100 @@ def seedDemoEvaluations(count: int = 100):
         return {
             'success': False,
             'message': f'Failed to seed demo evaluations: {str(e)}'
-        }
\ No newline at end of file
+        }
+
+
+def getEventSuccessPredictions():
+    """
+    Score every event with the registered event-success model.
+    Uses the warm model from the registry and never trains inside the request;
+    while no model is registered the result is flagged as warming.
+    """
+    from ..modules.AnalyticsEngine import AnalyticsEngine, ModelWarming
+    engine = AnalyticsEngine()
+    try:
+        predictions = engine.predict_event_success_batch()
+        return {
+            'success': True,
+            'data': predictions,
+            'model': engine.metadata.get('event_success') or ModelRegistry.getMetadata('event_success'),
+            'message': 'Event success predictions retrieved successfully'
+        }
+    except ModelWarming as e:
+        return {
+            'success': False,
+            'warming': True,
+            'error': str(e),
+            'message': 'Model warming'
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'message': 'Failed to retrieve event success predictions'
+        }
+    finally:
+        engine.close()
+
+def getVolunteerDropoutPredictions():
+    """Score every accepted volunteer with the registered dropout model"""
+    from ..modules.AnalyticsEngine import AnalyticsEngine, ModelWarming
+    engine = AnalyticsEngine()
+    try:
+        predictions = engine.predict_volunteer_dropout_batch()
+        return {
+            'success': True,
+            'data': predictions,
+            'model': engine.metadata.get('volunteer_dropout') or ModelRegistry.getMetadata('volunteer_dropout'),
+            'message': 'Volunteer dropout predictions retrieved successfully'
+        }
+    except ModelWarming as e:
+        return {
+            'success': False,
+            'warming': True,
+            'error': str(e),
+            'message': 'Model warming'
+        }
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'message': 'Failed to retrieve volunteer dropout predictions'
+        }
+    finally:
+        engine.close()
+
+def getModelRegistryStatus():
+    """Promoted version and training metadata of every registered model"""
+    from ..modules.AnalyticsEngine import MODEL_SPECS
+    models = {}
+    for name in MODEL_SPECS:
+        models[name] = {
+            'latest': ModelRegistry.getMetadata(name),
+            'versions': ModelRegistry.listVersions(name)
+        }
+    return {
+        'success': True,
+        'data': {
+            'models': models,
+            'training': ModelRegistry.isTraining()
+        },
+        'message': 'Model registry status retrieved successfully'
+    }
+
+def triggerModelTraining(names=None):
+    """Start model training in a background process"""
+    from ..modules.AnalyticsEngine import MODEL_SPECS, startBackgroundTraining
+    names = [name for name in (names or MODEL_SPECS.keys()) if name in MODEL_SPECS]
+    if len(names) == 0:
+        return {
+            'success': False,
+            'message': 'No valid model names provided'
+        }
+
+    started = startBackgroundTraining(names)
+    return {
+        'success': True,
+        'data': { 'started': started, 'models': names },
+        'message': 'Model training started' if started else 'Model training is already in progress'
+    }
@@ -1,6 +1,7 @@
 from ..models.AccountModel import AccountModel
 from ..models.MembershipModel import MembershipModel
 from ..models.SessionModel import SessionModel
+from ..modules import TemplateRenderer
 from ..modules.Mailer import threadedHtmlMailer, isEmailConfigured, validateEmailConfig, htmlMailer
 from flask import request
 import traceback
@@ -204,10 +205,11 @@ def sendPendingVerificationMail(memberDetails):
   """Send email notification to user that their application is under review"""
   try:
     print(f"[EMAIL] Sending pending verification email to {memberDetails.get('email')}")
-    templateHtml = open("templates/application-under-review.html", "r").read()
-    templateHtml = templateHtml.replace("[name]", memberDetails.get("fullname").split(" ")[0])
-    templateHtml = templateHtml.replace("[application_type]", "membership")
-    templateHtml = templateHtml.replace("[timeframe]", "3-5 business days")
+    templateHtml = TemplateRenderer.render("application-under-review.html", {
+      "name": memberDetails.get("fullname").split(" ")[0],
+      "application_type": "membership",
+      "timeframe": "3-5 business days"
+    })
 
     threadedHtmlMailer(
       mailTo=memberDetails.get("email"),
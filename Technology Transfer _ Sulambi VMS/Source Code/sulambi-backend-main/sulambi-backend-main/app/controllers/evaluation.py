@@ -5,6 +5,7 @@ from ..models.AccountModel import AccountModel
 from ..models.MembershipModel import MembershipModel
 from ..models.ExternalEventModel import ExternalEventModel
 from ..models.InternalEventModel import InternalEventModel
+from ..modules import FeatureStore, ReportAggregator, EvaluationStatus, EvaluationBatch
 from flask import request, g
 
 ExternalEventDb = ExternalEventModel()
@@ -41,50 +42,15 @@ def getEvaluationByEvent(eventId: int, eventType: str):
 
 def getPersonalEvaluationStatus():
   accountSessionInfo = g.get("accountSessionInfo")
-  accountDetails = AccountDb.get(accountSessionInfo["id"])
 
   if (accountSessionInfo["accountType"] != "member"):
     return ({ "message": "Invalid account type" }, 403)
 
-  if (accountDetails == None):
+  # requirements, their evaluation and event in one query (cached per account)
+  formattedResponse = EvaluationStatus.forAccount(accountSessionInfo["id"])
+  if (formattedResponse == None):
     return ({ "message": "Session expired" }, 403)
 
-  # retrieve user requirement details
-  membershipId = accountDetails["membershipId"]
-  userDetails = MembershipDb.get(membershipId)
-  userEmail = userDetails["email"]
-
-  # requirements and evaluation has one-to-one relationship
-  matchedReqs = RequirementDb.getOrSearch(["email"], [userEmail])
-
-  formattedResponse = []
-  for requirement in matchedReqs:
-    evaluation = EvaluationDb.getOrSearch(["requirementId"], [requirement["id"]])
-    if (len(evaluation) == 0):
-      continue
-
-    # user attendance status
-    evaluation = evaluation[0]
-    attendanceStatus = "registered"
-    if (evaluation["finalized"] == 1 and (evaluation["criteria"] != "")):
-      attendanceStatus = "attended"
-    if (evaluation["finalized"] == 1 and (evaluation["criteria"] == "" or evaluation["criteria"] == None)):
-      attendanceStatus = "not-attended"
-
-    # event details extraction
-    if (requirement["type"] == "external"):
-      eventData = ExternalEventDb.get(requirement["eventId"])
-    else:
-      eventData = InternalEventDb.get(requirement["eventId"])
-
-    formattedResponse.append({
-      "evaluationId": evaluation["id"],
-      "event": eventData,
-      "requirement": requirement,
-      "eventType": requirement["type"],
-      "attendanceStatus": attendanceStatus,
-    })
-  
   return {
     "message": "Successfully retrieved personal evaluation status",
     "data": formattedResponse
@@ -338,11 +304,27 @@ def evaluateByRequirement(requirementId):
     # Don't fail the evaluation if satisfaction survey save fails
     print(f"Error saving to satisfactionSurveys: {e}")
 
+  FeatureStore.onRequirementChanged(requirement)
+  ReportAggregator.invalidateRequirement(requirement)
+  EvaluationStatus.invalidateRequirement(requirement)
+
   return {
     "message": "Successfully evaluated event",
     "data": EvaluationDb.get(evaluationTemplate["id"])
   }
 
+def evaluateBatch():
+  """Finalize many evaluations or attendance marks at once, see app.modules.EvaluationBatch"""
+  try:
+    summary = EvaluationBatch.finalizeMany((request.json or {}).get("evaluations"))
+  except EvaluationBatch.BatchError as e:
+    return ({ "message": str(e), "errors": e.errors }, 400)
+
+  return {
+    "message": f"Successfully finalized {summary['finalized']} evaluations",
+    "data": summary
+  }
+
 def submitBeneficiaryEvaluation():
   """
   Submit beneficiary evaluation directly to satisfactionSurveys table
@@ -8,7 +8,10 @@ from ..models.AccountModel import AccountModel
 from ..models.RequirementsModel import RequirementsModel
 from ..models.EvaluationModel import EvaluationModel
 
-from ..modules.LSIAlgorithm import LSICosineSimilarityMatch
+from ..modules.LSIAlgorithm import LSIAverageContextMatch
+from ..modules import FeatureStore, EvaluationStatus
+from ..utils.jsonProvider import streamJsonResponse
+from ..middlewares.paramcheck import fieldsCheck
 
 from flask import request, g
 from datetime import datetime
@@ -23,6 +26,9 @@ SignatoriesDb = SignatoriesModel()
 EvaluationDb = EvaluationModel()
 AccountDb = AccountModel()
 
+# columns getAll filters and sorts on, fetched even when ?fields= leaves them out
+EVENT_LIST_COLUMNS = ["status", "durationEnd", "createdAt"]
+
 def getAll():
   try:
     # manual mapping of user details
@@ -32,8 +38,13 @@ def getAll():
         "message": "Authentication required"
       }, 401)
     
-    externalEvents = ExternalEventDb.getAll()
-    internalEvents = InternalEventDb.getAll()
+    fields, error = fieldsCheck(ExternalEventDb, InternalEventDb)
+    if (error != None):
+      return error
+    queryFields = None if fields == None else fields + EVENT_LIST_COLUMNS
+
+    externalEvents = ExternalEventDb.getAll(queryFields)
+    internalEvents = InternalEventDb.getAll(queryFields)
 
     combinedEvents = []
 
@@ -119,10 +130,13 @@ def getAll():
         created_by_id = externalEvents[i].get("createdBy")
         signatory_id = externalEvents[i].get("signatoriesId")
         
-        externalEvents[i]["createdBy"] = accounts_map.get(created_by_id) if created_by_id else None
+        # createdBy and signatoriesId are only expanded when they were selected
+        if ("createdBy" in externalEvents[i]):
+          externalEvents[i]["createdBy"] = accounts_map.get(created_by_id) if created_by_id else None
         externalEvents[i]["hasReport"] = external_reports_map.get(event_id, False)
         externalEvents[i]["eventTypeIndicator"] = "external"
-        externalEvents[i]["signatoriesId"] = signatories_map.get(signatory_id) if signatory_id else None
+        if ("signatoriesId" in externalEvents[i]):
+          externalEvents[i]["signatoriesId"] = signatories_map.get(signatory_id) if signatory_id else None
       except Exception as e:
         print(f"Error formatting external event {externalEvents[i].get('id', 'unknown')}: {e}")
         # Continue with next event
@@ -134,10 +148,12 @@ def getAll():
         created_by_id = internalEvents[i].get("createdBy")
         signatory_id = internalEvents[i].get("signatoriesId")
         
-        internalEvents[i]["createdBy"] = accounts_map.get(created_by_id) if created_by_id else None
+        if ("createdBy" in internalEvents[i]):
+          internalEvents[i]["createdBy"] = accounts_map.get(created_by_id) if created_by_id else None
         internalEvents[i]["hasReport"] = internal_reports_map.get(event_id, False)
         internalEvents[i]["eventTypeIndicator"] = "internal"
-        internalEvents[i]["signatoriesId"] = signatories_map.get(signatory_id) if signatory_id else None
+        if ("signatoriesId" in internalEvents[i]):
+          internalEvents[i]["signatoriesId"] = signatories_map.get(signatory_id) if signatory_id else None
       except Exception as e:
         print(f"Error formatting internal event {internalEvents[i].get('id', 'unknown')}: {e}")
         # Continue with next event
@@ -146,12 +162,12 @@ def getAll():
     combinedEvents: list = externalEvents + internalEvents
     combinedEvents.sort(key=lambda x: x.get("createdAt", 0) or 0, reverse=True)
 
-    return {
+    return streamJsonResponse({
       "events": combinedEvents,
       "external": externalEvents,
       "internal": internalEvents,
       "message": "Successfully retrieved all events"
-    }
+    })
   except Exception as e:
     print(f"Error in getAll events: {e}")
     import traceback
@@ -298,24 +314,34 @@ def getAnalysis(id: int, eventType: str):
   if (eventDetails == None):
     return ({ "message": "Cannot find event specified" }, 404)
 
-  matchedRequirements = RequirementsDb.getAndSearch(["eventId", "type"], [id, eventType])
-  if (len(matchedRequirements) == 0):
+  # requirements with their evaluation in one round trip
+  conn, cursor = connection.cursorInstance()
+  try:
+    cursor.execute(connection.convert_placeholders(f"""
+      SELECT r.id, ev.id, ev.recommendations
+      FROM {connection.quote_identifier('requirements')} r
+      LEFT JOIN {connection.quote_identifier('evaluation')} ev ON ev.requirementId = r.id
+      WHERE r.eventId = ? AND r.type = ?
+      ORDER BY ev.id
+    """), (id, eventType))
+    matchedRows = cursor.fetchall()
+  finally:
+    conn.close()
+
+  if (len(matchedRows) == 0):
     return ({ "message": "No Requirements for the specified event found" }, 406)
 
-  textToAnalyze = []
-  for requirement in matchedRequirements:
-    matchedEvaluation = EvaluationDb.getAndSearch(["requirementId"], [requirement["id"]])
-    if (len(matchedEvaluation) == 0):
+  # first evaluation of each requirement, as before
+  evaluationsByRequirement = {}
+  for requirementId, evaluationId, recommendations in matchedRows:
+    if (evaluationId == None or requirementId in evaluationsByRequirement):
       continue
+    evaluationsByRequirement[requirementId] = (evaluationId, recommendations)
 
-    matchedEvaluation = matchedEvaluation[0]
-    textToAnalyze.append(matchedEvaluation["recommendations"])
-
-  analysis = LSICosineSimilarityMatch(textToAnalyze)
-  normalized = averageAnalysis(analysis)
+  textToAnalyze = [recommendations for _, recommendations in evaluationsByRequirement.values()]
 
   return {
-    "analysis": normalized,
+    "analysis": LSIAverageContextMatch(textToAnalyze),
     "message": "Successfully returned analysis"
   }
 
@@ -395,6 +421,7 @@ def createExternalEvent():
         eventProposalType=request.json["eventProposalType"] or "[]"
       )
       print(f"[CREATE_EXTERNAL_EVENT] Event created successfully with ID: {createdExternalEvent.get('id')}")
+      FeatureStore.onEventChanged(createdExternalEvent.get("id"), "external")
       
       return {
         "data": createdExternalEvent,
@@ -492,6 +519,7 @@ def createInternalEvent():
         eventProposalType=request.json.get("eventProposalType") or "[]"
       )
       print(f"[CREATE_INTERNAL_EVENT] Event created successfully with ID: {createdInternalEvent.get('id')}")
+      FeatureStore.onEventChanged(createdInternalEvent.get("id"), "internal")
       
       return {
         "data": createdInternalEvent,
@@ -529,6 +557,8 @@ def editExternalEventStatus(id, status: str):
 
   ExternalEventDb.updateSpecific(id, ["status"], (status,))
   updatedData = ExternalEventDb.get(id)
+  FeatureStore.onEventChanged(id, "external")
+  EvaluationStatus.invalidateEvent(id, "external")
   return {
     "data": updatedData,
     "message": "Event successfully submitted"
@@ -546,6 +576,8 @@ def editInternalEventStatus(id, status: str):
 
   InternalEventDb.updateSpecific(id, ["status"], (status,))
   updatedData = InternalEventDb.get(id)
+  FeatureStore.onEventChanged(id, "internal")
+  EvaluationStatus.invalidateEvent(id, "internal")
   return {
     "data": updatedData,
     "message": "Event successfully submitted"
@@ -715,6 +747,8 @@ def updateEvent(id, eventType: str):
           matchedEvent.get("feedback_id"),
           eventProposalType
         ))
+        FeatureStore.onEventChanged(id, "internal")
+        EvaluationStatus.invalidateEvent(id, "internal")
         
         return {
           "data": updatedEvent,
@@ -768,6 +802,8 @@ def updateEvent(id, eventType: str):
       request.json.get("externalServiceType") or "[]",
       request.json.get("eventProposalType") or "[]"
     ))
+    FeatureStore.onEventChanged(id, "external")
+    EvaluationStatus.invalidateEvent(id, "external")
 
   return {
     "message": "Successfully updated event",
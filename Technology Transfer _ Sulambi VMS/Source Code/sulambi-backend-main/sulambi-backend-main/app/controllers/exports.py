@@ -0,0 +1,29 @@
+from ..modules import Exporter
+from flask import request, Response
+
+# query parameters that are not column filters
+RESERVED_PARAMS = ["format", "columns", "from", "to"]
+
+def exportDataset(dataset: str):
+  """
+  Stream a dataset as CSV or XLSX.
+    ?format=csv|xlsx  &columns=fullname,email  &from=2024-08-01&to=2025-07-31  &<column>=<value>
+  """
+  fmt = (request.args.get("format") or "csv").lower()
+  columns = [column.strip() for column in (request.args.get("columns") or "").split(",") if column.strip()]
+  filters = { key: value for key, value in request.args.items() if key not in RESERVED_PARAMS }
+
+  try:
+    mimetype, filename, chunks = Exporter.exportChunks(
+      dataset, fmt, columns or None, filters,
+      request.args.get("from"), request.args.get("to")
+    )
+  except ValueError as e:
+    return ({ "message": str(e) }, 400)
+
+  return Response(chunks, mimetype=mimetype, headers={
+    "Content-Disposition": f"attachment; filename=\"{filename}\"",
+    "Cache-Control": "no-store",
+    # keep reverse proxies from buffering the whole export
+    "X-Accel-Buffering": "no",
+  })
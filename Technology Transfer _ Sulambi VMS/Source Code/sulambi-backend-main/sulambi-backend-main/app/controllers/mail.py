@@ -0,0 +1,33 @@
+from ..modules import MailOutbox
+from flask import request
+
+def getOutboxSummary():
+  status = request.args.get("status")
+  try:
+    limit = min(int(request.args.get("limit", 50)), 500)
+  except ValueError:
+    limit = 50
+
+  return {
+    "message": "Successfully retrieved outbox status",
+    "data": MailOutbox.getSummary(status, limit)
+  }
+
+def getOutboxMail(id):
+  mail = MailOutbox.getStatus(id)
+  if (mail == None):
+    return ({ "message": "Mail does not exist in the outbox" }, 404)
+
+  return {
+    "message": "Successfully retrieved mail status",
+    "data": mail
+  }
+
+def requeueOutboxMail(id):
+  if (not MailOutbox.requeue(id)):
+    return ({ "message": "Only queued or dead-lettered mail can be requeued" }, 409)
+
+  return {
+    "message": "Mail requeued for delivery",
+    "data": MailOutbox.getStatus(id)
+  }
@@ -1,5 +1,10 @@
 from ..models.MembershipModel import MembershipModel
-from ..modules.Mailer import threadedHtmlMailer
+from ..modules import TemplateRenderer
+from ..modules.Mailer import threadedHtmlMailer, threadedHtmlMailerMany
+from ..modules import FeatureStore
+from ..middlewares.paramcheck import idListCheck, fieldsCheck
+from ..utils.jsonProvider import streamJsonResponse
+from flask import request, Response
 from dotenv import load_dotenv
 import os
 
@@ -7,9 +12,15 @@ load_dotenv()
 
 MembershipDb = MembershipModel()
 FRONTEND_APP_URL = os.getenv("FRONTEND_APP_URL")
+BULK_ACTION_LIMIT = int(os.getenv("BULK_ACTION_LIMIT", 500))
 
 def getAllMembership():
-  all_members = MembershipDb.getAll()
+  fields, error = fieldsCheck(MembershipDb)
+  if (error != None):
+    return error
+
+  # accepted is always fetched for the status breakdown below
+  all_members = MembershipDb.getAll(None if fields == None else fields + ["accepted"])
   print(f"[MEMBERSHIP API] Total members retrieved: {len(all_members)}")
   
   # Count members by status for debugging
@@ -31,16 +42,18 @@ def getAllMembership():
   
   # Ensure None values are properly serialized (Flask should handle this, but let's be explicit)
   # Convert None to None (which JSON serializes to null) - this should already happen, but let's ensure
-  return {
+  return streamJsonResponse({
     "message": "Successfully retrieved membership data",
     "data": all_members
-  }
+  })
 
 def approveMembership(id):
   approvedMembership = MembershipDb.accept(id)
   if (approvedMembership == None):
     return ({"message": "Error occured in approving membership"}, 400)
 
+  FeatureStore.onMemberChanged(membershipId=id)
+
   sendAcceptMembershipMail(approvedMembership)
   return {
     "message": "Membership request approved",
@@ -52,31 +65,96 @@ def rejectMembership(id):
   if (rejectedMembership == None):
     return ({"message": "Error occured in rejecting membership"}, 400)
 
+  FeatureStore.onMemberChanged(membershipId=id)
+
   sendRejectMembershipMail(rejectedMembership)
   return {
     "message": "Membership request successfully rejected",
     "data": rejectedMembership
   }
 
+def approveMembershipBulk():
+  ids, error = idListCheck(BULK_ACTION_LIMIT)
+  if (error != None):
+    return error
+
+  approved = MembershipDb.acceptMany(ids)
+  if (len(approved) == 0):
+    return ({ "message": "None of the membership requests exist" }, 404)
+
+  refreshMembers(approved)
+  login_link = (FRONTEND_APP_URL + "/login") if FRONTEND_APP_URL else "[Login URL - Please set FRONTEND_APP_URL environment variable]"
+  sendMembershipMails("we-are-pleased-to-inform-membership.html", approved, { "link": login_link })
+
+  approvedIds = { member["id"] for member in approved }
+  return {
+    "message": f"{len(approved)} membership requests approved",
+    "data": approved,
+    "skipped": [id for id in ids if id not in approvedIds]
+  }
+
+def rejectMembershipBulk():
+  ids, error = idListCheck(BULK_ACTION_LIMIT)
+  if (error != None):
+    return error
+
+  rejected = MembershipDb.rejectMany(ids)
+  if (len(rejected) == 0):
+    return ({ "message": "None of the membership requests exist" }, 404)
+
+  refreshMembers(rejected)
+  sendMembershipMails("we-reject-to-inform-membership.html", rejected)
+
+  rejectedIds = { member["id"] for member in rejected }
+  return {
+    "message": f"{len(rejected)} membership requests rejected",
+    "data": rejected,
+    "skipped": [id for id in ids if id not in rejectedIds]
+  }
+
 def activateMembership(id):
   activated = MembershipDb.activate(id)
   if (activated == None):
     return ({"message": "Error occured in re-activating membership"}, 400)
+  FeatureStore.onMemberChanged(membershipId=id)
   return { "message": "Successfully re-activated membership" }
 
 def deactivateMembership(id):
   deactivated = MembershipDb.deactivate(id)
   if (deactivated == None):
     return ({"message": "Error occured in deactivating membership"}, 400)
+  FeatureStore.onMemberChanged(membershipId=id)
   return { "message": "Successfully deactivated membership" }
 
 
 ######################
 #  Helper Functions  #
 ######################
+def refreshMembers(members: list):
+  if (not FeatureStore.FEATURE_STORE_ENABLED):
+    return
+  try:
+    FeatureStore.refreshVolunteers([member.get("email") for member in members])
+  except Exception as e:
+    print(f"[FEATURE_STORE] Failed to refresh {len(members)} volunteers: {e}")
+
+def sendMembershipMails(templateName: str, members: list, extraValues: dict = {}):
+  """Render the template once for every member and queue all mails in one outbox insert"""
+  try:
+    rendered = TemplateRenderer.renderMany(templateName, [
+      { "name": (member.get("fullname") or "").split(" ")[0], **extraValues } for member in members
+    ])
+    threadedHtmlMailerMany([
+      (member.get("email"), "SULAMBI - VOSA Membership Application", html)
+      for member, html in zip(members, rendered)
+    ])
+  except Exception as e:
+    print(f"[EMAIL ERROR] Failed to queue {len(members)} membership emails: {str(e)}")
+
 def sendRejectMembershipMail(memberDetails):
-  templateHtml = open("templates/we-reject-to-inform-membership.html", "r").read()
-  templateHtml = templateHtml.replace("[name]", memberDetails.get("fullname").split(" ")[0])
+  templateHtml = TemplateRenderer.render("we-reject-to-inform-membership.html", {
+    "name": memberDetails.get("fullname").split(" ")[0]
+  })
 
   threadedHtmlMailer(
     mailTo=memberDetails.get("email"),
@@ -87,11 +165,12 @@ def sendRejectMembershipMail(memberDetails):
 def sendAcceptMembershipMail(memberDetails):
   try:
     print(f"[EMAIL] Sending approval email to {memberDetails.get('email')}")
-    templateHtml = open("templates/we-are-pleased-to-inform-membership.html", "r").read()
-    templateHtml = templateHtml.replace("[name]", memberDetails.get("fullname").split(" ")[0])
     # Use FRONTEND_APP_URL if set, otherwise use a placeholder
     login_link = (FRONTEND_APP_URL + "/login") if FRONTEND_APP_URL else "[Login URL - Please set FRONTEND_APP_URL environment variable]"
-    templateHtml = templateHtml.replace("[link]", login_link)
+    templateHtml = TemplateRenderer.render("we-are-pleased-to-inform-membership.html", {
+      "name": memberDetails.get("fullname").split(" ")[0],
+      "link": login_link
+    })
     
     if not FRONTEND_APP_URL:
       print(f"[EMAIL WARNING] FRONTEND_APP_URL not set - approval email will have placeholder login link")
@@ -108,4 +187,53 @@ def sendAcceptMembershipMail(memberDetails):
   except Exception as e:
     print(f"[EMAIL ERROR] Failed to send approval email: {str(e)}")
     import traceback
-    traceback.print_exc()
\ No newline at end of file
+    traceback.print_exc()
+
+def importMembership():
+  """Start a background import of an uploaded member spreadsheet (.xlsx or .csv)"""
+  from ..modules import MemberImporter
+  import tempfile
+
+  upload = request.files.get("file")
+  if (upload == None or upload.filename == ""):
+    return ({"message": "Attach the member spreadsheet as 'file'"}, 400)
+
+  extension = os.path.splitext(upload.filename)[1].lower()
+  if (extension not in [".xlsx", ".xls", ".csv"]):
+    return ({"message": "Only .xlsx, .xls and .csv files can be imported"}, 400)
+
+  # the import outlives the request, so the upload is copied out of the request stream
+  fd, path = tempfile.mkstemp(suffix=extension, prefix="member-import-")
+  with os.fdopen(fd, "wb") as tmpFile:
+    upload.save(tmpFile)
+
+  dryRun = (request.form.get("dryRun") or "").lower() in ["1", "true", "yes"]
+  jobId = MemberImporter.startImport(path, upload.filename, dryRun=dryRun)
+  return ({
+    "message": "Member import started",
+    "data": MemberImporter.getJob(jobId)
+  }, 202)
+
+def getImportStatus(id):
+  from ..modules import MemberImporter
+
+  job = MemberImporter.getJob(id)
+  if (job == None):
+    return ({"message": "Import job does not exist"}, 404)
+
+  job["progress"] = round(job["processed"] / job["total"], 3) if job["total"] else 0
+  return {
+    "message": "Successfully retrieved import status",
+    "data": job
+  }
+
+def getImportRejects(id):
+  from ..modules import MemberImporter
+
+  if (MemberImporter.getJob(id) == None):
+    return ({"message": "Import job does not exist"}, 404)
+
+  rejects = MemberImporter.getRejects(id) or "row,reason\n"
+  return Response(rejects, mimetype="text/csv", headers={
+    "Content-Disposition": f"attachment; filename=\"member-import-{id}-rejects.csv\""
+  })
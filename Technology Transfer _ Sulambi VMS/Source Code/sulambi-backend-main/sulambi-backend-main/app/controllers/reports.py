@@ -6,6 +6,7 @@ from ..models.InternalReportModel import InternalReportModel
 from ..models.RequirementsModel import RequirementsModel
 from ..models.EvaluationModel import EvaluationModel
 from ..models.SignatoriesModel import SignatoriesModel
+from ..modules import ImageVariants, ReportAggregator
 
 from flask import request
 import json
@@ -45,6 +46,9 @@ def getAllReports():
     report["photoCaptions"] = report["photoCaptions"].split(",") if report.get("photoCaptions") else []
     returnableInternal.append(report)
 
+  # thumb/medium paths for every photo, looked up in one query
+  ImageVariants.attachVariants(returnableExternal + returnableInternal)
+
   return {
     "external": returnableExternal,
     "internal": returnableInternal,
@@ -52,24 +56,8 @@ def getAllReports():
   }
 
 def getReportCalculations(eventId: int, eventType: str):
-  from ..database.connection import convert_boolean_value
-  accepted_value = convert_boolean_value(1)
-  registeredUsers = RequirementsDb.getAndSearch(
-    ["eventId", "type", "accepted"],
-    [eventId, eventType, accepted_value])
-
-  # filter only the one who attended
-  onlyAttendedUsers = []
-  onlyAttendedEvals = []
-  for requirement in registeredUsers:
-    evaluationMatch = EvaluationDb.getAndSearch(["requirementId"], [requirement["id"]])
-    if (len(evaluationMatch) == 0):
-      continue
-
-    evaluationMatch = evaluationMatch[0]
-    if (evaluationMatch["finalized"] == 1):
-      onlyAttendedUsers.append(requirement)
-      onlyAttendedEvals.append(evaluationMatch)
+  # attended volunteers grouped by (affiliation, sex, criterion, rating) in one query
+  counts = ReportAggregator.crossTab(eventId, eventType)
 
   # get specific signatories for the event mentioned
   signatoriesData = {}
@@ -83,211 +71,37 @@ def getReportCalculations(eventId: int, eventType: str):
     signatoriesData = SignatoriesDb.get(signId)
 
   if (eventType == "external"):
-    # users sex details
-    attendedOutsiderMale = 0
-    attendedOutsiderFemale = 0
-    attendedBsuMale = 0
-    attendedBsuFemale = 0
-
-    # users overall experience details
-    outsiderExcellent = 0
-    outsiderVerySatisfactory = 0
-    outsiderSatisfactory = 0
-    outsiderFair = 0
-    outsiderPoor = 0
-    bsuExcellent = 0
-    bsuVerySatisfactory = 0
-    bsuSatisfactory = 0
-    bsuFair = 0
-    bsuPoor = 0
-
-    # user overall experience with the timeline
-    timelineoutsiderExcellent = 0
-    timelineoutsiderVerySatisfactory = 0
-    timelineoutsiderSatisfactory = 0
-    timelineoutsiderFair = 0
-    timelineoutsiderPoor = 0
-    timelinebsuExcellent = 0
-    timelinebsuVerySatisfactory = 0
-    timelinebsuSatisfactory = 0
-    timelinebsuFair = 0
-    timelinebsuPoor = 0
-
-    # im too tired to think of solution...
-    for requirement, evaluation in zip(onlyAttendedUsers, onlyAttendedEvals):
-      # count satisfactory of users outside campus
-      evalCriteriaString = evaluation["criteria"]
-      evalCriteriaDict: dict = safeJsonParser(evalCriteriaString)
-
-      # safe parsable test
-      if (not evalCriteriaDict):
-        continue
-
-      if (requirement["affiliation"] == "N/A"):
-        # count sex outside of campus
-        if (requirement["sex"].lower() == "male"):
-          attendedOutsiderMale += 1
-        else:
-          attendedOutsiderFemale += 1
-
-        if ((evalCriteriaDict.get("overall") or "").lower() == "excellent"):
-          outsiderExcellent += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "very satisfactory"):
-          outsiderVerySatisfactory += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "satisfactory"):
-          outsiderSatisfactory += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "fair"):
-          outsiderFair += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "poor"):
-          outsiderPoor += 1
-
-        # timeline calculation
-        if ((evalCriteriaDict.get("time") or "").lower() == "excellent"):
-          timelineoutsiderExcellent += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "very satisfactory"):
-          timelineoutsiderVerySatisfactory += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "satisfactory"):
-          timelineoutsiderSatisfactory += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "fair"):
-          timelineoutsiderFair += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "poor"):
-          timelineoutsiderPoor += 1
-      else:
-        # count bsu sex volunteer
-        if ((requirement.get("sex") or "").lower() == "male"):
-          attendedBsuMale += 1
-        else:
-          attendedBsuFemale += 1
-
-        # overall performance
-        if ((evalCriteriaDict.get("overall") or "").lower() == "excellent"):
-          bsuExcellent += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "very satisfactory"):
-          bsuVerySatisfactory += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "satisfactory"):
-          bsuSatisfactory += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "fair"):
-          bsuFair += 1
-        if ((evalCriteriaDict.get("overall") or "").lower() == "poor"):
-          bsuPoor += 1
-
-        # timeline performance
-        if ((evalCriteriaDict.get("time") or "").lower() == "excellent"):
-          timelinebsuExcellent += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "very satisfactory"):
-          timelinebsuVerySatisfactory += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "satisfactory"):
-          timelinebsuSatisfactory += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "fair"):
-          timelinebsuFair += 1
-        if ((evalCriteriaDict.get("time") or "").lower() == "poor"):
-          timelinebsuPoor += 1
-
     return {
       "data": {
         "outsider": {
-          "sex": {
-            "male": attendedOutsiderMale,
-            "female": attendedOutsiderFemale
-          },
+          "sex": ReportAggregator.sexCounts(counts, ["outsider"]),
           "evaluation": {
-            "overall": {
-              "excellent": outsiderExcellent,
-              "verySatisfactory": outsiderVerySatisfactory,
-              "satisfactory": outsiderSatisfactory,
-              "fair": outsiderFair,
-              "poor": outsiderPoor
-            },
-            "timeline": {
-              "excellent": timelineoutsiderExcellent,
-              "verySatisfactory": timelineoutsiderVerySatisfactory,
-              "satisfactory": timelineoutsiderSatisfactory,
-              "fair": timelineoutsiderFair,
-              "poor": timelineoutsiderPoor
-            }
+            "overall": ReportAggregator.ratingCounts(counts, "overall", ["outsider"]),
+            "timeline": ReportAggregator.ratingCounts(counts, "timeline", ["outsider"])
           }
         },
         "insider": {
-          "sex": {
-            "male": attendedBsuMale,
-            "female": attendedBsuFemale
-          },
+          "sex": ReportAggregator.sexCounts(counts, ["insider"]),
           "evaluation": {
-            "overall": {
-              "excellent": bsuExcellent,
-              "verySatisfactory": bsuVerySatisfactory,
-              "satisfactory": bsuSatisfactory,
-              "fair": bsuFair,
-              "poor": bsuPoor
-            },
-            "timeline": {
-              "excellent": timelinebsuExcellent,
-              "verySatisfactory": timelinebsuVerySatisfactory,
-              "satisfactory": timelinebsuSatisfactory,
-              "fair": timelinebsuFair,
-              "poor": timelinebsuPoor
-            }
+            "overall": ReportAggregator.ratingCounts(counts, "overall", ["insider"]),
+            "timeline": ReportAggregator.ratingCounts(counts, "timeline", ["insider"])
           }
         },
         "signatoriesData": signatoriesData
       },
       "message": "Successfully retrieved event report analytics"
     }
-  
+
   responseFormat = {
-    "sex": {
-      "male": 0,
-      "female": 0
-    },
+    "sex": ReportAggregator.sexCounts(counts),
     "evalResult": {
-      "male": {
-        "excellent": 0,
-        "verySatisfactory": 0,
-        "satisfactory": 0,
-        "fair": 0,
-        "poor": 0
-      },
-      "female": {
-        "excellent": 0,
-        "verySatisfactory": 0,
-        "satisfactory": 0,
-        "fair": 0,
-        "poor": 0
-      }
+      "male": ReportAggregator.ratingCounts(counts, "overall", sexes=["male"]),
+      "female": ReportAggregator.ratingCounts(counts, "overall", sexes=["female"])
     },
     "signatoriesData": signatoriesData
   }
 
   if (eventType == "internal"):
-    for requirement, evaluation in zip(onlyAttendedUsers, onlyAttendedEvals):
-      evalCriteriaString = evaluation["criteria"]
-      evalCriteriaDict: dict = safeJsonParser(evalCriteriaString)
-
-      if (requirement["sex"] == "male"):
-        responseFormat["sex"]["male"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "excellent"):
-          responseFormat["evalResult"]["male"]["excellent"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "very satisfactory"):
-          responseFormat["evalResult"]["male"]["verySatisfactory"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "satisfactory"):
-          responseFormat["evalResult"]["male"]["satisfactory"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "fair"):
-          responseFormat["evalResult"]["male"]["fair"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "poor"):
-          responseFormat["evalResult"]["male"]["poor"] += 1
-      else:
-        responseFormat["sex"]["female"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "excellent"):
-          responseFormat["evalResult"]["female"]["excellent"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "very satisfactory"):
-          responseFormat["evalResult"]["female"]["verySatisfactory"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "satisfactory"):
-          responseFormat["evalResult"]["female"]["satisfactory"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "fair"):
-          responseFormat["evalResult"]["female"]["fair"] += 1
-        if (evalCriteriaDict.get("overall").lower() == "poor"):
-          responseFormat["evalResult"]["female"]["poor"] += 1
-
     return {
       "data": responseFormat,
       "message": "Successfully retrieved report analytics"
@@ -334,6 +148,7 @@ def createReport(eventId: int, eventType: str):
     caption = request.form.get(captionKey, "")
     photoCaptions.append(caption)
   photoCaptionsStr = ",".join(photoCaptions)
+  ImageVariants.scheduleVariants(list(photoPath.values()))
 
   # checks if report has been submitted to the event id
   if (eventType == "external"):
@@ -408,6 +223,7 @@ def updateReport(reportId: int, reportType: str):
       caption = request.form.get(captionKey, "")
       photoCaptions.append(caption)
     photoCaptionsStr = ",".join(photoCaptions)
+    ImageVariants.scheduleVariants(list(photoPath.values()))
     
     if reportType == "external":
       # Check if report exists
@@ -432,6 +248,7 @@ def updateReport(reportId: int, reportType: str):
       updatedReport["signatoriesId"] = SignatoriesDb.get(updatedReport["signatoriesId"])
       updatedReport["photos"] = updatedReport["photos"].split(",") if updatedReport["photos"] else []
       updatedReport["photoCaptions"] = updatedReport["photoCaptions"].split(",") if updatedReport.get("photoCaptions") else []
+      ImageVariants.attachVariants([updatedReport])
       
       return {
         "data": updatedReport,
@@ -467,6 +284,7 @@ def updateReport(reportId: int, reportType: str):
       updatedReport["signatoriesId"] = SignatoriesDb.get(updatedReport["signatoriesId"])
       updatedReport["photos"] = updatedReport["photos"].split(",") if updatedReport["photos"] else []
       updatedReport["photoCaptions"] = updatedReport["photoCaptions"].split(",") if updatedReport.get("photoCaptions") else []
+      ImageVariants.attachVariants([updatedReport])
       
       return {
         "data": updatedReport,
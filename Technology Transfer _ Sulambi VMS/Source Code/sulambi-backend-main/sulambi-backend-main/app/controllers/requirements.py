@@ -5,8 +5,12 @@ from ..models.ExternalEventModel import ExternalEventModel
 from ..models.InternalEventModel import InternalEventModel
 from ..models.EvaluationModel import EvaluationModel
 from ..models.MembershipModel import MembershipModel
-from ..modules.CallbackTimer import executeDelayedAction
-from ..modules.Mailer import threadedHtmlMailer, htmlMailer
+from ..modules import Scheduler
+from ..modules import TemplateRenderer
+from ..modules.Mailer import threadedHtmlMailer, threadedHtmlMailerMany, htmlMailer
+from ..modules import FeatureStore, ReportAggregator, EvaluationStatus, RegistrationGuard, RequirementUploads
+from ..middlewares.paramcheck import idListCheck, fieldsCheck
+from ..utils.jsonProvider import streamJsonResponse
 
 from dotenv import load_dotenv
 import os
@@ -14,6 +18,9 @@ import os
 load_dotenv()
 
 FRONTEND_APP_URL = os.getenv("FRONTEND_APP_URL")
+BULK_ACTION_LIMIT = int(os.getenv("BULK_ACTION_LIMIT", 500))
+# columns getAllRequirements joins events and backfills members on, fetched even when ?fields= leaves them out
+REQUIREMENT_LIST_COLUMNS = ["type", "eventId", "fullname", "email", "srcode"]
 
 RequirementsDb = RequirementsModel()
 ExternalEventDb = ExternalEventModel()
@@ -29,9 +36,13 @@ def getAllRequirements():
     print("[REQUIREMENTS_GET_ALL] ========================================")
     print("[REQUIREMENTS_GET_ALL] Fetching all requirements...")
     
+    fields, error = fieldsCheck(RequirementsDb)
+    if (error != None):
+      return error
+
     step_start = time.time()
     # Get all requirements - already sorted by ID DESC in Model.getAll() for requirements table
-    requirements = RequirementsDb.getAll()
+    requirements = RequirementsDb.getAll(None if fields == None else fields + REQUIREMENT_LIST_COLUMNS)
     
     step_time = time.time() - step_start
     print(f"[REQUIREMENTS_GET_ALL] Retrieved {len(requirements)} requirements from database (sorted by most recent first) ({step_time:.2f}s)")
@@ -181,16 +192,25 @@ def getAllRequirements():
     print(f"[REQUIREMENTS_GET_ALL] ⏱️ Total time: {total_time:.2f}s")
     print("[REQUIREMENTS_GET_ALL] ========================================")
     
-    return {
+    return streamJsonResponse({
       "message": "Successfully retrieved all requirements",
       "data": requirements
-    }
+    })
   except Exception as e:
     print(f"[REQUIREMENTS_GET_ALL] ❌ ERROR: {str(e)}")
     import traceback
     print(f"[REQUIREMENTS_GET_ALL] Traceback: {traceback.format_exc()}")
     return ({ "message": f"Server error: {str(e)}" }, 500)
 
+def getRequirementUploads(id: str):
+  if (RequirementsDb.get(id) == None):
+    return ({"message": "Requirement ID entered does not exist"}, 404)
+
+  return {
+    "message": "Successfully retrieved upload status",
+    "data": RequirementUploads.getStatus(id)
+  }
+
 def acceptRequirements(id: int):
   existence = RequirementsDb.get(id)
   if (existence == None):
@@ -208,36 +228,26 @@ def acceptRequirements(id: int):
   # create an evaluation template for user to answer
   createdEval = EvaluationDb.create(id, "", "", "", "", "", False)
 
-  # Determine when to send evaluation email:
-  # - Prefer the later of event durationEnd and evaluationSendTime (both stored as epoch ms)
-  # - This ensures emails are sent only after the event has finished
-  try:
-    duration_end_ms = int(eventDetails.get("durationEnd", 0) or 0)
-  except (TypeError, ValueError):
-    duration_end_ms = 0
-
-  try:
-    eval_send_ms = int(eventDetails.get("evaluationSendTime", 0) or 0)
-  except (TypeError, ValueError):
-    eval_send_ms = 0
-
-  # If evaluationSendTime is not set or is earlier than event end, use event end time
-  target_epoch_ms = max(duration_end_ms, eval_send_ms)
+  target_epoch_ms = evaluationSendAt(eventDetails)
 
   # If still zero (no timing info), fall back to immediate execution
   if target_epoch_ms <= 0:
     print("[REQUIREMENTS_ACCEPT] Warning: No valid durationEnd/evaluationSendTime; sending evaluation email immediately")
     sendRenderedEvaluationMail(requirementDetails=existence, eventDetails=eventDetails)
-  else:
-    # Schedule email to be sent after target time (no execAnyway so past times are skipped)
-    executeDelayedAction(
-      target_epoch_ms,
-      lambda: sendRenderedEvaluationMail(requirementDetails=existence, eventDetails=eventDetails),
-      execAnyway=False
+  elif target_epoch_ms > Scheduler.nowMs():
+    # Persist the email as a scheduled job so it survives restarts (past times are skipped)
+    Scheduler.schedule(
+      "evaluation_mail",
+      { "requirementId": id },
+      runAt=target_epoch_ms,
+      dedupeKey=f"evaluation_mail:{id}"
     )
 
   RequirementsDb.updateSpecific(id, ["accepted"], (True,))
   updatedData = RequirementsDb.get(id)
+  FeatureStore.onRequirementChanged(existence)
+  ReportAggregator.invalidateRequirement(existence)
+  EvaluationStatus.invalidateRequirement(existence)
   sendAcceptedRequirementsMail(existence, eventDetails)
 
   return {
@@ -251,7 +261,12 @@ def rejectRequirements(id: int):
     return ({"message": "Requirement ID entered does not exist"}, 404)
 
   RequirementsDb.updateSpecific(id, ["accepted"], (False,))
+  # an earlier accept may have scheduled the evaluation mail
+  Scheduler.cancel(f"evaluation_mail:{id}")
   updatedData = RequirementsDb.get(id)
+  FeatureStore.onRequirementChanged(existence)
+  ReportAggregator.invalidateRequirement(existence)
+  EvaluationStatus.invalidateRequirement(existence)
 
   if (existence["type"] == "external"):
     eventDetails = ExternalEventDb.get(existence["eventId"])
@@ -268,72 +283,177 @@ def rejectRequirements(id: int):
     "data": updatedData
   }
 
+def acceptRequirementsBulk():
+  """Accept many requirements at once: one status update, one template insert, bulk mails and jobs"""
+  ids, error = idListCheck(BULK_ACTION_LIMIT, cast=str)
+  if (error != None):
+    return error
+
+  # requirement ids are uuid strings; legacy numeric ids are matched as strings too
+  found = { str(requirement["id"]): requirement for requirement in RequirementsDb.getMany(ids) }
+  events = getRequirementEvents(list(found.values()))
+
+  accepted = []
+  skipped = []
+  for id in ids:
+    requirement = found.get(id)
+    if (requirement == None):
+      skipped.append({ "id": id, "message": "Requirement ID entered does not exist" })
+      continue
+    eventDetails = events.get((requirement["type"] == "external", requirement["eventId"]))
+    if (eventDetails == None):
+      skipped.append({ "id": id, "message": "The event of this requirement no longer exists" })
+      continue
+    accepted.append((requirement, eventDetails))
+
+  if (len(accepted) == 0):
+    return ({ "message": "None of the requirements could be accepted", "skipped": skipped }, 404)
+
+  acceptedIds = [requirement["id"] for requirement, _ in accepted]
+
+  # re-accepting a requirement keeps the evaluation template it already has (evaluation.requirementId is TEXT)
+  requirementKeys = [str(id) for id in acceptedIds]
+  withTemplate = { str(evaluation["requirementId"]) for evaluation in EvaluationDb.getIn("requirementId", requirementKeys) }
+  EvaluationDb.createMany([(key, "", "", "", "", "", False) for key in requirementKeys if key not in withTemplate])
+
+  timeNow = Scheduler.nowMs()
+  evaluationMails = []
+  evaluationJobs = []
+  for requirement, eventDetails in accepted:
+    target_epoch_ms = evaluationSendAt(eventDetails)
+    if target_epoch_ms <= 0:
+      evaluationMails.append((requirement, eventDetails))
+    elif target_epoch_ms > timeNow:
+      evaluationJobs.append(({ "requirementId": requirement["id"] }, target_epoch_ms, f"evaluation_mail:{requirement['id']}"))
+  Scheduler.scheduleMany("evaluation_mail", evaluationJobs)
+
+  RequirementsDb.updateSpecificMany(acceptedIds, ["accepted"], (True,))
+  invalidateRequirements([requirement for requirement, _ in accepted])
+
+  threadedHtmlMailerMany(
+    renderEvaluationMails(evaluationMails) +
+    renderRequirementsMails("we-are-pleased-to-inform-requirements.html", accepted)
+  )
+
+  return {
+    "message": f"Successfully accepted {len(accepted)} requirements",
+    "data": RequirementsDb.getMany(acceptedIds),
+    "skipped": skipped
+  }
+
+def rejectRequirementsBulk():
+  """Reject many requirements at once with one status update and bulk mails"""
+  ids, error = idListCheck(BULK_ACTION_LIMIT, cast=str)
+  if (error != None):
+    return error
+
+  found = { str(requirement["id"]): requirement for requirement in RequirementsDb.getMany(ids) }
+  skipped = [{ "id": id, "message": "Requirement ID entered does not exist" } for id in ids if id not in found]
+  rejected = [found[id] for id in ids if id in found]
+
+  if (len(rejected) == 0):
+    return ({ "message": "None of the requirements could be rejected", "skipped": skipped }, 404)
+
+  rejectedIds = [requirement["id"] for requirement in rejected]
+  RequirementsDb.updateSpecificMany(rejectedIds, ["accepted"], (False,))
+  Scheduler.cancelMany([f"evaluation_mail:{id}" for id in rejectedIds])
+  invalidateRequirements(rejected)
+
+  # requirements whose event is gone are still rejected, they just get no mail
+  events = getRequirementEvents(rejected)
+  threadedHtmlMailerMany(renderRequirementsMails("we-reject-to-inform-requirements.html", [
+    (requirement, events[(requirement["type"] == "external", requirement["eventId"])])
+    for requirement in rejected
+    if (requirement["type"] == "external", requirement["eventId"]) in events
+  ]))
+
+  return {
+    "message": f"Successfully rejected {len(rejected)} requirements",
+    "data": RequirementsDb.getMany(rejectedIds),
+    "skipped": skipped
+  }
+
 def createNewRequirement(eventId: int):
   try:
     print("[REQUIREMENTS_CREATE] ========================================")
     print(f"[REQUIREMENTS_CREATE] Creating requirement for eventId: {eventId}")
     print(f"[REQUIREMENTS_CREATE] Request form keys: {list(request.form.keys())}")
     print(f"[REQUIREMENTS_CREATE] Request files keys: {list(request.files.keys())}")
+
+    # A retry of a submission that already went through gets its requirement back
+    idempotencyKey = RegistrationGuard.readIdempotencyKey(request)
+    submittedId = RegistrationGuard.findSubmission(idempotencyKey)
+    if (submittedId != None):
+      submitted = RequirementsDb.get(submittedId)
+      if (submitted != None):
+        print(f"[REQUIREMENTS_CREATE] Retried submission, returning requirement {submittedId}")
+        return {
+          "message": "Successfully uploaded requirements",
+          "data": submitted
+        }
+
+    # Check for duplicates before paying for the uploads (only if email is provided)
+    eventType = request.form.get("type") or "external"
+    email = request.form.get("email")
+    if (RegistrationGuard.findRegistration(eventId, eventType, email) != None):
+      print(f"[REQUIREMENTS_CREATE] ❌ Duplicate requirement found for email: {email}")
+      return ({ "message": "Your email has already been registered to this event" }, 403)
     
     # Use Cloudinary for file uploads (validates PDF and images only)
     # IMPORTANT: All uploads MUST go to Cloudinary - local storage is disabled
-    from app.utils.multipartFileWriter import cloudinaryFileWriter
-    
-    try:
-      resultingPaths = cloudinaryFileWriter(["medCert", "waiver"], folder="requirements")
-      print(f"[REQUIREMENTS_CREATE] ✅ Cloudinary uploads successful")
-      print(f"[REQUIREMENTS_CREATE] Cloudinary URLs: {resultingPaths}")
-      print(f"[REQUIREMENTS_CREATE] medCert URL: {resultingPaths.get('medCert', 'NOT FOUND')}")
-      print(f"[REQUIREMENTS_CREATE] waiver URL: {resultingPaths.get('waiver', 'NOT FOUND')}")
+    from app.utils.multipartFileWriter import cloudinaryFileWriter, stagingFileWriter
+
+    staged = None
+    if (RequirementUploads.UPLOAD_STAGING):
+      # Files are only staged locally here, RequirementUploads pushes them to Cloudinary in the background
+      try:
+        staged = stagingFileWriter(["medCert", "waiver"], RequirementUploads.stagingStorage())
+      except BadRequest as e:
+        print(f"[REQUIREMENTS_CREATE] ❌ BadRequest from staging: {str(e)}")
+        return ({ "message": str(e) }, 400)
+
+      for field, label in [("medCert", "Medical certificate"), ("waiver", "Waiver")]:
+        if (field not in staged):
+          RequirementUploads.discard(staged)
+          print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {label} file was not uploaded")
+          return ({ "message": f"{label} file was not uploaded" }, 400)
+
+      medCertUrl = waiverUrl = RequirementUploads.PENDING_UPLOAD
+      resultingPaths = { "medCert": medCertUrl, "waiver": waiverUrl }
+    else:
+      try:
+        resultingPaths = cloudinaryFileWriter(["medCert", "waiver"], folder="requirements")
+        print(f"[REQUIREMENTS_CREATE] ✅ Cloudinary uploads successful")
+        print(f"[REQUIREMENTS_CREATE] Cloudinary URLs: {resultingPaths}")
+        print(f"[REQUIREMENTS_CREATE] medCert URL: {resultingPaths.get('medCert', 'NOT FOUND')}")
+        print(f"[REQUIREMENTS_CREATE] waiver URL: {resultingPaths.get('waiver', 'NOT FOUND')}")
       
-      # Verify both files were uploaded to Cloudinary
-      medCertUrl = resultingPaths.get("medCert", "")
-      waiverUrl = resultingPaths.get("waiver", "")
+        # Verify both files were uploaded to Cloudinary
+        medCertUrl = resultingPaths.get("medCert", "")
+        waiverUrl = resultingPaths.get("waiver", "")
       
-      if not medCertUrl:
-        error_msg = "Medical certificate file was not uploaded to Cloudinary"
-        print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
-        return ({ "message": error_msg }, 400)
+        if not medCertUrl:
+          error_msg = "Medical certificate file was not uploaded to Cloudinary"
+          print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
+          return ({ "message": error_msg }, 400)
       
-      if not waiverUrl:
-        error_msg = "Waiver file was not uploaded to Cloudinary"
-        print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
-        return ({ "message": error_msg }, 400)
+        if not waiverUrl:
+          error_msg = "Waiver file was not uploaded to Cloudinary"
+          print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
+          return ({ "message": error_msg }, 400)
       
-      # Verify URLs are Cloudinary URLs (not local paths)
-      if not medCertUrl.startswith(('http://', 'https://')):
-        error_msg = f"Invalid medical certificate URL format. Expected Cloudinary URL, got: {medCertUrl[:50]}..."
-        print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
-        return ({ "message": "Medical certificate must be uploaded to Cloudinary" }, 400)
+        # the URL format is checked by the storage backend (CloudinaryBlobStorage.put)
+        print(f"[REQUIREMENTS_CREATE] ✅ Both files uploaded")
       
-      if not waiverUrl.startswith(('http://', 'https://')):
-        error_msg = f"Invalid waiver URL format. Expected Cloudinary URL, got: {waiverUrl[:50]}..."
+      except BadRequest as e:
+        # Re-raise BadRequest from cloudinaryFileWriter (Cloudinary config issues, validation errors, etc.)
+        print(f"[REQUIREMENTS_CREATE] ❌ BadRequest from Cloudinary upload: {str(e)}")
+        return ({ "message": str(e) }, 400)
+      except Exception as e:
+        error_msg = f"Failed to upload files to Cloudinary: {str(e)}"
         print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
-        return ({ "message": "Waiver must be uploaded to Cloudinary" }, 400)
-      
-      print(f"[REQUIREMENTS_CREATE] ✅ Both files verified as Cloudinary URLs")
-      
-    except BadRequest as e:
-      # Re-raise BadRequest from cloudinaryFileWriter (Cloudinary config issues, validation errors, etc.)
-      print(f"[REQUIREMENTS_CREATE] ❌ BadRequest from Cloudinary upload: {str(e)}")
-      return ({ "message": str(e) }, 400)
-    except Exception as e:
-      error_msg = f"Failed to upload files to Cloudinary: {str(e)}"
-      print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
-      return ({ "message": error_msg }, 500)
+        return ({ "message": error_msg }, 500)
     
-    # Only check for duplicates if email is provided
-    email = request.form.get("email")
-    if email and email.strip():
-      matchedUserRequirement = RequirementsDb.getAndSearch(
-        ["eventId", "type", "email"],
-        [eventId, request.form.get("type") or "external", email]
-      )
-
-      if (len(matchedUserRequirement) > 0):
-        print(f"[REQUIREMENTS_CREATE] ❌ Duplicate requirement found for email: {email}")
-        return ({ "message": "Your email has already been registered to this event" }, 403)
-
     print("[REQUIREMENTS_CREATE] Creating requirement in database...")
     
     # Convert empty strings to None for integer fields (PostgreSQL requirement)
@@ -354,34 +474,49 @@ def createNewRequirement(eventId: int):
     print(f"  medCert: {medCertUrl[:80]}...")
     print(f"  waiver: {waiverUrl[:80]}...")
     
-    createdRequirement = RequirementsDb.create(
-      medCertUrl,  # Cloudinary URL
-      waiverUrl,   # Cloudinary URL
-      eventId,
-      request.form.get("type") or "external",
-      request.form.get("curriculum") or "",
-      request.form.get("destination") or "",
-      request.form.get("firstAid") or "",
-      request.form.get("fees") or "",
-      request.form.get("personnelInCharge") or "",
-      request.form.get("personnelRole") or "",
-      request.form.get("fullname") or "",
-      request.form.get("email") or "",
-      request.form.get("srcode") or "",
-      age_value,  # This will be an integer or None, not a string
-      request.form.get("birthday") or "",
-      request.form.get("sex") or "",
-      request.form.get("campus") or "",
-      request.form.get("collegeDept") or "",
-      request.form.get("yrlevelprogram") or "",
-      request.form.get("address") or "",
-      request.form.get("contactNum") or "",
-      request.form.get("fblink") or "",
-      None,
-      request.form.get("affiliation") or "N/A"
-    )
+    try:
+      createdRequirement = RequirementsDb.create(
+        medCertUrl,  # Cloudinary URL
+        waiverUrl,   # Cloudinary URL
+        eventId,
+        eventType,
+        request.form.get("curriculum") or "",
+        request.form.get("destination") or "",
+        request.form.get("firstAid") or "",
+        request.form.get("fees") or "",
+        request.form.get("personnelInCharge") or "",
+        request.form.get("personnelRole") or "",
+        request.form.get("fullname") or "",
+        request.form.get("email") or "",
+        request.form.get("srcode") or "",
+        age_value,  # This will be an integer or None, not a string
+        request.form.get("birthday") or "",
+        request.form.get("sex") or "",
+        request.form.get("campus") or "",
+        request.form.get("collegeDept") or "",
+        request.form.get("yrlevelprogram") or "",
+        request.form.get("address") or "",
+        request.form.get("contactNum") or "",
+        request.form.get("fblink") or "",
+        None,
+        request.form.get("affiliation") or "N/A"
+      )
+    except Exception:
+      if (staged != None):
+        RequirementUploads.discard(staged)
+      # a concurrent submission won the race and the unique index rejected this one
+      if (RegistrationGuard.findRegistration(eventId, eventType, email) != None):
+        print(f"[REQUIREMENTS_CREATE] ❌ Concurrent duplicate requirement for email: {email}")
+        return ({ "message": "Your email has already been registered to this event" }, 403)
+      raise
+
+    if (staged != None):
+      RequirementUploads.track(createdRequirement.get("id"), staged)
+    RegistrationGuard.rememberSubmission(idempotencyKey, createdRequirement.get("id"))
 
     print(f"[REQUIREMENTS_CREATE] ✅ Requirement created successfully with ID: {createdRequirement.get('id')}")
+    FeatureStore.onRequirementChanged(createdRequirement)
+    EvaluationStatus.invalidateRequirement(createdRequirement)
     print("[REQUIREMENTS_CREATE] ========================================")
 
     return {
@@ -397,26 +532,111 @@ def createNewRequirement(eventId: int):
 ######################
 #  Helper Functions  #
 ######################
-def sendRenderedEvaluationMail(requirementDetails: dict, eventDetails: dict):
-  templateHtml = open("templates/evaluation-mail-template.html", "r").read()
-  templateHtml = templateHtml.replace("[name]", requirementDetails.get("fullname"))
-  templateHtml = templateHtml.replace("[token]", requirementDetails.get("id"))
-  templateHtml = templateHtml.replace("[event-title]", eventDetails.get("title"))
+@Scheduler.jobHandler("evaluation_mail")
+def runEvaluationMailJob(payload: dict):
+  requirementDetails = RequirementsDb.get(payload["requirementId"])
+  if (requirementDetails == None):
+    print(f"[REQUIREMENTS_ACCEPT] Requirement {payload['requirementId']} no longer exists, skipping evaluation email")
+    return
+
+  # rejected after the mail was scheduled
+  if (not requirementDetails["accepted"]):
+    print(f"[REQUIREMENTS_ACCEPT] Requirement {payload['requirementId']} is no longer accepted, skipping evaluation email")
+    return
+
+  if (requirementDetails["type"] == "external"):
+    eventDetails = ExternalEventDb.get(requirementDetails["eventId"])
+  else:
+    eventDetails = InternalEventDb.get(requirementDetails["eventId"])
+
+  if (eventDetails == None):
+    print(f"[REQUIREMENTS_ACCEPT] Event for requirement {payload['requirementId']} no longer exists, skipping evaluation email")
+    return
+
+  if not sendRenderedEvaluationMail(requirementDetails=requirementDetails, eventDetails=eventDetails):
+    raise RuntimeError(f"Evaluation email to {requirementDetails.get('email')} was not sent")
+
+def evaluationSendAt(eventDetails: dict):
+  # Determine when to send evaluation email:
+  # - Prefer the later of event durationEnd and evaluationSendTime (both stored as epoch ms)
+  # - This ensures emails are sent only after the event has finished
+  try:
+    duration_end_ms = int(eventDetails.get("durationEnd", 0) or 0)
+  except (TypeError, ValueError):
+    duration_end_ms = 0
+
+  try:
+    eval_send_ms = int(eventDetails.get("evaluationSendTime", 0) or 0)
+  except (TypeError, ValueError):
+    eval_send_ms = 0
+
+  # If evaluationSendTime is not set or is earlier than event end, use event end time
+  return max(duration_end_ms, eval_send_ms)
+
+def getRequirementEvents(requirements: list):
+  """(isExternal, eventId) -> event for every requirement, one query per event table"""
+  externalIds = { r["eventId"] for r in requirements if r["type"] == "external" and r["eventId"] != None }
+  internalIds = { r["eventId"] for r in requirements if r["type"] != "external" and r["eventId"] != None }
+
+  events = {}
+  for event in ExternalEventDb.getMany(list(externalIds)):
+    events[(True, event["id"])] = event
+  for event in InternalEventDb.getMany(list(internalIds)):
+    events[(False, event["id"])] = event
+  return events
+
+def invalidateRequirements(requirements: list):
+  for eventId, eventType in { (requirement["eventId"], requirement["type"]) for requirement in requirements }:
+    ReportAggregator.invalidateRequirement({ "eventId": eventId, "type": eventType })
+  EvaluationStatus.invalidateEmails([requirement["email"] for requirement in requirements])
+  FeatureStore.onRequirementsChanged(requirements)
+
+def evaluationMailValues(requirementDetails: dict, eventDetails: dict):
   # Build evaluation link safely, even if FRONTEND_APP_URL is not configured
   base_url = FRONTEND_APP_URL or ""
   link = (base_url + "/evaluation/" + str(requirementDetails.get("id"))) if base_url else "/evaluation/" + str(requirementDetails.get("id"))
-  templateHtml = templateHtml.replace("[link]", link)
+  return {
+    "name": requirementDetails.get("fullname"),
+    "token": requirementDetails.get("id"),
+    "event-title": eventDetails.get("title"),
+    "link": link
+  }
+
+def renderEvaluationMails(pairs: list):
+  """[(mailTo, subject, html)] evaluation mails for (requirement, event) pairs"""
+  rendered = TemplateRenderer.renderMany("evaluation-mail-template.html", [
+    evaluationMailValues(requirement, eventDetails) for requirement, eventDetails in pairs
+  ])
+  return [
+    (requirement.get("email"), "Evaluation Attendance", html)
+    for (requirement, _), html in zip(pairs, rendered)
+  ]
+
+def renderRequirementsMails(templateName: str, pairs: list):
+  """[(mailTo, subject, html)] accept/reject mails for (requirement, event) pairs"""
+  rendered = TemplateRenderer.renderMany(templateName, [
+    { "name": requirement.get("fullname"), "event": eventDetails.get("title") }
+    for requirement, eventDetails in pairs
+  ])
+  return [
+    (requirement.get("email"), "Requirement Evaluation: Sulambi - VOSA", html)
+    for (requirement, _), html in zip(pairs, rendered)
+  ]
+
+def sendRenderedEvaluationMail(requirementDetails: dict, eventDetails: dict):
+  templateHtml = TemplateRenderer.render("evaluation-mail-template.html", evaluationMailValues(requirementDetails, eventDetails))
 
-  htmlMailer(
+  return htmlMailer(
     mailTo=requirementDetails.get("email"),
     htmlRendered=templateHtml,
     subject="Evaluation Attendance"
   )
 
 def sendRejectedRequirementsMail(requirementDetails: dict, eventDetails: dict):
-  templateHtml = open("templates/we-reject-to-inform-requirements.html", "r").read()
-  templateHtml = templateHtml.replace("[name]", requirementDetails.get("fullname"))
-  templateHtml = templateHtml.replace("[event]", eventDetails.get("title"))
+  templateHtml = TemplateRenderer.render("we-reject-to-inform-requirements.html", {
+    "name": requirementDetails.get("fullname"),
+    "event": eventDetails.get("title")
+  })
 
   threadedHtmlMailer(
     mailTo=requirementDetails.get("email"),
@@ -425,9 +645,10 @@ def sendRejectedRequirementsMail(requirementDetails: dict, eventDetails: dict):
   )
 
 def sendAcceptedRequirementsMail(requirementDetails: dict, eventDetails: dict):
-  templateHtml = open("templates/we-are-pleased-to-inform-requirements.html", "r").read()
-  templateHtml = templateHtml.replace("[name]", requirementDetails.get("fullname"))
-  templateHtml = templateHtml.replace("[event]", eventDetails.get("title"))
+  templateHtml = TemplateRenderer.render("we-are-pleased-to-inform-requirements.html", {
+    "name": requirementDetails.get("fullname"),
+    "event": eventDetails.get("title")
+  })
 
   threadedHtmlMailer(
     mailTo=requirementDetails.get("email"),
@@ -576,6 +576,78 @@ execute_sql("""
 """)
 DEBUG and print("Done")
 
+###########################
+#  FEATURE STORE TABLES  #
+###########################
+# Incrementally maintained training features for the AnalyticsEngine
+DEBUG and print("[*] Initializing feature store tables...", end="")
+from ..modules import FeatureStore
+FeatureStore.ensure_tables(cursor)
+DEBUG and print("Done")
+
+###########################
+#  SCHEDULED JOBS TABLE  #
+###########################
+# Durable delayed jobs (evaluation emails etc.) picked up by app.modules.Scheduler
+DEBUG and print("[*] Initializing scheduled_jobs table...", end="")
+from ..modules import Scheduler
+Scheduler.ensure_table(cursor)
+DEBUG and print("Done")
+
+###########################
+#  MAIL OUTBOX TABLE  #
+###########################
+# Durable queue of outgoing email delivered by app.modules.MailOutbox
+DEBUG and print("[*] Initializing outbox table...", end="")
+from ..modules import MailOutbox
+MailOutbox.ensure_table(cursor)
+DEBUG and print("Done")
+
+###########################
+#  PHOTO VARIANTS TABLE  #
+###########################
+# Thumb/medium renditions of report photos generated by app.modules.ImageVariants
+DEBUG and print("[*] Initializing photoVariants table...", end="")
+from ..modules import ImageVariants
+ImageVariants.ensure_table(cursor)
+DEBUG and print("Done")
+
+###########################
+#  MEMBER IMPORT JOBS  #
+###########################
+# Progress and rejects of spreadsheet imports run by app.modules.MemberImporter
+DEBUG and print("[*] Initializing importJobs table...", end="")
+from ..modules import MemberImporter
+MemberImporter.ensure_table(cursor)
+DEBUG and print("Done")
+
+###########################
+#  REGISTRATION GUARD  #
+###########################
+# Unique (eventId, type, email) index on requirements and idempotency keys of submissions
+DEBUG and print("[*] Initializing requirementSubmissions table...", end="")
+from ..modules import RegistrationGuard
+RegistrationGuard.ensure_table(cursor)
+DEBUG and print("Done")
+
+###########################
+#  REQUIREMENT UPLOADS  #
+###########################
+# Staged medCert/waiver files waiting for app.modules.RequirementUploads to upload them
+DEBUG and print("[*] Initializing requirementUploads table...", end="")
+from ..modules import RequirementUploads
+RequirementUploads.ensure_table(cursor)
+DEBUG and print("Done")
+
+###########################
+#  MEMBER STATUS VERSIONS  #
+###########################
+# Per-member versions that let every worker notice app.modules.EvaluationStatus invalidations
+DEBUG and print("[*] Initializing memberStatusVersions table...", end="")
+from ..modules import EvaluationStatus
+EvaluationStatus.ensure_table(cursor)
+DEBUG and print("Done")
+
 
 # Insert the initial account values here
 initialAccounts = [
@@ -75,4 +75,41 @@ def basicParamFormCheck(params: list[str], paramStringify: bool=False):
     if (paramStringify and (type(requestJson[requiredParams]) is dict or type(requestJson[requiredParams]) is list)):
       requestJson[requiredParams] = json.dumps(requestJson[requiredParams])
 
-  return missingParams
\ No newline at end of file
+  return missingParams
+
+def idListCheck(limit: int = 500, cast=int):
+  """
+  Reads {"ids": [...]} from a bulk request; returns (ids, None) or (None, error response).
+  cast is int for integer keys (membership) and str for uuid keys (requirements).
+  """
+  requestJson = request.get_json(silent=True) or {}
+  ids = requestJson.get("ids")
+  if (not isinstance(ids, list) or len(ids) == 0):
+    return None, ({ "message": "ids must be a non-empty list" }, 400)
+  if (len(ids) > limit):
+    return None, ({ "message": f"At most {limit} ids can be processed at once" }, 400)
+
+  if (any(isinstance(id, bool) or not isinstance(id, (int, str)) for id in ids)):
+    return None, ({ "message": "ids must only contain numbers or strings" }, 400)
+
+  try:
+    # keep the request order, drop repeated ids
+    return list(dict.fromkeys(cast(id) for id in ids)), None
+  except ValueError:
+    return None, ({ "message": "ids must only contain numeric ids" }, 400)
+
+def fieldsCheck(*models):
+  """Reads ?fields=a,b for list endpoints; returns (fields, None), (None, None) without it, or (None, error response)"""
+  rawFields = request.args.get("fields")
+  if (rawFields == None or rawFields.strip() == ""):
+    return None, None
+
+  fields = list(dict.fromkeys(field.strip() for field in rawFields.split(",") if field.strip()))
+  selectable = set()
+  for model in models:
+    selectable.update(model.getSelectableColumns())
+
+  unknownFields = [field for field in fields if field not in selectable]
+  if (len(unknownFields) > 0):
+    return None, ({ "message": f"Unknown fields: {', '.join(unknownFields)}" }, 400)
+  return fields, None
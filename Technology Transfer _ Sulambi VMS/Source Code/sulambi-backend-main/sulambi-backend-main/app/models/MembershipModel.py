@@ -40,6 +40,7 @@ class MembershipModel(Model):
       "reasonQ1",
       "reasonQ2",
     ]
+    self.selectableColumns = [self.primaryKey] + [column for column in self.columns if column != "password"]
 
   def create(self, applyingAs: str, volunterismExperience: bool,
         weekdaysTimeDevotion: str, weekendsTimeDevotion: str, areasOfInterest: str,
@@ -81,6 +82,30 @@ class MembershipModel(Model):
     super().updateSpecific(id, ["accepted"], (False,))
     return member
 
+  def acceptMany(self, ids: list):
+    members = super().getMany(ids)
+    if (len(members) == 0):
+      return []
+
+    memberIds = [member["id"] for member in members]
+    super().updateSpecificMany(memberIds, ["accepted"], (True,))
+
+    # members approved before already have an account
+    withAccount = { account["membershipId"] for account in AccountModel().getIn("membershipId", memberIds) }
+    AccountModel().createMany([
+      (member["username"], member["password"], "member", member["id"], True)
+      for member in members if member["id"] not in withAccount
+    ])
+    return members
+
+  def rejectMany(self, ids: list):
+    members = super().getMany(ids)
+    if (len(members) == 0):
+      return []
+
+    super().updateSpecificMany([member["id"] for member in members], ["accepted"], (False,))
+    return members
+
   def activate(self, id):
     memberMatch = super().get(id)
     if (memberMatch == None): return None
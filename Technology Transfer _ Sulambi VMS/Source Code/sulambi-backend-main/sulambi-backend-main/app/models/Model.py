@@ -15,6 +15,8 @@ class Model:
     self.primaryKey = ""
     self.columns = []
     self.filteredColumns = []
+    # columns a ?fields= parameter may select; empty means every unfiltered column
+    self.selectableColumns = []
     self.createdAtCol = ""
   
   def _quote_identifier(self, identifier):
@@ -41,6 +43,18 @@ class Model:
     """Get properly quoted table name based on database type"""
     return self._quote_identifier(self.table)
 
+  def _selected_columns(self, fields=None):
+    """Primary key plus the requested columns in table order; all columns when fields is None"""
+    if (fields == None):
+      return [self.primaryKey] + self.columns
+    # fields of other tables are ignored so a combined endpoint can pass one list to every model
+    return [self.primaryKey] + [column for column in self.columns if column in fields]
+
+  def getSelectableColumns(self):
+    if (len(self.selectableColumns) > 0):
+      return self.selectableColumns
+    return [column for column in [self.primaryKey] + self.columns if column not in self.filteredColumns]
+
   def parseResponse(self, response: tuple | None, overwriteColumns=[]):
     if (response == None): return None
     if (len(overwriteColumns) == 0):
@@ -130,9 +144,9 @@ class Model:
     return manyParsed
 
   # gets a single data through the use of the primary key
-  def get(self, key):
+  def get(self, key, fields=None):
     conn, cursor = connection.cursorInstance()
-    columns_list = [self.primaryKey] + self.columns
+    columns_list = self._selected_columns(fields)
     # Normalize column names for PostgreSQL (lowercase to match unquoted column names)
     normalized_columns = self._normalize_column_list(columns_list)
     columnQuery = ", ".join(normalized_columns)
@@ -144,14 +158,14 @@ class Model:
     cursor.execute(query, (key, ))
     dbResponse = cursor.fetchone()
 
-    response = self.parseResponse(dbResponse)
+    response = self.parseResponse(dbResponse, columns_list)
     conn.close()
     return response
 
   # returns all the data in the table
-  def getAll(self):
+  def getAll(self, fields=None):
     conn, cursor = connection.cursorInstance()
-    columns_list = [self.primaryKey] + self.columns
+    columns_list = self._selected_columns(fields)
     # Normalize column names for PostgreSQL (lowercase to match unquoted column names)
     normalized_columns = self._normalize_column_list(columns_list)
     columnQuery = ", ".join(normalized_columns)
@@ -182,7 +196,7 @@ class Model:
     cursor.execute(query)
     dbResponse = cursor.fetchall()
 
-    response = self.parseManyResponse(dbResponse)
+    response = self.parseManyResponse(dbResponse, columns_list)
     conn.close()
     return response
 
@@ -225,9 +239,9 @@ class Model:
     return response
 
   # gets a specific value by matching its column values
-  def getAndSearch(self, columns: list, values: list):
+  def getAndSearch(self, columns: list, values: list, fields=None):
     conn, cursor = connection.cursorInstance()
-    columns_list = [self.primaryKey] + self.columns
+    columns_list = self._selected_columns(fields)
     # Normalize column names for PostgreSQL (lowercase to match unquoted column names)
     normalized_columns = self._normalize_column_list(columns_list)
     columnQuery = ", ".join(normalized_columns)
@@ -242,10 +256,60 @@ class Model:
     cursor.execute(query, values)
     dbResponse = cursor.fetchall()
 
-    response = self.parseManyResponse(dbResponse, [self.primaryKey] + self.columns)
+    response = self.parseManyResponse(dbResponse, columns_list)
+    conn.close()
+    return response
+
+  # gets every row whose column matches one of the values, in one query
+  def getIn(self, column: str, values: list):
+    if (len(values) == 0): return []
+    conn, cursor = connection.cursorInstance()
+    columns_list = [self.primaryKey] + self.columns
+    # Normalize column names for PostgreSQL (lowercase to match unquoted column names)
+    normalized_columns = self._normalize_column_list(columns_list)
+    columnQuery = ", ".join(normalized_columns)
+    table_name = self._get_table_name()
+
+    placeholders = ", ".join("?" * len(values))
+    query = f"SELECT {columnQuery} FROM {table_name} WHERE {self._normalize_column_name(column)} IN ({placeholders})"
+    query = connection.convert_placeholders(query)
+    cursor.execute(query, tuple(values))
+    dbResponse = cursor.fetchall()
+
+    response = self.parseManyResponse(dbResponse, columns_list)
     conn.close()
     return response
 
+  # gets many data through their primary keys
+  def getMany(self, keys: list):
+    return self.getIn(self.primaryKey, keys)
+
+  # creates many rows with multi-row inserts inside one transaction
+  def createMany(self, rows: list[tuple], includePrimaryKey=False):
+    if (len(rows) == 0): return 0
+    columns_to_use = ([self.primaryKey] + self.columns) if includePrimaryKey else self.columns
+    normalized_columns = self._normalize_column_list(columns_to_use)
+    columnFormatter = ", ".join(normalized_columns)
+    rowFormatter = "(" + ", ".join("?" * len(columns_to_use)) + ")"
+    table_name = self._get_table_name()
+
+    # stay under SQLite's bound parameter limit
+    chunkSize = max(1, 900 // len(columns_to_use))
+    conn, cursor = connection.cursorInstance()
+    try:
+      for start in range(0, len(rows), chunkSize):
+        chunk = rows[start:start + chunkSize]
+        query = f"INSERT INTO {table_name} ({columnFormatter}) VALUES {', '.join([rowFormatter] * len(chunk))}"
+        query = connection.convert_placeholders(query)
+        cursor.execute(query, tuple(value for row in chunk for value in row))
+      conn.commit()
+    except Exception:
+      conn.rollback()
+      raise
+    finally:
+      conn.close()
+    return len(rows)
+
   # creates a new data with the provided columns and data value
   def create(self, data: tuple, includePrimaryKey=False):
     import traceback
@@ -294,7 +358,8 @@ class Model:
         cursor.execute(query, data)
         conn.commit()
         print(f"[MODEL.CREATE] Insert successful")
-        lastRowId = self.getLastPrimaryKey()
+        # a provided key (e.g. the requirements uuid) does not sort by insertion order
+        lastRowId = data[0] if includePrimaryKey else self.getLastPrimaryKey()
         insertedData = self.get(lastRowId)
 
       conn.close()
@@ -366,6 +431,11 @@ class Model:
         print(f"[MODEL.CREATE] Data sample: {str(data)[:200]}")
       traceback.print_exc()
       if 'conn' in locals():
+        # roll back explicitly, SQLite keeps the write lock until the failed statement is finalized
+        try:
+          conn.rollback()
+        except:
+          pass
         conn.close()
       raise
 
@@ -402,6 +472,22 @@ class Model:
     cursor.execute(query, data + (key,))
     conn.commit()
 
+  # updates specific fields of many rows to the same values
+  def updateSpecificMany(self, keys: list, fields: list[str], data: tuple):
+    if (len(keys) == 0): return
+    conn, cursor = connection.cursorInstance()
+    normalized_fields = self._normalize_column_list(fields)
+    queryFormatter = ", ".join([f"{col}=?" for col in normalized_fields])
+
+    table_name = self._get_table_name()
+    normalized_primary_key = self._normalize_column_name(self.primaryKey)
+    placeholders = ", ".join("?" * len(keys))
+    query = f"UPDATE {table_name} SET {queryFormatter} WHERE {normalized_primary_key} IN ({placeholders})"
+    query = connection.convert_placeholders(query)
+    cursor.execute(query, data + tuple(keys))
+    conn.commit()
+    conn.close()
+
   # deletes one data
   def delete(self, key):
     conn, cursor = connection.cursorInstance()
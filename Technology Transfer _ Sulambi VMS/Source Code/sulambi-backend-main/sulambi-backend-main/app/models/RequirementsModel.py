@@ -1,4 +1,5 @@
 from .Model import Model
+from ..modules.RequirementUploads import FILE_FIELDS, PENDING_UPLOAD, UPLOAD_FAILED
 from uuid import uuid4
 
 class RequirementsModel(Model):
@@ -34,6 +35,17 @@ class RequirementsModel(Model):
       "accepted"
     ]
 
+  # staged uploads keep a placeholder in medCert/waiver until they are uploaded,
+  # which is returned as <field>Status instead of a link that does not open
+  def parseResponse(self, response: tuple | None, overwriteColumns=[]):
+    parsed = super().parseResponse(response, overwriteColumns)
+    if (parsed == None): return None
+    for field in FILE_FIELDS:
+      if (parsed.get(field) in [PENDING_UPLOAD, UPLOAD_FAILED]):
+        parsed[f"{field}Status"] = parsed[field]
+        parsed[field] = None
+    return parsed
+
   # overwrite search by token
   def get(self, token: str) -> dict | None:
     matches = super().getOrSearch([self.primaryKey] + self.columns, [token] + ([None] * len(self.columns)))
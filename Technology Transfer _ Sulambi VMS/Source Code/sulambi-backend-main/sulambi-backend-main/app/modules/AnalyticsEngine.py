@@ -1,23 +1,65 @@
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, mean_squared_error
-import joblib
+import multiprocessing
 import os
 from ..database.connection import cursorInstance, quote_identifier, DATABASE_URL
+from . import ModelRegistry
+from . import FeatureStore
+from ..utils.lazyImport import lazyModule
+
+# pandas and numpy are only imported once analytics actually runs
+pd = lazyModule("pandas")
+np = lazyModule("numpy")
+
+# feature layout shared by training and scoring so the two can never drift apart
+EVENT_SUCCESS_FEATURES = ['duration_hours', 'total_participants', 'is_weekend', 'has_feedback']
+EVENT_SUCCESS_CATEGORICAL = ['modeOfDelivery']
+VOLUNTEER_DROPOUT_FEATURES = ['age', 'volunterismExperience', 'total_registrations',
+                              'attendance_rate', 'participation_span', 'days_since_last_event']
+VOLUNTEER_DROPOUT_CATEGORICAL = ['sex', 'campus', 'collegeDept', 'yrlevelprogram']
+
+MODEL_SPECS = {
+    'event_success': (EVENT_SUCCESS_FEATURES, EVENT_SUCCESS_CATEGORICAL, 'success'),
+    'volunteer_dropout': (VOLUNTEER_DROPOUT_FEATURES, VOLUNTEER_DROPOUT_CATEGORICAL, 'is_high_risk'),
+}
+
+class ModelWarming(Exception):
+    """No usable model is registered yet; one is being trained in the background"""
+    def __init__(self, name):
+        super().__init__(f"The {name} model is warming up, try again shortly")
+        self.name = name
+
 
 class AnalyticsEngine:
     def __init__(self):
-        self.conn, _ = cursorInstance()
+        self._conn = None
         self.models = {}
         self.scalers = {}
         self.encoders = {}
+        self.metadata = {}
+
+    @property
+    def conn(self):
+        """Database connection, opened only when training data is actually queried"""
+        if self._conn is None:
+            self._conn, _ = cursorInstance()
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
         
     def prepare_event_success_data(self):
-        """Prepare data for event success prediction"""
+        """Prepare data for event success prediction, from the feature store snapshot when one exists"""
+        if FeatureStore.FEATURE_STORE_ENABLED:
+            df = FeatureStore.loadFrame('events')
+            if df is not None:
+                df = df[df['status'].isin(['accepted', 'completed', 'cancelled'])].reset_index(drop=True)
+                return self._engineer_event_features(df, pd.to_datetime(df['createdAt'], unit='ms'))
+        return self.query_event_success_data()
+
+    def query_event_success_data(self):
+        """Prepare data for event success prediction straight from the OLTP tables"""
         internal_events_table = quote_identifier('internalEvents')
         external_events_table = quote_identifier('externalEvents')
         requirements_table = quote_identifier('requirements')
@@ -70,12 +112,13 @@ class AnalyticsEngine:
         """
         
         df = pd.read_sql_query(query, self.conn)
-        
-        # Feature engineering
+        return self._engineer_event_features(df, pd.to_datetime(df['createdAt']))
+
+    def _engineer_event_features(self, df, createdAt):
         df['duration_hours'] = (df['durationEnd'] - df['durationStart']) / (1000 * 60 * 60)
         df['attendance_rate'] = df['attended_count'] / (df['registered_count'] + 1e-6)
         df['total_participants'] = df['maleTotal'] + df['femaleTotal']
-        df['is_weekend'] = pd.to_datetime(df['createdAt']).dt.dayofweek.isin([5, 6]).astype(int)
+        df['is_weekend'] = createdAt.dt.dayofweek.isin([5, 6]).astype(int)
         
         # Success definition: attendance rate > 0.7 and status = 'completed'
         df['success'] = ((df['attendance_rate'] > 0.7) & (df['status'] == 'completed')).astype(int)
@@ -83,7 +126,21 @@ class AnalyticsEngine:
         return df
     
     def prepare_volunteer_dropout_data(self):
-        """Prepare data for volunteer dropout risk prediction"""
+        """Prepare data for volunteer dropout risk prediction, from the feature store snapshot when one exists"""
+        if FeatureStore.FEATURE_STORE_ENABLED:
+            df = FeatureStore.loadFrame('volunteers')
+            if df is not None:
+                df = df[df['accepted'] == 1].reset_index(drop=True)
+                # same as the SQL AVG: a volunteer without registrations has an attendance rate of 0
+                df['attendance_rate'] = (df['attended_events'] / df['total_registrations'].where(df['total_registrations'] > 0)).fillna(0)
+                return self._engineer_volunteer_features(
+                    df,
+                    pd.to_datetime(df['first_participation'], unit='ms'),
+                    pd.to_datetime(df['last_participation'], unit='ms'))
+        return self.query_volunteer_dropout_data()
+
+    def query_volunteer_dropout_data(self):
+        """Prepare data for volunteer dropout risk prediction straight from the OLTP tables"""
         # Determine boolean value based on database type
         is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
         accepted_value = 'true' if is_postgresql else '1'
@@ -118,128 +175,159 @@ class AnalyticsEngine:
         """
         
         df = pd.read_sql_query(query, self.conn)
-        
-        # Feature engineering
-        df['participation_span'] = (pd.to_datetime(df['last_participation']) - pd.to_datetime(df['first_participation'])).dt.days
-        df['days_since_last_event'] = (datetime.now() - pd.to_datetime(df['last_participation'])).dt.days
+        return self._engineer_volunteer_features(
+            df, pd.to_datetime(df['first_participation']), pd.to_datetime(df['last_participation']))
+
+    def _engineer_volunteer_features(self, df, firstParticipation, lastParticipation):
+        df['participation_span'] = (lastParticipation - firstParticipation).dt.days
+        df['days_since_last_event'] = (datetime.now() - lastParticipation).dt.days
         df['is_high_risk'] = ((df['attendance_rate'] < 0.5) | (df['days_since_last_event'] > 90)).astype(int)
         
         return df
     
-    def train_event_success_model(self):
-        """Train model to predict event success"""
-        df = self.prepare_event_success_data()
-        
-        # Select features
-        feature_columns = ['duration_hours', 'total_participants', 'is_weekend', 'has_feedback']
-        X = df[feature_columns].fillna(0)
-        y = df['success']
-        
-        # Encode categorical variables
-        le = LabelEncoder()
-        X['modeOfDelivery'] = le.fit_transform(df['modeOfDelivery'].fillna('unknown'))
-        self.encoders['modeOfDelivery'] = le
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        self.scalers['event_success'] = scaler
-        
-        # Train model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train_scaled, y_train)
-        
-        # Evaluate
-        y_pred = model.predict(X_test_scaled)
-        accuracy = accuracy_score(y_test, y_pred)
-        print(f"Event Success Model Accuracy: {accuracy:.3f}")
-        
-        self.models['event_success'] = model
-        return model
-    
-    def train_volunteer_dropout_model(self):
-        """Train model to predict volunteer dropout risk"""
-        df = self.prepare_volunteer_dropout_data()
-        
-        # Select features
-        feature_columns = ['age', 'volunterismExperience', 'total_registrations', 
-                          'attendance_rate', 'participation_span', 'days_since_last_event']
-        X = df[feature_columns].fillna(0)
-        y = df['is_high_risk']
-        
-        # Encode categorical variables
-        categorical_columns = ['sex', 'campus', 'collegeDept', 'yrlevelprogram']
-        for col in categorical_columns:
-            le = LabelEncoder()
-            X[col] = le.fit_transform(df[col].fillna('unknown'))
-            self.encoders[col] = le
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Scale features
+    def _encode_categorical(self, df, column, classes):
+        """Map labels to their index in the training classes; unseen labels become -1"""
+        lookup = {label: index for index, label in enumerate(classes)}
+        return df[column].fillna('unknown').astype(str).map(lookup).fillna(-1).astype(int)
+
+    def _feature_matrix(self, df, name, encoders):
+        features, categorical, _ = MODEL_SPECS[name]
+        X = df.reindex(columns=features).apply(pd.to_numeric, errors='coerce').fillna(0)
+        for col in categorical:
+            source = df[col] if col in df.columns else pd.Series(['unknown'] * len(df), index=df.index)
+            X[col] = self._encode_categorical(pd.DataFrame({col: source}), col, encoders[col])
+        return X
+
+    def _train(self, name, df):
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.metrics import accuracy_score
+        import sklearn
+
+        features, categorical, target = MODEL_SPECS[name]
+        encoders = {
+            col: sorted(df[col].fillna('unknown').astype(str).unique().tolist()) if col in df.columns else ['unknown']
+            for col in categorical
+        }
+        X = self._feature_matrix(df, name, encoders)
+        y = df[target]
+
+        # hold out a test split only when there is enough data to make it meaningful
+        accuracy = None
+        if len(df) >= 10 and y.nunique() > 1:
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        else:
+            X_train, X_test, y_train, y_test = X, None, y, None
+
         scaler = StandardScaler()
         X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        self.scalers['volunteer_dropout'] = scaler
-        
-        # Train model
+
         model = RandomForestClassifier(n_estimators=100, random_state=42)
         model.fit(X_train_scaled, y_train)
-        
-        # Evaluate
-        y_pred = model.predict(X_test_scaled)
-        accuracy = accuracy_score(y_test, y_pred)
-        print(f"Volunteer Dropout Model Accuracy: {accuracy:.3f}")
-        
-        self.models['volunteer_dropout'] = model
-        return model
-    
+
+        if X_test is not None:
+            accuracy = accuracy_score(y_test, model.predict(scaler.transform(X_test)))
+            print(f"[ANALYTICS_ENGINE] {name} model accuracy: {accuracy:.3f}")
+
+        artifact = {
+            'model': model,
+            'scaler': scaler,
+            'encoders': encoders,
+            'features': list(X.columns),
+        }
+        metadata = {
+            'rows': int(len(df)),
+            'positiveRate': float(y.mean()) if len(y) else None,
+            'metrics': {'accuracy': float(accuracy) if accuracy is not None else None},
+            'featureColumns': list(X.columns),
+            'featureSchemaHash': ModelRegistry.featureSchemaHash(features, categorical),
+            'sklearnVersion': sklearn.__version__,
+        }
+
+        self.models[name] = model
+        self.scalers[name] = scaler
+        self.encoders[name] = encoders
+        self.metadata[name] = metadata
+        return artifact, metadata
+
+    def train_event_success_model(self, register=True):
+        """Train model to predict event success and publish it to the registry"""
+        artifact, metadata = self._train('event_success', self.prepare_event_success_data())
+        if register:
+            self.metadata['event_success'] = ModelRegistry.getMetadata(
+                'event_success', ModelRegistry.saveArtifact('event_success', artifact, metadata))
+        return artifact['model']
+
+    def train_volunteer_dropout_model(self, register=True):
+        """Train model to predict volunteer dropout risk and publish it to the registry"""
+        artifact, metadata = self._train('volunteer_dropout', self.prepare_volunteer_dropout_data())
+        if register:
+            self.metadata['volunteer_dropout'] = ModelRegistry.getMetadata(
+                'volunteer_dropout', ModelRegistry.saveArtifact('volunteer_dropout', artifact, metadata))
+        return artifact['model']
+
+    def _artifact(self, name):
+        """
+        Registry artifact for a model. Requests never train: when nothing usable
+        is registered, background training is started (unless it already runs)
+        and ModelWarming is raised.
+        """
+        artifact, metadata = ModelRegistry.loadArtifact(name)
+        features, categorical, _ = MODEL_SPECS[name]
+        if artifact is not None and metadata.get('featureSchemaHash') != ModelRegistry.featureSchemaHash(features, categorical):
+            print(f"[ANALYTICS_ENGINE] Registered {name} model has a stale feature schema; retraining")
+            artifact = None
+
+        if artifact is None:
+            if startBackgroundTraining([name]):
+                print(f"[ANALYTICS_ENGINE] Started background training for {name}")
+            raise ModelWarming(name)
+        return artifact, metadata
+
+    def _positive_probability(self, artifact, X):
+        model = artifact['model']
+        X_scaled = artifact['scaler'].transform(X[artifact['features']])
+        probabilities = model.predict_proba(X_scaled)
+        classes = list(model.classes_)
+        if 1 not in classes:
+            return np.zeros(len(X))
+        return probabilities[:, classes.index(1)]
+
+    def _predict_batch(self, name, df, idColumns):
+        artifact, metadata = self._artifact(name)
+        if len(df) == 0:
+            return []
+        X = self._feature_matrix(df, name, artifact['encoders'])
+        probabilities = self._positive_probability(artifact, X)
+        records = df[idColumns].copy()
+        records['probability'] = np.round(probabilities, 4)
+        records['modelVersion'] = metadata.get('version')
+        return records.to_dict(orient='records')
+
+    def predict_event_success_batch(self, df=None):
+        """Score every event in one call"""
+        if df is None:
+            df = self.prepare_event_success_data()
+        return self._predict_batch('event_success', df, ['id', 'title', 'status'])
+
+    def predict_volunteer_dropout_batch(self, df=None):
+        """Score every accepted volunteer in one call"""
+        if df is None:
+            df = self.prepare_volunteer_dropout_data()
+        return self._predict_batch('volunteer_dropout', df, ['id', 'campus', 'collegeDept'])
+
     def predict_event_success(self, event_data):
         """Predict success probability for an event"""
-        if 'event_success' not in self.models:
-            self.train_event_success_model()
-        
-        # Prepare input data
-        features = np.array([[
-            event_data.get('duration_hours', 0),
-            event_data.get('total_participants', 0),
-            event_data.get('is_weekend', 0),
-            event_data.get('has_feedback', 0)
-        ]])
-        
-        # Scale features
-        features_scaled = self.scalers['event_success'].transform(features)
-        
-        # Predict
-        success_prob = self.models['event_success'].predict_proba(features_scaled)[0][1]
-        return success_prob
-    
+        artifact, _ = self._artifact('event_success')
+        X = self._feature_matrix(pd.DataFrame([event_data]), 'event_success', artifact['encoders'])
+        return float(self._positive_probability(artifact, X)[0])
+
     def predict_volunteer_dropout_risk(self, volunteer_data):
         """Predict dropout risk for a volunteer"""
-        if 'volunteer_dropout' not in self.models:
-            self.train_volunteer_dropout_model()
-        
-        # Prepare input data
-        features = np.array([[
-            volunteer_data.get('age', 0),
-            volunteer_data.get('volunterismExperience', 0),
-            volunteer_data.get('total_registrations', 0),
-            volunteer_data.get('attendance_rate', 0),
-            volunteer_data.get('participation_span', 0),
-            volunteer_data.get('days_since_last_event', 0)
-        ]])
-        
-        # Scale features
-        features_scaled = self.scalers['volunteer_dropout'].transform(features)
-        
-        # Predict
-        dropout_prob = self.models['volunteer_dropout'].predict_proba(features_scaled)[0][1]
-        return dropout_prob
+        artifact, _ = self._artifact('volunteer_dropout')
+        X = self._feature_matrix(pd.DataFrame([volunteer_data]), 'volunteer_dropout', artifact['encoders'])
+        return float(self._positive_probability(artifact, X)[0])
     
     def get_analytics_insights(self):
         """Get comprehensive analytics insights"""
@@ -264,26 +352,70 @@ class AnalyticsEngine:
         
         return insights
     
-    def save_models(self, model_dir='models'):
-        """Save trained models to disk"""
-        os.makedirs(model_dir, exist_ok=True)
-        
-        for name, model in self.models.items():
-            joblib.dump(model, f"{model_dir}/{name}_model.pkl")
-        
-        for name, scaler in self.scalers.items():
-            joblib.dump(scaler, f"{model_dir}/{name}_scaler.pkl")
-        
-        for name, encoder in self.encoders.items():
-            joblib.dump(encoder, f"{model_dir}/{name}_encoder.pkl")
+    def save_models(self):
+        """Publish the in-memory models to the registry (kept for older scripts)"""
+        for name in list(self.models.keys()):
+            features, categorical, _ = MODEL_SPECS[name]
+            artifact = {
+                'model': self.models[name],
+                'scaler': self.scalers[name],
+                'encoders': self.encoders[name],
+                'features': features + categorical,
+            }
+            ModelRegistry.saveArtifact(name, artifact, self.metadata.get(name) or {
+                'featureSchemaHash': ModelRegistry.featureSchemaHash(features, categorical)
+            })
     
-    def load_models(self, model_dir='models'):
-        """Load trained models from disk"""
-        for name in ['event_success', 'volunteer_dropout']:
-            model_path = f"{model_dir}/{name}_model.pkl"
-            scaler_path = f"{model_dir}/{name}_scaler.pkl"
-            
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                self.models[name] = joblib.load(model_path)
-                self.scalers[name] = joblib.load(scaler_path)
+    def load_models(self):
+        """Load the promoted registry versions into this instance"""
+        for name in MODEL_SPECS:
+            artifact, metadata = ModelRegistry.loadArtifact(name)
+            if artifact is None:
+                continue
+            self.models[name] = artifact['model']
+            self.scalers[name] = artifact['scaler']
+            self.encoders[name] = artifact['encoders']
+            self.metadata[name] = metadata
+
+
+def trainModels(names=None):
+    """Train and register models; entry point of the background training process"""
+    names = names or list(MODEL_SPECS.keys())
+    if not ModelRegistry.acquireTrainingLock():
+        print("[ANALYTICS_ENGINE] Training already in progress in another process")
+        return False
+
+    engine = AnalyticsEngine()
+    try:
+        if FeatureStore.FEATURE_STORE_ENABLED:
+            try:
+                FeatureStore.snapshotAll()
+            except Exception as e:
+                print(f"[ANALYTICS_ENGINE] Feature snapshot failed, training from OLTP tables: {e}")
+        for name in names:
+            try:
+                if name == 'event_success':
+                    engine.train_event_success_model()
+                elif name == 'volunteer_dropout':
+                    engine.train_volunteer_dropout_model()
+                print(f"[ANALYTICS_ENGINE] Registered {name} version {ModelRegistry.getLatestVersion(name)}")
+            except Exception as e:
+                print(f"[ANALYTICS_ENGINE] Failed to train {name}: {e}")
+        return True
+    finally:
+        engine.close()
+        ModelRegistry.releaseTrainingLock()
+
+
+def startBackgroundTraining(names=None):
+    """
+    Train in a separate process so request workers never block on RandomForest fitting.
+    Returns False when another process already holds the training lock.
+    """
+    if ModelRegistry.isTraining():
+        return False
 
+    process = multiprocessing.get_context("spawn").Process(
+        target=trainModels, args=(names,), daemon=True)
+    process.start()
+    return True
@@ -0,0 +1,250 @@
+"""
+Finalize many evaluations in one request.
+
+Each item is either a full evaluation payload, with the same fields as
+POST /api/evaluation/<requirementId>, or an attendance mark:
+
+  {"requirementId": "...", "criteria": {...}, "q13": "5", "q14": "", "comment": "", "recommendations": ""}
+  {"requirementId": "...", "attended": false}   # finalized with empty criteria, i.e. not attended
+  {"requirementId": "...", "attended": true}    # finalized as attended, without answers
+
+Attended marks store ATTENDED_CRITERIA, a criteria object without ratings that
+ReportAggregator still counts as an attended volunteer.
+
+The whole batch is checked against the database with one query and rejected
+as a unit if any item is invalid. Valid batches are written in one
+transaction: one executemany UPDATE on evaluation and one executemany INSERT
+on satisfactionSurveys. Caches and the feature store are refreshed once per
+batch, not once per item.
+"""
+from datetime import datetime
+from dotenv import load_dotenv
+import json
+import os
+
+from ..database.connection import cursorInstance, convert_placeholders, convert_boolean_value, quote_identifier
+from . import FeatureStore, ReportAggregator, EvaluationStatus
+
+load_dotenv()
+
+EVALUATION_BATCH_LIMIT = int(os.getenv("EVALUATION_BATCH_LIMIT", 500))
+
+EVALUATION_FIELDS = ["criteria", "q13", "q14", "comment", "recommendations"]
+
+# criteria stored for "attended": true marks; a non-empty object, so the volunteer counts as attended
+ATTENDED_CRITERIA = json.dumps({"attended": True})
+
+RATING_MAP = {
+  "Excellent": 5,
+  "Very Satisfactory": 4,
+  "Satisfactory": 3,
+  "Fair": 2,
+  "Poor": 1
+}
+
+SURVEY_COLUMNS = [
+  "eventId", "eventType", "requirementId", "respondentType", "respondentEmail", "respondentName",
+  "overallSatisfaction", "volunteerRating", "beneficiaryRating",
+  "organizationRating", "communicationRating", "venueRating", "materialsRating", "supportRating",
+  "q13", "q14", "comment", "recommendations",
+  "wouldRecommend", "areasForImprovement", "positiveAspects",
+  "submittedAt", "finalized"
+]
+
+class BatchError(Exception):
+  def __init__(self, message: str, errors: list = None):
+    super().__init__(message)
+    self.errors = errors or []
+
+def _toFloat(value):
+  try:
+    return float(value)
+  except (TypeError, ValueError):
+    return None
+
+def normalize(items):
+  """Checks the shape of every item; returns [(requirementId, evaluation fields or None, attended)]"""
+  if (not isinstance(items, list) or len(items) == 0):
+    raise BatchError("evaluations must be a non-empty list")
+  if (len(items) > EVALUATION_BATCH_LIMIT):
+    raise BatchError(f"At most {EVALUATION_BATCH_LIMIT} evaluations can be submitted at once")
+
+  normalized = []
+  errors = []
+  seen = set()
+  for index, item in enumerate(items):
+    requirementId = item.get("requirementId") if isinstance(item, dict) else None
+    if (requirementId == None or requirementId == ""):
+      errors.append({ "index": index, "requirementId": None, "message": "requirementId is required" })
+      continue
+    requirementId = str(requirementId)
+    if (requirementId in seen):
+      errors.append({ "index": index, "requirementId": requirementId, "message": "Duplicate requirementId in batch" })
+      continue
+    seen.add(requirementId)
+
+    if ("attended" in item and not any(field in item for field in EVALUATION_FIELDS)):
+      normalized.append((requirementId, None, bool(item["attended"])))
+      continue
+
+    missing = [field for field in EVALUATION_FIELDS if field not in item]
+    if (len(missing) > 0):
+      errors.append({ "index": index, "requirementId": requirementId, "message": "Missing required fields", "fieldError": missing })
+      continue
+
+    fields = {
+      field: json.dumps(item[field]) if isinstance(item[field], (dict, list)) else item[field]
+      for field in EVALUATION_FIELDS
+    }
+    normalized.append((requirementId, fields, True))
+
+  if (len(errors) > 0):
+    raise BatchError("Some evaluations are invalid", errors)
+  return normalized
+
+def _fetchTargets(requirementIds: list):
+  """requirementId -> requirement and its first evaluation, in one query"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT r.id, r.eventId, r.type, r.email, r.fullname, r.accepted, ev.id, ev.finalized
+      FROM requirements r
+      LEFT JOIN evaluation ev ON ev.id = (
+        SELECT MIN(firstEval.id) FROM evaluation firstEval WHERE firstEval.requirementId = r.id
+      )
+      WHERE r.id IN ({", ".join("?" * len(requirementIds))})
+    """), tuple(requirementIds))
+    return {
+      str(row[0]): {
+        "requirement": { "id": row[0], "eventId": row[1], "type": row[2], "email": row[3], "fullname": row[4], "accepted": row[5] },
+        "evaluationId": row[6],
+        "finalized": row[7],
+      }
+      for row in cursor.fetchall()
+    }
+  finally:
+    conn.close()
+
+def _existingSurveys(cursor, requirementIds: list):
+  cursor.execute(convert_placeholders(f"""
+    SELECT requirementId, respondentEmail FROM {quote_identifier("satisfactionSurveys")}
+    WHERE requirementId IN ({", ".join("?" * len(requirementIds))})
+  """), tuple(requirementIds))
+  return {(str(row[0]), row[1]) for row in cursor.fetchall()}
+
+def surveyValues(requirement: dict, fields: dict, submittedAt: int):
+  """satisfactionSurveys row for a volunteer evaluation, as evaluateByRequirement derives it"""
+  criteria = fields["criteria"]
+  if isinstance(criteria, str):
+    try:
+      criteria = json.loads(criteria) if criteria.startswith("{") else {}
+    except ValueError:
+      criteria = {}
+
+  ratings = { "overall": 0, "appropriateness": 0, "expectations": 0, "materials": 0, "session": 0 }
+  if isinstance(criteria, dict):
+    ratings = { key: RATING_MAP.get(criteria.get(key, ""), 0) for key in ratings }
+
+  q13, q14 = fields["q13"], fields["q14"]
+  volunteerRating = _toFloat(q13) if q13 else None
+  beneficiaryRating = _toFloat(q14) if q14 else None
+
+  overall = ratings["overall"]
+  if (overall == 0):
+    # q13 wins over q14 when both are present, even if it is not a number
+    fallback = (_toFloat(q13) if q13 else _toFloat(q14) if q14 else None)
+    overall = fallback if fallback != None else 0
+
+  respondentType = "Volunteer"
+  if (q14 and not q13):
+    respondentType = "Beneficiary"
+  elif (q13 and q14):
+    respondentType = "Both"
+
+  comment = fields["comment"] or ""
+  return (
+    requirement["eventId"], requirement.get("type") or "internal", requirement["id"],
+    respondentType, requirement.get("email") or "", requirement.get("fullname") or "",
+    overall, volunteerRating, beneficiaryRating,
+    ratings["appropriateness"], ratings["expectations"], 0, ratings["materials"], ratings["session"],
+    q13, q14, comment, fields["recommendations"] or "",
+    convert_boolean_value(overall >= 4 if overall > 0 else None),
+    None,
+    comment if overall >= 4 else None,
+    submittedAt, convert_boolean_value(True)
+  )
+
+def finalizeMany(items):
+  """
+  Validate and write a batch. Raises BatchError (with per-item errors) without
+  writing anything if any item is invalid; returns a summary otherwise.
+  """
+  normalized = normalize(items)
+  targets = _fetchTargets([requirementId for requirementId, _, _ in normalized])
+
+  errors = []
+  for index, (requirementId, _, _) in enumerate(normalized):
+    target = targets.get(requirementId)
+    message = None
+    if (target == None):
+      message = "The requirement ID does not exist"
+    elif (not target["requirement"]["accepted"]):
+      message = "The requirement has not been accepted yet"
+    elif (target["evaluationId"] == None):
+      message = "No evaluation form available for this requirement"
+    elif (target["finalized"] == 1 or target["finalized"] == True):
+      message = "Evaluation form has already been submitted"
+    if (message != None):
+      errors.append({ "index": index, "requirementId": requirementId, "message": message })
+  if (len(errors) > 0):
+    raise BatchError("Some evaluations cannot be finalized", errors)
+
+  submittedAt = int(datetime.now().timestamp() * 1000)
+  evaluationRows = []
+  surveyRows = []
+  conn, cursor = cursorInstance()
+  try:
+    existing = _existingSurveys(cursor, list(targets.keys()))
+    for requirementId, fields, attended in normalized:
+      target = targets[requirementId]
+      requirement = target["requirement"]
+      if (fields == None):
+        values = [ATTENDED_CRITERIA if attended else "", "", "", "", ""]
+      else:
+        values = [fields[field] for field in EVALUATION_FIELDS]
+        if ((requirementId, requirement["email"] or "") not in existing):
+          surveyRows.append(surveyValues(requirement, fields, submittedAt))
+      evaluationRows.append(tuple(values) + (convert_boolean_value(True), target["evaluationId"], convert_boolean_value(False)))
+
+    # the finalized guard keeps a concurrent single submission from being overwritten
+    cursor.executemany(convert_placeholders("""
+      UPDATE evaluation SET criteria = ?, q13 = ?, q14 = ?, comment = ?, recommendations = ?, finalized = ?
+      WHERE id = ? AND finalized = ?
+    """), evaluationRows)
+    # rows finalized concurrently since they were checked are not updated
+    updated = cursor.rowcount
+    if (len(surveyRows) > 0):
+      cursor.executemany(convert_placeholders(f"""
+        INSERT INTO {quote_identifier("satisfactionSurveys")} ({", ".join(SURVEY_COLUMNS)})
+        VALUES ({", ".join("?" * len(SURVEY_COLUMNS))})
+      """), surveyRows)
+    conn.commit()
+  except Exception:
+    conn.rollback()
+    raise
+  finally:
+    conn.close()
+
+  requirements = [targets[requirementId]["requirement"] for requirementId, _, _ in normalized]
+  for eventId, eventType in {(requirement["eventId"], requirement["type"]) for requirement in requirements}:
+    ReportAggregator.invalidateRequirement({ "eventId": eventId, "type": eventType })
+  EvaluationStatus.invalidateEmails([requirement["email"] for requirement in requirements])
+  FeatureStore.onRequirementsChanged(requirements)
+
+  return {
+    "finalized": updated,
+    "alreadyFinalized": len(evaluationRows) - updated,
+    "evaluations": len([item for item in normalized if item[1] != None]),
+    "attendanceMarks": len([item for item in normalized if item[1] == None]),
+    "surveys": len(surveyRows),
+  }
@@ -0,0 +1,224 @@
+"""
+Evaluation status of every event a member registered for, in one query.
+
+The member's account, membership, requirements, (first) evaluation and the
+matching event row are joined in a single statement and the attendance status
+is computed in SQL, instead of 3 + 2N model lookups per dashboard load.
+
+Results are cached in-process per account, as the raw (evaluation, status,
+requirement row, event row) tuples, in an LRU of at most
+MEMBER_STATUS_CACHE_SIZE accounts. Controllers call invalidateEmail() when a
+requirement or evaluation of a member changes and invalidateEvent() when an
+event is edited. Both bump the member's row in memberStatusVersions, and a
+cached entry is only served while that version is unchanged, so a change made
+on one gunicorn worker is seen by the others on their next request.
+MEMBER_STATUS_CACHE_TTL_SECS still bounds the age of any entry.
+"""
+from collections import OrderedDict
+from dotenv import load_dotenv
+import threading
+import time
+import os
+
+from ..database.connection import cursorInstance, convert_placeholders, convert_boolean_value, quote_identifier, DATABASE_URL
+from ..models.RequirementsModel import RequirementsModel
+from ..models.ExternalEventModel import ExternalEventModel
+from ..models.InternalEventModel import InternalEventModel
+
+load_dotenv()
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+MEMBER_STATUS_CACHE_TTL_SECS = float(os.getenv("MEMBER_STATUS_CACHE_TTL_SECS", 300))
+MEMBER_STATUS_CACHE_SIZE = int(os.getenv("MEMBER_STATUS_CACHE_SIZE", 512))
+
+VERSION_TABLE = "memberStatusVersions"
+
+RequirementDb = RequirementsModel()
+ExternalEventDb = ExternalEventModel()
+InternalEventDb = InternalEventModel()
+
+REQUIREMENT_COLUMNS = [RequirementDb.primaryKey] + RequirementDb.columns
+EXTERNAL_COLUMNS = [ExternalEventDb.primaryKey] + ExternalEventDb.columns
+INTERNAL_COLUMNS = [InternalEventDb.primaryKey] + InternalEventDb.columns
+
+# accountId -> (cachedAt, email, version, statuses), least recently used first
+_cache = OrderedDict()
+_cacheLock = threading.Lock()
+
+def ensure_table(cursor=None):
+  """Create the memberStatusVersions table shared by every worker's cache"""
+  ownConnection = cursor is None
+  if ownConnection:
+    conn, cursor = cursorInstance()
+
+  emailType = "VARCHAR(255)" if is_postgresql else "STRING"
+  cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {quote_identifier(VERSION_TABLE)}(
+      email {emailType} PRIMARY KEY,
+      version BIGINT NOT NULL
+    )
+  """)
+
+  if ownConnection:
+    conn.commit()
+    conn.close()
+
+def _version(email: str):
+  if (email == None):
+    return None
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT version FROM {quote_identifier(VERSION_TABLE)} WHERE email = ?
+    """), (email,))
+    row = cursor.fetchone()
+    return row[0] if row != None else None
+  finally:
+    conn.close()
+
+def _bumpVersions(query: str, params: tuple):
+  """Run an INSERT ... SELECT of emails that moves their version forward"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      INSERT INTO {quote_identifier(VERSION_TABLE)} (email, version)
+      {query}
+      ON CONFLICT (email) DO UPDATE SET version = {quote_identifier(VERSION_TABLE)}.version + 1
+    """), params)
+    conn.commit()
+  finally:
+    conn.close()
+
+def _select(alias: str, columns: list):
+  return ", ".join(f"{alias}.{column}" for column in columns)
+
+def _fetchRows(accountId):
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT
+        m.email,
+        sv.version,
+        ev.id,
+        CASE
+          WHEN ev.finalized = ? AND ev.criteria <> '' THEN 'attended'
+          WHEN ev.finalized = ? THEN 'not-attended'
+          ELSE 'registered'
+        END,
+        {_select("r", REQUIREMENT_COLUMNS)},
+        {_select("ee", EXTERNAL_COLUMNS)},
+        {_select("ie", INTERNAL_COLUMNS)}
+      FROM accounts a
+      LEFT JOIN membership m ON m.id = a.membershipId
+      LEFT JOIN {quote_identifier(VERSION_TABLE)} sv ON sv.email = m.email
+      LEFT JOIN requirements r ON r.email = m.email
+      LEFT JOIN evaluation ev ON ev.id = (
+        SELECT MIN(firstEval.id) FROM evaluation firstEval WHERE firstEval.requirementId = r.id
+      )
+      LEFT JOIN {quote_identifier("externalEvents")} ee ON r.type = 'external' AND ee.id = r.eventId
+      LEFT JOIN {quote_identifier("internalEvents")} ie ON (r.type IS NULL OR r.type <> 'external') AND ie.id = r.eventId
+      WHERE a.id = ?
+    """), (convert_boolean_value(1), convert_boolean_value(1), accountId))
+    return cursor.fetchall()
+  finally:
+    conn.close()
+
+def _build(rows):
+  """(email, statuses) from the joined rows, statuses as compact row tuples"""
+  email = rows[0][0]
+  statuses = []
+
+  requirementEnd = 4 + len(REQUIREMENT_COLUMNS)
+  externalEnd = requirementEnd + len(EXTERNAL_COLUMNS)
+  for row in rows:
+    # members without requirements, and requirements without an evaluation yet
+    if (row[4] == None or row[2] == None):
+      continue
+    requirementRow = tuple(row[4:requirementEnd])
+    isExternal = requirementRow[REQUIREMENT_COLUMNS.index("type")] == "external"
+    eventRow = tuple(row[requirementEnd:externalEnd] if isExternal else row[externalEnd:])
+    statuses.append((row[2], row[3], requirementRow, eventRow if eventRow[0] != None else None))
+  return email, statuses
+
+def _expand(statuses):
+  """Response dicts of cached status tuples"""
+  expanded = []
+  for evaluationId, attendanceStatus, requirementRow, eventRow in statuses:
+    requirement = RequirementDb.parseResponse(requirementRow)
+    eventDb = ExternalEventDb if requirement["type"] == "external" else InternalEventDb
+    expanded.append({
+      "evaluationId": evaluationId,
+      "event": eventDb.parseResponse(eventRow) if eventRow != None else None,
+      "requirement": requirement,
+      "eventType": requirement["type"],
+      "attendanceStatus": attendanceStatus,
+    })
+  return expanded
+
+def forAccount(accountId):
+  """Evaluation statuses of a member account, or None if the account no longer exists"""
+  with _cacheLock:
+    cached = _cache.get(accountId)
+  # another worker may have changed this member since the entry was cached
+  if (cached != None and time.monotonic() - cached[0] < MEMBER_STATUS_CACHE_TTL_SECS and _version(cached[1]) == cached[2]):
+    with _cacheLock:
+      if (accountId in _cache):
+        _cache.move_to_end(accountId)
+    return _expand(cached[3])
+
+  rows = _fetchRows(accountId)
+  if (len(rows) == 0):
+    return None
+
+  # the version is read by the same statement as the rows, so a later bump always misses
+  version = rows[0][1]
+  email, statuses = _build(rows)
+  with _cacheLock:
+    _cache[accountId] = (time.monotonic(), email, version, statuses)
+    _cache.move_to_end(accountId)
+    while (len(_cache) > MEMBER_STATUS_CACHE_SIZE):
+      _cache.popitem(last=False)
+  return _expand(statuses)
+
+def _dropLocal(emails: set):
+  with _cacheLock:
+    for accountId in [key for key, entry in _cache.items() if entry[1] in emails]:
+      _cache.pop(accountId, None)
+
+def invalidateEmails(emails: list):
+  """Drop the cached statuses of the members registered with these emails, on every worker"""
+  emails = {email for email in emails if email != None}
+  if (len(emails) == 0):
+    return
+  placeholders = ", ".join("?" * len(emails))
+  _bumpVersions(f"""
+    SELECT DISTINCT email, 1 FROM membership WHERE email IN ({placeholders})
+  """, tuple(emails))
+  _dropLocal(emails)
+
+def invalidateEmail(email: str):
+  """Drop the cached statuses of the member registered with this email"""
+  invalidateEmails([email])
+
+def invalidateRequirement(requirement: dict):
+  if (requirement == None):
+    return
+  invalidateEmail(requirement.get("email"))
+
+def invalidateEvent(eventId, eventType: str):
+  """Drop the cached statuses of every member registered for this event"""
+  try:
+    eventId = int(eventId)
+  except (TypeError, ValueError):
+    return
+  if (eventType == "external"):
+    typeCondition = "r.type = 'external'"
+  else:
+    typeCondition = "(r.type IS NULL OR r.type <> 'external')"
+  _bumpVersions(f"""
+    SELECT DISTINCT m.email, 1 FROM requirements r
+    JOIN membership m ON m.email = r.email
+    WHERE r.eventId = ? AND {typeCondition}
+  """, (eventId,))
+  # entries of this worker are dropped by their version check on the next read
@@ -0,0 +1,256 @@
+"""
+Streaming CSV/XLSX exports of reports, requirements, members and evaluations.
+
+Rows are read in fetchmany() batches (through a named server-side cursor on
+PostgreSQL) and written out as they arrive, so worker memory stays flat however
+many rows an academic year has. CSV is yielded to the client chunk by chunk.
+XLSX is built with openpyxl's write-only workbook, which spools rows to disk,
+and the finished file is streamed back in chunks.
+
+  mimetype, filename, chunks = exportChunks("requirements", "csv", ["fullname", "email"], {"type": "external"})
+"""
+from datetime import datetime
+from dotenv import load_dotenv
+from uuid import uuid4
+import tempfile
+import csv
+import io
+import os
+import re
+
+from ..database.connection import cursorInstance, convert_placeholders, convert_boolean_value, is_postgresql_connection, quote_identifier
+from ..utils.lazyImport import lazyModule, isAvailable
+
+load_dotenv()
+
+openpyxl = lazyModule("openpyxl")
+OPENPYXL_AVAILABLE = isAvailable("openpyxl")
+
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", 1000))
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# mixed-case tables are created quoted on PostgreSQL
+_EXTERNAL_EVENTS = quote_identifier("externalEvents")
+_INTERNAL_EVENTS = quote_identifier("internalEvents")
+
+# each dataset is a base query wrapped as "SELECT <columns> FROM (<query>) exported WHERE <filters>"
+_EVENT_JOIN = f"""
+  LEFT JOIN {_EXTERNAL_EVENTS} ee ON {{alias}}.type = 'external' AND ee.id = {{alias}}.eventId
+  LEFT JOIN {_INTERNAL_EVENTS} ie ON {{alias}}.type = 'internal' AND ie.id = {{alias}}.eventId
+"""
+
+DATASETS = {
+  "reports": {
+    "query": f"""
+      SELECT 'external' AS type, rep.id AS id, rep.eventId AS eventId, ee.title AS eventTitle,
+        ee.durationStart AS durationStart, rep.narrative AS narrative,
+        NULL AS budgetUtilized, NULL AS budgetUtilizedSrc, NULL AS psAttribution, NULL AS psAttributionSrc,
+        rep.photos AS photos, rep.photoCaptions AS photoCaptions
+      FROM {quote_identifier("externalReport")} rep LEFT JOIN {_EXTERNAL_EVENTS} ee ON ee.id = rep.eventId
+      UNION ALL
+      SELECT 'internal', rep.id, rep.eventId, ie.title, ie.durationStart, rep.narrative,
+        rep.budgetUtilized, rep.budgetUtilizedSrc, rep.psAttribution, rep.psAttributionSrc,
+        rep.photos, rep.photoCaptions
+      FROM {quote_identifier("internalReport")} rep LEFT JOIN {_INTERNAL_EVENTS} ie ON ie.id = rep.eventId
+    """,
+    "columns": [
+      "type", "id", "eventId", "eventTitle", "durationStart", "narrative", "budgetUtilized",
+      "budgetUtilizedSrc", "psAttribution", "psAttributionSrc", "photos", "photoCaptions"
+    ],
+    "filters": {"type": "text", "eventId": "int"},
+    "dateColumn": "durationStart",
+    "orderBy": "durationStart, id",
+  },
+  "requirements": {
+    "query": """
+      SELECT r.id AS id, r.type AS type, r.eventId AS eventId,
+        COALESCE(ee.title, ie.title) AS eventTitle, COALESCE(ee.durationStart, ie.durationStart) AS durationStart,
+        r.fullname AS fullname, r.email AS email, r.srcode AS srcode, r.age AS age, r.birthday AS birthday,
+        r.sex AS sex, r.affiliation AS affiliation, r.campus AS campus, r.collegeDept AS collegeDept,
+        r.yrlevelprogram AS yrlevelprogram, r.address AS address, r.contactNum AS contactNum,
+        r.curriculum AS curriculum, r.destination AS destination, r.firstAid AS firstAid, r.fees AS fees,
+        r.personnelInCharge AS personnelInCharge, r.personnelRole AS personnelRole,
+        r.medCert AS medCert, r.waiver AS waiver, r.accepted AS accepted
+      FROM requirements r
+    """ + _EVENT_JOIN.format(alias="r"),
+    "columns": [
+      "id", "type", "eventId", "eventTitle", "durationStart", "fullname", "email", "srcode", "age",
+      "birthday", "sex", "affiliation", "campus", "collegeDept", "yrlevelprogram", "address",
+      "contactNum", "curriculum", "destination", "firstAid", "fees", "personnelInCharge",
+      "personnelRole", "medCert", "waiver", "accepted"
+    ],
+    "filters": {"type": "text", "eventId": "int", "accepted": "bool", "sex": "text", "campus": "text", "collegeDept": "text"},
+    "dateColumn": "durationStart",
+    "orderBy": "durationStart, eventId",
+  },
+  "members": {
+    # login credentials are never exported
+    "query": """
+      SELECT id, fullname, email, srcode, age, birthday, sex, affiliation, campus, collegeDept,
+        yrlevelprogram, address, contactNum, fblink, bloodType, bloodDonation, medicalCondition,
+        applyingAs, volunterismExperience, weekdaysTimeDevotion, weekendsTimeDevotion,
+        areasOfInterest, paymentOption, active, accepted
+      FROM membership
+    """,
+    "columns": [
+      "id", "fullname", "email", "srcode", "age", "birthday", "sex", "affiliation", "campus",
+      "collegeDept", "yrlevelprogram", "address", "contactNum", "fblink", "bloodType",
+      "bloodDonation", "medicalCondition", "applyingAs", "volunterismExperience",
+      "weekdaysTimeDevotion", "weekendsTimeDevotion", "areasOfInterest", "paymentOption",
+      "active", "accepted"
+    ],
+    "filters": {"accepted": "bool", "active": "bool", "sex": "text", "campus": "text", "collegeDept": "text"},
+    "dateColumn": None,
+    "orderBy": "id",
+  },
+  "evaluations": {
+    "query": """
+      SELECT ev.id AS id, ev.requirementId AS requirementId, r.type AS type, r.eventId AS eventId,
+        COALESCE(ee.title, ie.title) AS eventTitle, COALESCE(ee.durationStart, ie.durationStart) AS durationStart,
+        r.fullname AS fullname, r.email AS email, r.sex AS sex, r.affiliation AS affiliation,
+        ev.criteria AS criteria, ev.q13 AS q13, ev.q14 AS q14, ev.comment AS comment,
+        ev.recommendations AS recommendations, ev.finalized AS finalized
+      FROM evaluation ev
+      JOIN requirements r ON r.id = ev.requirementId
+    """ + _EVENT_JOIN.format(alias="r"),
+    "columns": [
+      "id", "requirementId", "type", "eventId", "eventTitle", "durationStart", "fullname", "email",
+      "sex", "affiliation", "criteria", "q13", "q14", "comment", "recommendations", "finalized"
+    ],
+    "filters": {"type": "text", "eventId": "int", "finalized": "bool"},
+    "dateColumn": "durationStart",
+    "orderBy": "durationStart, id",
+  },
+}
+
+# bare mimetypes: Flask appends "; charset=utf-8" to text/* itself
+FORMATS = {
+  "csv": ("text/csv", "csv"),
+  "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# signed numbers and phone numbers such as +63 912 345 6789 cannot call a function
+_SIGNED_NUMBER = re.compile(r"[+-][0-9][0-9 .,()-]*")
+_ILLEGAL_XLSX_CHARACTERS = re.compile(r"[\000-\010]|[\013-\014]|[\016-\037]")
+
+def _dateToEpochMs(value: str, endOfDay: bool = False):
+  parsed = datetime.strptime(value, "%Y-%m-%d")
+  if endOfDay:
+    parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999000)
+  return int(parsed.timestamp() * 1000)
+
+def buildQuery(dataset: str, columns: list = None, filters: dict = None, dateFrom: str = None, dateTo: str = None):
+  """
+  SQL and parameters for an export. Raises ValueError for unknown datasets,
+  columns or filters, and for dates that are not YYYY-MM-DD.
+  """
+  if (dataset not in DATASETS):
+    raise ValueError(f"Unknown export '{dataset}', expected one of {sorted(DATASETS)}")
+  spec = DATASETS[dataset]
+
+  columns = columns or spec["columns"]
+  unknown = [column for column in columns if column not in spec["columns"]]
+  if unknown:
+    raise ValueError(f"Unknown columns for {dataset}: {', '.join(unknown)}")
+
+  conditions = []
+  params = []
+  for column, value in (filters or {}).items():
+    kind = spec["filters"].get(column)
+    if (kind == None):
+      raise ValueError(f"Cannot filter {dataset} by '{column}'")
+    if (kind == "int"):
+      value = int(value)
+    elif (kind == "bool"):
+      value = convert_boolean_value(1 if str(value).lower() in ["1", "true", "yes"] else 0)
+    conditions.append(f"{column} = ?")
+    params.append(value)
+
+  if (dateFrom or dateTo):
+    if (spec["dateColumn"] == None):
+      raise ValueError(f"{dataset} cannot be filtered by date")
+    if dateFrom:
+      conditions.append(f"{spec['dateColumn']} >= ?")
+      params.append(_dateToEpochMs(dateFrom))
+    if dateTo:
+      conditions.append(f"{spec['dateColumn']} <= ?")
+      params.append(_dateToEpochMs(dateTo, endOfDay=True))
+
+  query = f"SELECT {', '.join(columns)} FROM ({spec['query']}) exported"
+  if conditions:
+    query += " WHERE " + " AND ".join(conditions)
+  query += f" ORDER BY {spec['orderBy']}"
+  return convert_placeholders(query), tuple(params), columns
+
+def streamRows(query: str, params: tuple):
+  """Yield result rows in EXPORT_FETCH_SIZE batches; the connection closes when the generator does"""
+  conn, cursor = cursorInstance()
+  try:
+    if is_postgresql_connection(conn):
+      # named cursor: rows stay on the server until fetched
+      cursor = conn.cursor(name=f"export_{uuid4().hex}")
+      cursor.itersize = EXPORT_FETCH_SIZE
+    cursor.execute(query, params)
+    while True:
+      rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+      if not rows:
+        break
+      for row in rows:
+        yield row
+  finally:
+    conn.close()
+
+def _safeText(value):
+  """Cells starting like a formula are prefixed so spreadsheets show them as text"""
+  if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES) and not _SIGNED_NUMBER.fullmatch(value):
+    return "'" + value
+  return value
+
+def csvChunks(columns: list, rows):
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  # BOM so Excel opens the file as UTF-8
+  buffer.write("\ufeff")
+  writer.writerow(columns)
+  for row in rows:
+    writer.writerow([_safeText(value) for value in row])
+    if (buffer.tell() >= EXPORT_CHUNK_BYTES):
+      yield buffer.getvalue().encode("utf-8")
+      buffer.seek(0)
+      buffer.truncate(0)
+  yield buffer.getvalue().encode("utf-8")
+
+def xlsxChunks(columns: list, rows, sheetTitle: str = "Export"):
+  workbook = openpyxl.Workbook(write_only=True)
+  sheet = workbook.create_sheet(title=sheetTitle[:31])
+  sheet.append(columns)
+  for row in rows:
+    sheet.append([
+      _ILLEGAL_XLSX_CHARACTERS.sub("", _safeText(value)) if isinstance(value, str) else value
+      for value in row
+    ])
+
+  with tempfile.TemporaryFile() as output:
+    workbook.save(output)
+    output.seek(0)
+    for chunk in iter(lambda: output.read(EXPORT_CHUNK_BYTES), b""):
+      yield chunk
+
+def exportChunks(dataset: str, fmt: str, columns: list = None, filters: dict = None, dateFrom: str = None, dateTo: str = None):
+  """
+  (mimetype, filename, chunk generator) for an export. The query is validated
+  up front so bad parameters fail before the response starts streaming.
+  """
+  if (fmt not in FORMATS):
+    raise ValueError(f"Unknown format '{fmt}', expected one of {sorted(FORMATS)}")
+  if (fmt == "xlsx" and not OPENPYXL_AVAILABLE):
+    raise ValueError("XLSX export needs openpyxl installed, use format=csv")
+
+  query, params, columns = buildQuery(dataset, columns, filters, dateFrom, dateTo)
+  rows = streamRows(query, params)
+  chunks = xlsxChunks(columns, rows, dataset) if fmt == "xlsx" else csvChunks(columns, rows)
+
+  mimetype, extension = FORMATS[fmt]
+  filename = f"{dataset}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+  return mimetype, filename, chunks
@@ -0,0 +1,463 @@
+"""
+Per-event and per-volunteer feature tables for the AnalyticsEngine.
+
+Rows are recomputed one at a time from the write paths (requirement, evaluation,
+membership and event changes) so the heavy multi-join aggregation never runs
+over the whole database again. Training and batch scoring read a columnar
+snapshot of these tables: one memory-mapped .npy file per column under
+FEATURE_STORE_PATH/<table>/<version>/, with CURRENT pointing at the newest one.
+"""
+from datetime import datetime
+from uuid import uuid4
+from dotenv import load_dotenv
+import json
+import os
+import shutil
+
+from ..database.connection import (
+    cursorInstance, quote_identifier, convert_placeholders, convert_boolean_condition, DATABASE_URL
+)
+
+load_dotenv()
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FEATURE_STORE_PATH = os.getenv("FEATURE_STORE_PATH") or os.path.join(BACKEND_ROOT, "feature_store")
+FEATURE_STORE_ENABLED = os.getenv("FEATURE_STORE_ENABLED", "True") == "True"
+
+# (column, sql type, snapshot kind) - kind is "num" for float arrays, "str" for unicode arrays
+EVENT_FEATURE_COLUMNS = [
+    ("id", "INTEGER NOT NULL", "num"),
+    ("eventType", "STRING NOT NULL", "str"),
+    ("title", "STRING", "str"),
+    ("status", "STRING", "str"),
+    ("venue", "STRING", "str"),
+    ("modeOfDelivery", "STRING", "str"),
+    ("durationStart", "BIGINT", "num"),
+    ("durationEnd", "BIGINT", "num"),
+    ("maleTotal", "INTEGER", "num"),
+    ("femaleTotal", "INTEGER", "num"),
+    ("createdAt", "BIGINT", "num"),
+    ("registered_count", "INTEGER", "num"),
+    ("attended_count", "INTEGER", "num"),
+    ("has_feedback", "INTEGER", "num"),
+    ("updatedAt", "BIGINT NOT NULL", "num"),
+]
+
+VOLUNTEER_FEATURE_COLUMNS = [
+    ("id", "INTEGER NOT NULL", "num"),
+    ("email", "STRING", "str"),
+    ("age", "INTEGER", "num"),
+    ("sex", "STRING", "str"),
+    ("campus", "STRING", "str"),
+    ("collegeDept", "STRING", "str"),
+    ("yrlevelprogram", "STRING", "str"),
+    ("volunterismExperience", "INTEGER", "num"),
+    ("accepted", "INTEGER", "num"),
+    ("active", "INTEGER", "num"),
+    ("total_registrations", "INTEGER", "num"),
+    ("attended_events", "INTEGER", "num"),
+    ("first_participation", "BIGINT", "num"),
+    ("last_participation", "BIGINT", "num"),
+    ("updatedAt", "BIGINT NOT NULL", "num"),
+]
+
+FEATURE_TABLES = {
+    "events": ("eventFeatures", EVENT_FEATURE_COLUMNS, ["eventType", "id"]),
+    "volunteers": ("volunteerFeatures", VOLUNTEER_FEATURE_COLUMNS, ["id"]),
+}
+
+
+def _nowMs():
+    return int(datetime.now().timestamp() * 1000)
+
+
+def _toEpochMs(value):
+    """createdAt comes back as a string (SQLite) or datetime (PostgreSQL)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    try:
+        return int(datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+    except ValueError:
+        try:
+            return int(datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp() * 1000)
+        except ValueError:
+            return None
+
+
+def _toInt(value):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def ensure_tables(cursor=None):
+    """Create the feature tables if they do not exist yet"""
+    ownConnection = cursor is None
+    if ownConnection:
+        conn, cursor = cursorInstance()
+
+    for tableName, columns, key in FEATURE_TABLES.values():
+        columnSql = ",\n".join([
+            f"{name} {sqlType.replace('STRING', 'VARCHAR(255)') if is_postgresql else sqlType}"
+            for name, sqlType, _ in columns
+        ])
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote_identifier(tableName)}(\n{columnSql},\nPRIMARY KEY ({', '.join(key)})\n)"
+        )
+
+    if ownConnection:
+        conn.commit()
+        conn.close()
+
+
+def _upsert(cursor, name, rows):
+    tableName, columns, key = FEATURE_TABLES[name]
+    columnNames = [column[0] for column in columns]
+    updates = ", ".join([f"{col}=excluded.{col}" for col in columnNames if col not in key])
+    query = f"""
+        INSERT INTO {quote_identifier(tableName)} ({", ".join(columnNames)})
+        VALUES ({", ".join(["?"] * len(columnNames))})
+        ON CONFLICT ({", ".join(key)}) DO UPDATE SET {updates}
+    """
+    query = convert_placeholders(query)
+    for row in rows:
+        cursor.execute(query, row)
+
+
+def _eventRows(cursor, eventType, eventId=None):
+    requirements_table = quote_identifier('requirements')
+    evaluation_table = quote_identifier('evaluation')
+    feedback_table = quote_identifier('feedback')
+
+    if eventType == "internal":
+        events_table = quote_identifier('internalEvents')
+        venue, mode, male, female = "ev.venue", "ev.modeOfDelivery", "ev.maleTotal", "ev.femaleTotal"
+    else:
+        events_table = quote_identifier('externalEvents')
+        venue, mode, male, female = "ev.location", "'external'", "0", "0"
+
+    query = f"""
+        SELECT
+            ev.id, ev.title, ev.status, {venue}, {mode},
+            ev.durationStart, ev.durationEnd, {male}, {female}, ev.createdAt,
+            (SELECT COUNT(*) FROM {requirements_table} r
+                WHERE r.eventId = ev.id AND r.type = ?),
+            (SELECT COUNT(*) FROM {requirements_table} r
+                JOIN {evaluation_table} e ON e.requirementId = r.id
+                WHERE r.eventId = ev.id AND r.type = ? AND e.finalized = 1 AND e.criteria != ''),
+            CASE WHEN EXISTS (SELECT 1 FROM {feedback_table} f WHERE f.id = ev.feedback_id) THEN 1 ELSE 0 END
+        FROM {events_table} ev
+    """
+    params = [eventType, eventType]
+    if eventId is not None:
+        query += " WHERE ev.id = ?"
+        params.append(eventId)
+
+    cursor.execute(convert_boolean_condition(convert_placeholders(query)), params)
+    updatedAt = _nowMs()
+    return [(
+        row[0], eventType, row[1], row[2], row[3], row[4],
+        _toInt(row[5]), _toInt(row[6]), _toInt(row[7]) or 0, _toInt(row[8]) or 0,
+        _toEpochMs(row[9]), row[10] or 0, row[11] or 0, row[12] or 0, updatedAt
+    ) for row in cursor.fetchall()]
+
+
+def _volunteerRows(cursor, email=None, membershipId=None, emails=None):
+    membership_table = quote_identifier('membership')
+    requirements_table = quote_identifier('requirements')
+    evaluation_table = quote_identifier('evaluation')
+    internal_table = quote_identifier('internalEvents')
+    external_table = quote_identifier('externalEvents')
+
+    # participation time is the start of the event the volunteer registered to
+    query = f"""
+        SELECT
+            m.id, m.email, m.age, m.sex, m.campus, m.collegeDept, m.yrlevelprogram,
+            m.volunterismExperience, m.accepted, m.active,
+            COUNT(r.id),
+            SUM(CASE WHEN e.finalized = 1 AND e.criteria != '' THEN 1 ELSE 0 END),
+            MIN(COALESCE(ie.durationStart, ee.durationStart)),
+            MAX(COALESCE(ie.durationStart, ee.durationStart))
+        FROM {membership_table} m
+        LEFT JOIN {requirements_table} r ON r.email = m.email
+        LEFT JOIN {evaluation_table} e ON e.requirementId = r.id
+        LEFT JOIN {internal_table} ie ON r.type = 'internal' AND ie.id = r.eventId
+        LEFT JOIN {external_table} ee ON r.type = 'external' AND ee.id = r.eventId
+    """
+    params = []
+    if email is not None:
+        query += " WHERE m.email = ?"
+        params.append(email)
+    elif membershipId is not None:
+        query += " WHERE m.id = ?"
+        params.append(membershipId)
+    elif emails is not None:
+        query += f" WHERE m.email IN ({', '.join('?' * len(emails))})"
+        params.extend(emails)
+    query += " GROUP BY m.id"
+
+    cursor.execute(convert_boolean_condition(convert_placeholders(query)), params)
+    updatedAt = _nowMs()
+    return [(
+        row[0], row[1], _toInt(row[2]), row[3], row[4], row[5], row[6],
+        1 if row[7] else 0,
+        None if row[8] is None else (1 if row[8] else 0),
+        1 if row[9] else 0,
+        row[10] or 0, row[11] or 0, _toInt(row[12]), _toInt(row[13]), updatedAt
+    ) for row in cursor.fetchall()]
+
+
+def refreshEvent(eventId, eventType: str):
+    conn, cursor = cursorInstance()
+    try:
+        _upsert(cursor, "events", _eventRows(cursor, eventType, eventId))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def refreshVolunteer(email: str = None, membershipId=None):
+    if email is None and membershipId is None:
+        return
+    conn, cursor = cursorInstance()
+    try:
+        _upsert(cursor, "volunteers", _volunteerRows(cursor, email=email, membershipId=membershipId))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def refreshVolunteers(emails: list):
+    """Recompute the rows of several volunteers with one query"""
+    emails = sorted({email for email in emails if email})
+    if not emails:
+        return
+    conn, cursor = cursorInstance()
+    try:
+        _upsert(cursor, "volunteers", _volunteerRows(cursor, emails=emails))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def refreshAllVolunteers():
+    """Recompute every volunteer row, e.g. after a bulk member import"""
+    conn, cursor = cursorInstance()
+    try:
+        _upsert(cursor, "volunteers", _volunteerRows(cursor))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def rebuildAll():
+    """Backfill every feature row; run once after deploying or with --rebuild-features"""
+    conn, cursor = cursorInstance()
+    try:
+        ensure_tables(cursor)
+        _upsert(cursor, "events", _eventRows(cursor, "internal") + _eventRows(cursor, "external"))
+        _upsert(cursor, "volunteers", _volunteerRows(cursor))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+#################
+#  Write hooks  #
+#################
+# hooks must never break the write that triggered them
+def onEventChanged(eventId, eventType: str):
+    if not FEATURE_STORE_ENABLED:
+        return
+    try:
+        refreshEvent(eventId, eventType)
+    except Exception as e:
+        print(f"[FEATURE_STORE] Failed to refresh {eventType} event {eventId}: {e}")
+
+
+def onRequirementChanged(requirement: dict):
+    if not FEATURE_STORE_ENABLED or not requirement:
+        return
+    eventId = requirement.get("eventId")
+    if isinstance(eventId, dict):
+        eventId = eventId.get("id")
+    onEventChanged(eventId, requirement.get("type") or "external")
+    onMemberChanged(email=requirement.get("email"))
+
+
+def onRequirementsChanged(requirements: list):
+    """Batch version of onRequirementChanged: each event and the volunteers are refreshed once"""
+    if not FEATURE_STORE_ENABLED or not requirements:
+        return
+    events = set()
+    for requirement in requirements:
+        eventId = requirement.get("eventId")
+        if isinstance(eventId, dict):
+            eventId = eventId.get("id")
+        events.add((eventId, requirement.get("type") or "external"))
+    for eventId, eventType in events:
+        onEventChanged(eventId, eventType)
+    try:
+        refreshVolunteers([requirement.get("email") for requirement in requirements])
+    except Exception as e:
+        print(f"[FEATURE_STORE] Failed to refresh {len(requirements)} volunteers: {e}")
+
+
+def onMemberChanged(email: str = None, membershipId=None):
+    if not FEATURE_STORE_ENABLED or (not email and membershipId is None):
+        return
+    try:
+        refreshVolunteer(email=email or None, membershipId=membershipId)
+    except Exception as e:
+        print(f"[FEATURE_STORE] Failed to refresh volunteer {email or membershipId}: {e}")
+
+
+###############
+#  Snapshots  #
+###############
+def snapshot(name: str):
+    """Write the feature table to a new columnar snapshot and make it current"""
+    import numpy as np
+
+    tableName, columns, _ = FEATURE_TABLES[name]
+    columnNames = [column[0] for column in columns]
+
+    # rows written from here on are read back from the table by loadFrame
+    takenAt = _nowMs()
+    conn, cursor = cursorInstance()
+    try:
+        cursor.execute(f"SELECT {', '.join(columnNames)} FROM {quote_identifier(tableName)}")
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    version = datetime.now().strftime("%Y%m%d%H%M%S") + "-" + uuid4().hex[:6]
+    baseDir = os.path.join(FEATURE_STORE_PATH, name)
+    versionDir = os.path.join(baseDir, version)
+    os.makedirs(versionDir, exist_ok=True)
+
+    for index, (column, _, kind) in enumerate(columns):
+        values = [row[index] for row in rows]
+        if kind == "num":
+            array = np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+        else:
+            array = np.array(["" if value is None else str(value) for value in values], dtype=np.str_)
+            if array.dtype.itemsize == 0:
+                array = array.astype("<U1")
+        np.save(os.path.join(versionDir, f"{column}.npy"), array, allow_pickle=False)
+
+    with open(os.path.join(versionDir, "meta.json"), "w") as metaFile:
+        json.dump({
+            "table": tableName,
+            "columns": columnNames,
+            "rows": len(rows),
+            "takenAt": takenAt,
+            "createdAt": _nowMs()
+        }, metaFile)
+
+    tmpPointer = os.path.join(baseDir, f"CURRENT.{uuid4().hex}.tmp")
+    with open(tmpPointer, "w") as pointer:
+        pointer.write(version)
+    os.replace(tmpPointer, os.path.join(baseDir, "CURRENT"))
+
+    # keep the previous snapshot around for readers that still have it mapped
+    for old in sorted(entry for entry in os.listdir(baseDir) if entry not in ("CURRENT", version) and not entry.endswith(".tmp"))[:-1]:
+        shutil.rmtree(os.path.join(baseDir, old), ignore_errors=True)
+
+    return version
+
+
+def snapshotAll():
+    return {name: snapshot(name) for name in FEATURE_TABLES}
+
+
+def currentSnapshot(name: str):
+    try:
+        with open(os.path.join(FEATURE_STORE_PATH, name, "CURRENT"), "r") as pointer:
+            version = pointer.read().strip()
+    except FileNotFoundError:
+        return None
+    versionDir = os.path.join(FEATURE_STORE_PATH, name, version)
+    return versionDir if os.path.isdir(versionDir) else None
+
+
+def snapshotTakenAt(name: str):
+    """Epoch ms at which the current snapshot started reading its table, or None"""
+    versionDir = currentSnapshot(name)
+    if versionDir is None:
+        return None
+    try:
+        with open(os.path.join(versionDir, "meta.json"), "r") as metaFile:
+            meta = json.load(metaFile)
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta.get("takenAt", meta.get("createdAt"))
+
+
+def _rowsSince(name: str, sinceMs):
+    tableName, columns, _ = FEATURE_TABLES[name]
+    columnNames = [column[0] for column in columns]
+    conn, cursor = cursorInstance()
+    try:
+        cursor.execute(
+            convert_placeholders(f"SELECT {', '.join(columnNames)} FROM {quote_identifier(tableName)} WHERE updatedAt >= ?"),
+            (sinceMs,)
+        )
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def loadArrays(name: str):
+    """Memory-mapped column arrays of the current snapshot, or None if there is none"""
+    import numpy as np
+
+    versionDir = currentSnapshot(name)
+    if versionDir is None:
+        return None
+    _, columns, _ = FEATURE_TABLES[name]
+    return {
+        column: np.load(os.path.join(versionDir, f"{column}.npy"), mmap_mode="r", allow_pickle=False)
+        for column, _, _ in columns
+    }
+
+
+def loadFrame(name: str):
+    """
+    Current snapshot as a DataFrame, or None if no snapshot has been taken.
+    Rows the write hooks upserted since the snapshot was taken are read from the
+    feature table and replace (or extend) the snapshot rows, so scoring sees new
+    events and volunteers before the next training run.
+    """
+    import pandas as pd
+
+    takenAt = snapshotTakenAt(name)
+    arrays = loadArrays(name)
+    if arrays is None:
+        return None
+    _, columns, key = FEATURE_TABLES[name]
+    frame = pd.DataFrame(arrays, copy=False)
+    for column, _, kind in columns:
+        if kind == "str":
+            frame[column] = frame[column].astype(object).where(frame[column] != "", None)
+
+    fresh = _rowsSince(name, takenAt) if takenAt is not None else []
+    if len(fresh) == 0:
+        return frame
+
+    fresh = pd.DataFrame(fresh, columns=[column[0] for column in columns])
+    for column, _, kind in columns:
+        if kind == "num":
+            fresh[column] = pd.to_numeric(fresh[column], errors="coerce").astype("float64")
+    freshKeys = pd.MultiIndex.from_frame(fresh[key].astype(str))
+    stale = pd.MultiIndex.from_frame(frame[key].astype(str)).isin(freshKeys)
+    return pd.concat([frame[~stale], fresh], ignore_index=True)
@@ -0,0 +1,216 @@
+"""
+Resized variants of uploaded report photos.
+
+Photos are stored at full resolution by basicFileWriter. After an upload the
+report controllers schedule an "image_variants" job, which renders a thumb and
+a medium size of every new photo as WebP plus a JPEG fallback under
+uploads/variants/<stem>/ and records them in the photoVariants table. The
+/uploads route serves a variant with ?variant=thumb|medium and falls back to the
+original while the variant does not exist yet (or when Pillow is missing).
+
+  uploads/blobs/ab/cd/<sha256>.jpg
+  uploads/variants/<sha256>/thumb.webp, thumb.jpg, medium.webp, medium.jpg
+"""
+from dotenv import load_dotenv
+import os
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, DATABASE_URL
+from ..utils.lazyImport import lazyModule, isAvailable
+from ..utils.blobStorage import uploadsPath
+from . import Scheduler
+
+load_dotenv()
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+PIL_AVAILABLE = isAvailable("PIL")
+Image = lazyModule("PIL.Image")
+ImageOps = lazyModule("PIL.ImageOps")
+
+IMAGE_VARIANTS_ENABLED = os.getenv("IMAGE_VARIANTS_ENABLED", "True") == "True"
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", 80))
+VARIANTS_ROOT = os.getenv("IMAGE_VARIANTS_ROOT", uploadsPath("variants"))
+
+# longest edge in pixels, images are never upscaled
+VARIANT_SIZES = {
+  "thumb": int(os.getenv("IMAGE_THUMB_SIZE", 320)),
+  "medium": int(os.getenv("IMAGE_MEDIUM_SIZE", 1024)),
+}
+VARIANT_FORMATS = [("webp", "WEBP"), ("jpg", "JPEG")]
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif", "bmp", "tif", "tiff"}
+
+TABLE = "photoVariants"
+
+def ensure_table(cursor=None):
+  """Create the photoVariants table, one row per original photo path"""
+  ownConnection = cursor is None
+  if ownConnection:
+    conn, cursor = cursorInstance()
+
+  textType = "VARCHAR(255)" if is_postgresql else "STRING"
+  cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {quote_identifier(TABLE)}(
+      sourcePath {textType} PRIMARY KEY,
+      thumb {textType},
+      medium {textType},
+      status {textType} NOT NULL DEFAULT 'pending',
+      lastError TEXT,
+      updatedAt BIGINT NOT NULL
+    )
+  """)
+
+  if ownConnection:
+    conn.commit()
+    conn.close()
+
+def _normalize(sourcePath: str):
+  return sourcePath.replace("\\", "/").lstrip("/")
+
+def isImage(sourcePath: str):
+  return "." in sourcePath and sourcePath.rsplit(".", 1)[1].lower() in IMAGE_EXTENSIONS
+
+def variantPath(sourcePath: str, variant: str, extension: str = "webp"):
+  """uploads/variants/<stem>/<variant>.<extension> for an original such as uploads/blobs/ab/cd/<stem>.jpg"""
+  stem = os.path.splitext(os.path.basename(_normalize(sourcePath)))[0]
+  return os.path.join(VARIANTS_ROOT, stem, f"{variant}.{extension}").replace(os.sep, "/")
+
+def servedVariant(uploadPath: str, variant: str, acceptsWebp: bool = True):
+  """
+  Path under uploads/ to serve for ?variant=..., or None to serve the original.
+  uploadPath is relative to uploads/, as received by the /uploads route.
+  """
+  if (variant not in VARIANT_SIZES):
+    return None
+  extension = "webp" if acceptsWebp else "jpg"
+  path = variantPath(uploadsPath(uploadPath), variant, extension)
+  if not os.path.isfile(path):
+    return None
+  return os.path.relpath(path, uploadsPath()).replace(os.sep, "/")
+
+def _render(sourcePath: str):
+  with Image.open(sourcePath) as original:
+    # respect camera rotation before the EXIF data is dropped
+    image = ImageOps.exif_transpose(original)
+    hasAlpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+    written = {}
+    for variant, size in VARIANT_SIZES.items():
+      resized = image.copy()
+      resized.thumbnail((size, size), Image.LANCZOS)
+      for extension, imageFormat in VARIANT_FORMATS:
+        target = variantPath(sourcePath, variant, extension)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        output = resized
+        if (imageFormat == "JPEG" or not hasAlpha):
+          output = resized.convert("RGB")
+        elif (resized.mode != "RGBA"):
+          output = resized.convert("RGBA")
+
+        # write next to the target and rename so a half-written file is never served
+        tmpTarget = f"{target}.tmp"
+        if (imageFormat == "JPEG"):
+          output.save(tmpTarget, imageFormat, quality=IMAGE_VARIANT_QUALITY, optimize=True, progressive=True)
+        else:
+          output.save(tmpTarget, imageFormat, quality=IMAGE_VARIANT_QUALITY, method=4)
+        os.replace(tmpTarget, target)
+      written[variant] = variantPath(sourcePath, variant, "webp")
+    return written
+
+def _record(cursor, sourcePath: str, variants: dict, status: str, error: str = None):
+  cursor.execute(convert_placeholders(f"""
+    INSERT INTO {quote_identifier(TABLE)} (sourcePath, thumb, medium, status, lastError, updatedAt)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (sourcePath) DO UPDATE SET
+      thumb = excluded.thumb, medium = excluded.medium, status = excluded.status,
+      lastError = excluded.lastError, updatedAt = excluded.updatedAt
+  """), (sourcePath, variants.get("thumb"), variants.get("medium"), status, error, Scheduler.nowMs()))
+
+def generateVariants(paths: list):
+  """Render the variants of each original photo path, skipping ones that already exist"""
+  results = {}
+  failures = []
+  for sourcePath in [_normalize(path) for path in paths if path]:
+    if not isImage(sourcePath):
+      continue
+    try:
+      existing = all(
+        os.path.isfile(variantPath(sourcePath, variant, extension))
+        for variant in VARIANT_SIZES for extension, _ in VARIANT_FORMATS
+      )
+      if existing:
+        results[sourcePath] = ({variant: variantPath(sourcePath, variant) for variant in VARIANT_SIZES}, "ready", None)
+      elif not os.path.isfile(sourcePath):
+        results[sourcePath] = ({}, "missing", "Original photo not found")
+      else:
+        results[sourcePath] = (_render(sourcePath), "ready", None)
+    except Exception as e:
+      print(f"[IMAGE_VARIANTS] Failed to render {sourcePath}: {e}")
+      results[sourcePath] = ({}, "failed", str(e))
+      failures.append(sourcePath)
+
+  conn, cursor = cursorInstance()
+  try:
+    for sourcePath, (variants, status, error) in results.items():
+      _record(cursor, sourcePath, variants, status, error)
+    conn.commit()
+  finally:
+    conn.close()
+
+  if failures:
+    # let the scheduler retry the batch; finished photos are skipped next time
+    raise RuntimeError(f"Could not render variants for {', '.join(failures)}")
+  return results
+
+@Scheduler.jobHandler("image_variants")
+def runImageVariantsJob(payload: dict):
+  generateVariants(payload.get("paths", []))
+
+def scheduleVariants(paths: list):
+  """Queue variant generation for freshly uploaded photos, returns the job id or None"""
+  paths = [_normalize(path) for path in paths if path and isImage(path)]
+  if (not paths or not IMAGE_VARIANTS_ENABLED):
+    return None
+  if not PIL_AVAILABLE:
+    print("[IMAGE_VARIANTS] Pillow is not installed, serving original photos only")
+    return None
+  try:
+    return Scheduler.schedule("image_variants", {"paths": paths})
+  except Exception as e:
+    # the upload itself succeeded, originals are served until variants exist
+    print(f"[IMAGE_VARIANTS] Could not schedule variants: {e}")
+    return None
+
+def variantsFor(paths: list):
+  """
+  Variant paths for many originals in one query, aligned with the input list.
+  Entries are None for photos whose variants are not ready yet.
+  """
+  normalized = [_normalize(path) for path in paths if path]
+  if not normalized:
+    return [None for _ in paths]
+
+  ready = {}
+  conn, cursor = cursorInstance()
+  try:
+    placeholders = ", ".join(["?"] * len(normalized))
+    cursor.execute(convert_placeholders(f"""
+      SELECT sourcePath, thumb, medium FROM {quote_identifier(TABLE)}
+      WHERE status = 'ready' AND sourcePath IN ({placeholders})
+    """), tuple(normalized))
+    for sourcePath, thumb, medium in cursor.fetchall():
+      ready[sourcePath] = {"thumb": thumb, "medium": medium}
+  except Exception as e:
+    # table missing on an old database: behave as if nothing is ready yet
+    print(f"[IMAGE_VARIANTS] Could not load variants: {e}")
+  finally:
+    conn.close()
+
+  return [ready.get(_normalize(path)) if path else None for path in paths]
+
+def attachVariants(reports: list):
+  """Add a photoVariants list, aligned with photos, to already split report dicts"""
+  allPaths = [photo for report in reports for photo in report.get("photos", [])]
+  variants = iter(variantsFor(allPaths))
+  for report in reports:
+    report["photoVariants"] = [next(variants) for _ in report.get("photos", [])]
+  return reports
@@ -1,16 +1,24 @@
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    SKLEARN_AVAILABLE = True
-except ImportError:
+from collections import OrderedDict
+from dotenv import load_dotenv
+import threading
+import hashlib
+import os
+
+from ..utils.lazyImport import isAvailable
+
+# scikit-learn itself is imported when the context index is first built
+SKLEARN_AVAILABLE = isAvailable("sklearn")
+if not SKLEARN_AVAILABLE:
     print("Warning: scikit-learn not available. LSI functionality will be disabled.")
-    SKLEARN_AVAILABLE = False
-    # Create dummy functions
-    def TfidfVectorizer(*args, **kwargs):
-        return None
-    def cosine_similarity(*args, **kwargs):
-        return None
-        
+
+load_dotenv()
+
+# number of latent dimensions for the LSI projection, 0 keeps plain tf-idf cosine
+LSI_SVD_COMPONENTS = int(os.getenv("LSI_SVD_COMPONENTS", 0))
+
+# per-process bounds for the scored-text and averaged-analysis caches
+LSI_TEXT_CACHE_SIZE = int(os.getenv("LSI_TEXT_CACHE_SIZE", 5000))
+LSI_ANALYSIS_CACHE_SIZE = int(os.getenv("LSI_ANALYSIS_CACHE_SIZE", 256))
 
 contexts = {
   "Beach Cleanup Drive": "The Beach Cleanup Drive focused on removing trash and pollutants from the coastline. Volunteers participated in collecting various types of waste, including plastics, glass, and cigarette butts. The main objective was to protect marine life by preventing harmful debris from entering the ocean. Participants used gloves and trash bags to safely handle waste, and the event also included sorting recyclables from non-recyclables. Sessions on how waste impacts marine ecosystems were held, emphasizing the importance of clean beaches for both human and animal health.",
@@ -74,8 +82,54 @@ contexts = {
   "Awareness of Cybersecurity Risks by Gender": "examines the differences in awareness and understanding of cybersecurity risks between men and women. Discussions will cover how gender may influence attitudes toward online security, the perceived level of threat, and the behaviors individuals adopt to protect their personal data. Participants will engage in activities that highlight the importance of cybersecurity education for all genders, with a particular focus on addressing any gaps in awareness or action. Feedback evaluation terms include the clarity of discussions on cybersecurity risks, relevance of strategies to improve gender-based awareness, effectiveness of proposed educational approaches, and participant engagement in identifying personal security practices."
 }
 
-def LSICosineSimilarityMatch(texts: list[str]):
-  if not SKLEARN_AVAILABLE:
+class ContextIndex:
+  """
+  Vectorizer, context matrix and optional SVD projection fitted once over the
+  contexts corpus. Every row of the context matrix is L2 normalized, so scoring
+  a batch of texts is a single sparse product against its transpose.
+  """
+  def __init__(self, corpus: dict, components: int = LSI_SVD_COMPONENTS):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.preprocessing import normalize
+
+    self.labels = list(corpus.keys())
+    self.vectorizer = TfidfVectorizer(stop_words='english')
+    contextMatrix = self.vectorizer.fit_transform(list(corpus.values()))
+
+    self.svd = None
+    if (components > 0):
+      components = min(components, len(self.labels) - 1, contextMatrix.shape[1] - 1)
+      self.svd = TruncatedSVD(n_components=components, random_state=42)
+      contextMatrix = normalize(self.svd.fit_transform(contextMatrix))
+
+    self.contextMatrixT = contextMatrix.T
+
+  def project(self, texts: list[str]):
+    textMatrix = self.vectorizer.transform([text or "" for text in texts])
+    if (self.svd is not None):
+      from sklearn.preprocessing import normalize
+      textMatrix = normalize(self.svd.transform(textMatrix))
+    return textMatrix
+
+  def similarity(self, texts: list[str]):
+    """Dense (len(texts), len(contexts)) cosine similarity matrix"""
+    scores = self.project(texts) @ self.contextMatrixT
+    return scores.toarray() if hasattr(scores, "toarray") else scores
+
+_contextIndex = None
+_contextIndexLock = threading.Lock()
+
+def getContextIndex():
+  global _contextIndex
+  if (_contextIndex is None):
+    with _contextIndexLock:
+      if (_contextIndex is None):
+        _contextIndex = ContextIndex(contexts)
+  return _contextIndex
+
+def LSICosineSimilarityMatch(texts: list[str], topK: int = None):
+  if not SKLEARN_AVAILABLE or len(texts) == 0:
     # Return empty similarity scores when scikit-learn is not available
     textContextSimilarity = {}
     for text in texts:
@@ -84,21 +138,87 @@ def LSICosineSimilarityMatch(texts: list[str]):
         textContextSimilarity[text][context] = 0.0
     return textContextSimilarity
 
-  vectorizer = TfidfVectorizer(stop_words='english')
-  text_vectors = vectorizer.fit_transform(texts)
+  index = getContextIndex()
+  scores = index.similarity(texts)
 
-  context_vectors = {context: vectorizer.transform([keywords]) for context, keywords in contexts.items()}
+  textContextSimilarity = {}
+  for text, row in zip(texts, scores):
+    ranked = row.argsort()[::-1][:topK] if topK else range(len(index.labels))
+    textContextSimilarity[text] = {
+      index.labels[column]: float(f"{row[column]:.3f}") for column in ranked
+    }
 
-  similarities = {}
-  for text, vector in zip(texts, text_vectors):
-      for context, context_vector in context_vectors.items():
-          similarity = cosine_similarity(vector, context_vector).mean()
-          similarities.setdefault(text, {})[context] = similarity
+  return textContextSimilarity
 
-  textContextSimilarity = {}
-  for text, context_similarities in similarities.items():
-      textContextSimilarity[text] = {}
-      for context, similarity in context_similarities.items():
-          textContextSimilarity[text][context] = float(f"{similarity:.3f}")
+class _LRUCache:
+  def __init__(self, maxSize: int):
+    self.maxSize = maxSize
+    self.items = OrderedDict()
+    self.lock = threading.Lock()
+
+  def get(self, key):
+    with self.lock:
+      if (key not in self.items):
+        return None
+      self.items.move_to_end(key)
+      return self.items[key]
+
+  def put(self, key, value):
+    with self.lock:
+      self.items[key] = value
+      self.items.move_to_end(key)
+      while (len(self.items) > self.maxSize):
+        self.items.popitem(last=False)
+
+_textScoreCache = _LRUCache(LSI_TEXT_CACHE_SIZE)
+_analysisCache = _LRUCache(LSI_ANALYSIS_CACHE_SIZE)
+
+def _textKey(text: str):
+  return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+def contentHash(texts: list[str]):
+  """Order-independent hash of a batch of texts"""
+  digest = hashlib.sha256()
+  for key in sorted(_textKey(text) for text in texts):
+    digest.update(key.encode("ascii"))
+  return digest.hexdigest()
+
+def scoreTexts(texts: list[str]):
+  """
+  Context similarity rows for each text. Rows of texts seen before are reused,
+  only the new ones go through the vectorizer in a single batch.
+  """
+  index = getContextIndex()
+  keys = [_textKey(text) for text in texts]
+  rows = [_textScoreCache.get(key) for key in keys]
+
+  missing = [position for position, row in enumerate(rows) if row is None]
+  if (len(missing) > 0):
+    scored = index.similarity([texts[position] for position in missing])
+    for position, row in zip(missing, scored):
+      rows[position] = row
+      _textScoreCache.put(keys[position], row)
+
+  return rows
+
+def LSIAverageContextMatch(texts: list[str], cacheKey: str = None):
+  """
+  Mean similarity of every context across all texts. Results are cached by the
+  content hash of the texts (or the given cacheKey), so reopening an unchanged
+  analysis costs nothing and a new recommendation only scores that one text.
+  """
+  if not SKLEARN_AVAILABLE or len(texts) == 0:
+    return { context: 0.0 for context in contexts.keys() }
+
+  cacheKey = cacheKey or contentHash(texts)
+  cached = _analysisCache.get(cacheKey)
+  if (cached is not None):
+    return dict(cached)
+
+  index = getContextIndex()
+  rows = scoreTexts(texts)
+  averages = sum(rows) / len(rows)
+  analysis = { label: float(f"{score:.3f}") for label, score in zip(index.labels, averages) }
 
-  return textContextSimilarity
\ No newline at end of file
+  _analysisCache.put(cacheKey, analysis)
+  return dict(analysis)
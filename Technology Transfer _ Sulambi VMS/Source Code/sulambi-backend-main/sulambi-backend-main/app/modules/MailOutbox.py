@@ -0,0 +1,383 @@
+"""
+Durable outbox for outgoing email.
+
+threadedHtmlMailer() writes the message to the outbox table and returns at once.
+A small pool of worker threads per process claims due messages in batches
+(leased, so two gunicorn workers never send the same row), then delivers each
+batch through one Resend batch call or one authenticated SMTP session. Sends are
+rate limited, failures are retried with exponential backoff and messages that
+keep failing are dead-lettered for an admin to inspect or requeue.
+"""
+from smtplib import SMTP, SMTPServerDisconnected
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from datetime import datetime
+from dotenv import load_dotenv
+from uuid import uuid4
+import threading
+import time
+import os
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, DATABASE_URL
+from . import Mailer
+
+load_dotenv()
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", 2))
+OUTBOX_BATCH_SIZE = min(int(os.getenv("OUTBOX_BATCH_SIZE", 50)), 100)  # Resend batch limit is 100
+OUTBOX_RATE_PER_SEC = float(os.getenv("OUTBOX_RATE_PER_SEC", 2))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_BACKOFF_SECS = int(os.getenv("OUTBOX_BACKOFF_SECS", 30))
+OUTBOX_BACKOFF_MAX_SECS = 2 * 60 * 60
+OUTBOX_LEASE_SECS = 10 * 60
+OUTBOX_POLL_SECS = 15
+
+TABLE = "outbox"
+
+_wakeup = threading.Condition()
+_workers = []
+_workersLock = threading.Lock()
+
+def nowMs():
+  return int(datetime.now().timestamp() * 1000)
+
+def ensure_table(cursor=None):
+  """Create the outbox table and its due-time index"""
+  ownConnection = cursor is None
+  if ownConnection:
+    conn, cursor = cursorInstance()
+
+  idColumn = "id SERIAL PRIMARY KEY" if is_postgresql else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+  textType = "VARCHAR(255)" if is_postgresql else "STRING"
+  cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {quote_identifier(TABLE)}(
+      {idColumn},
+      mailTo {textType} NOT NULL,
+      subject TEXT NOT NULL,
+      html TEXT NOT NULL,
+      status {textType} NOT NULL DEFAULT 'queued',
+      attempts INTEGER NOT NULL DEFAULT 0,
+      maxAttempts INTEGER NOT NULL DEFAULT {OUTBOX_MAX_ATTEMPTS},
+      nextAttemptAt BIGINT NOT NULL,
+      leaseOwner {textType},
+      leaseUntil BIGINT,
+      provider {textType},
+      providerId {textType},
+      lastError TEXT,
+      createdAt BIGINT NOT NULL,
+      sentAt BIGINT
+    )
+  """)
+  cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_outbox_due ON {quote_identifier(TABLE)}(status, nextAttemptAt)")
+
+  if ownConnection:
+    conn.commit()
+    conn.close()
+
+def enqueue(mailTo: str, subject: str, htmlRendered: str, maxAttempts: int = OUTBOX_MAX_ATTEMPTS):
+  """Store a message for delivery and return its outbox id"""
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    query = f"""
+      INSERT INTO {quote_identifier(TABLE)} (mailTo, subject, html, status, attempts, maxAttempts, nextAttemptAt, createdAt)
+      VALUES (?, ?, ?, 'queued', 0, ?, ?, ?)
+    """
+    if is_postgresql:
+      cursor.execute(convert_placeholders(query + " RETURNING id"), (mailTo, subject, htmlRendered, maxAttempts, timeNow, timeNow))
+      mailId = cursor.fetchone()[0]
+    else:
+      cursor.execute(query, (mailTo, subject, htmlRendered, maxAttempts, timeNow, timeNow))
+      mailId = cursor.lastrowid
+    conn.commit()
+  finally:
+    conn.close()
+
+  start()
+  with _wakeup:
+    _wakeup.notify()
+  return mailId
+
+def enqueueMany(messages: list, maxAttempts: int = OUTBOX_MAX_ATTEMPTS):
+  """Store many (mailTo, subject, htmlRendered) messages with one statement and wake the workers once"""
+  if (len(messages) == 0):
+    return 0
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.executemany(convert_placeholders(f"""
+      INSERT INTO {quote_identifier(TABLE)} (mailTo, subject, html, status, attempts, maxAttempts, nextAttemptAt, createdAt)
+      VALUES (?, ?, ?, 'queued', 0, ?, ?, ?)
+    """), [(mailTo, subject, html, maxAttempts, timeNow, timeNow) for mailTo, subject, html in messages])
+    conn.commit()
+  finally:
+    conn.close()
+
+  start()
+  with _wakeup:
+    _wakeup.notify_all()
+  return len(messages)
+
+def _claimBatch(owner: str):
+  """Lease up to OUTBOX_BATCH_SIZE due messages for this worker"""
+  timeNow = nowMs()
+  table = quote_identifier(TABLE)
+  claimable = "(status = 'queued' AND nextAttemptAt <= ?) OR (status = 'sending' AND leaseUntil < ?)"
+  skipLocked = "FOR UPDATE SKIP LOCKED" if is_postgresql else ""
+
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {table}
+      SET status = 'sending', leaseOwner = ?, leaseUntil = ?, attempts = attempts + 1
+      WHERE id IN (
+        SELECT id FROM {table} WHERE {claimable} ORDER BY nextAttemptAt LIMIT ? {skipLocked}
+      ) AND ({claimable})
+    """), (owner, timeNow + OUTBOX_LEASE_SECS * 1000, timeNow, timeNow, OUTBOX_BATCH_SIZE, timeNow, timeNow))
+    conn.commit()
+
+    cursor.execute(convert_placeholders(f"""
+      SELECT id, mailTo, subject, html, attempts, maxAttempts FROM {table}
+      WHERE status = 'sending' AND leaseOwner = ?
+      ORDER BY id
+    """), (owner,))
+    return cursor.fetchall()
+  finally:
+    conn.close()
+
+def _recordResults(owner: str, results: list):
+  """results: [(id, attempts, maxAttempts, provider, providerId, error)]"""
+  timeNow = nowMs()
+  table = quote_identifier(TABLE)
+  conn, cursor = cursorInstance()
+  try:
+    for mailId, attempts, maxAttempts, provider, providerId, error in results:
+      if (error == None):
+        cursor.execute(convert_placeholders(f"""
+          UPDATE {table} SET status = 'sent', provider = ?, providerId = ?, sentAt = ?, lastError = NULL,
+            leaseOwner = NULL, leaseUntil = NULL
+          WHERE id = ? AND leaseOwner = ?
+        """), (provider, providerId, timeNow, mailId, owner))
+      elif (attempts >= maxAttempts):
+        print(f"[OUTBOX] Dead-lettering mail {mailId} after {attempts} attempts: {error}")
+        cursor.execute(convert_placeholders(f"""
+          UPDATE {table} SET status = 'dead', provider = ?, lastError = ?, leaseOwner = NULL, leaseUntil = NULL
+          WHERE id = ? AND leaseOwner = ?
+        """), (provider, error, mailId, owner))
+      else:
+        backoffSecs = min(OUTBOX_BACKOFF_SECS * (2 ** (attempts - 1)), OUTBOX_BACKOFF_MAX_SECS)
+        cursor.execute(convert_placeholders(f"""
+          UPDATE {table} SET status = 'queued', provider = ?, lastError = ?, nextAttemptAt = ?,
+            leaseOwner = NULL, leaseUntil = NULL
+          WHERE id = ? AND leaseOwner = ?
+        """), (provider, error, timeNow + backoffSecs * 1000, mailId, owner))
+    conn.commit()
+  finally:
+    conn.close()
+
+class _RateLimiter:
+  """Token bucket shared by the workers of one process"""
+  def __init__(self, ratePerSec: float):
+    self.rate = ratePerSec
+    self.capacity = max(1.0, ratePerSec)
+    self.tokens = self.capacity
+    self.updatedAt = time.monotonic()
+    self.lock = threading.Lock()
+
+  def acquire(self):
+    if self.rate <= 0:
+      return
+    while True:
+      with self.lock:
+        timeNow = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (timeNow - self.updatedAt) * self.rate)
+        self.updatedAt = timeNow
+        if self.tokens >= 1:
+          self.tokens -= 1
+          return
+        waitSecs = (1 - self.tokens) / self.rate
+      time.sleep(waitSecs)
+
+_rateLimiter = _RateLimiter(OUTBOX_RATE_PER_SEC)
+
+def _sendResendBatch(batch: list):
+  Mailer.resend.api_key = Mailer.RESEND_API_KEY
+  fromEmail = Mailer.RESEND_FROM_EMAIL or Mailer.EMAIL
+  results = []
+
+  batchApi = getattr(Mailer.resend, "Batch", None)
+  if batchApi != None and len(batch) > 1:
+    _rateLimiter.acquire()
+    try:
+      response = batchApi.send([
+        { "from": fromEmail, "to": mailTo, "subject": subject, "html": html }
+        for _, mailTo, subject, html, _, _ in batch
+      ])
+      data = response.get("data", []) if isinstance(response, dict) else getattr(response, "data", [])
+      for index, (mailId, _, _, _, attempts, maxAttempts) in enumerate(batch):
+        sent = data[index] if index < len(data) else {}
+        providerId = sent.get("id") if isinstance(sent, dict) else getattr(sent, "id", None)
+        results.append((mailId, attempts, maxAttempts, "Resend", providerId, None))
+      return results
+    except Exception as e:
+      # the batch endpoint rejects the whole batch, fall through to per-message sends
+      print(f"[OUTBOX] Resend batch send failed, sending individually: {e}")
+
+  for mailId, mailTo, subject, html, attempts, maxAttempts in batch:
+    _rateLimiter.acquire()
+    try:
+      response = Mailer.resend.Emails.send({ "from": fromEmail, "to": mailTo, "subject": subject, "html": html })
+      providerId = response.get("id") if isinstance(response, dict) else getattr(response, "id", None)
+      results.append((mailId, attempts, maxAttempts, "Resend", providerId, None))
+    except Exception as e:
+      results.append((mailId, attempts, maxAttempts, "Resend", None, str(e)))
+  return results
+
+def _openSmtp():
+  smtp = SMTP("smtp.gmail.com", 587, timeout=30)
+  smtp.ehlo()
+  smtp.starttls()
+  smtp.login(Mailer.EMAIL, Mailer.PASSW)
+  return smtp
+
+def _sendSmtpBatch(batch: list):
+  """Deliver a whole batch over a single authenticated SMTP session"""
+  results = []
+  smtp = None
+  for mailId, mailTo, subject, html, attempts, maxAttempts in batch:
+    _rateLimiter.acquire()
+    messageMime = MIMEMultipart()
+    messageMime["from"] = Mailer.EMAIL
+    messageMime["to"] = mailTo
+    messageMime["subject"] = subject
+    messageMime.attach(MIMEText(html, "html"))
+
+    error = None
+    for reconnect in range(2):
+      try:
+        if smtp == None:
+          smtp = _openSmtp()
+        smtp.sendmail(Mailer.EMAIL, mailTo, messageMime.as_string())
+        error = None
+        break
+      except SMTPServerDisconnected as e:
+        # session timed out mid-batch, reconnect once
+        smtp = None
+        error = str(e)
+      except Exception as e:
+        error = str(e)
+        break
+    results.append((mailId, attempts, maxAttempts, "SMTP", None, error))
+
+  if smtp != None:
+    try:
+      smtp.quit()
+    except Exception:
+      pass
+  return results
+
+def _deliver(batch: list):
+  if not Mailer.isEmailConfigured():
+    error = "Email not configured"
+    return [(mailId, attempts, maxAttempts, None, None, error) for mailId, _, _, _, attempts, maxAttempts in batch]
+  if Mailer.isResendConfigured():
+    return _sendResendBatch(batch)
+  return _sendSmtpBatch(batch)
+
+def _workerLoop():
+  owner = f"{os.getpid()}-{threading.current_thread().name}-{uuid4().hex[:6]}"
+  while True:
+    try:
+      batch = _claimBatch(owner)
+      if len(batch) == 0:
+        with _wakeup:
+          _wakeup.wait(timeout=OUTBOX_POLL_SECS)
+        continue
+
+      results = _deliver(batch)
+      _recordResults(owner, results)
+      sentCount = len([result for result in results if result[5] == None])
+      print(f"[OUTBOX] Delivered {sentCount}/{len(batch)} queued emails")
+    except Exception as e:
+      print(f"[OUTBOX] Worker error: {e}")
+      time.sleep(OUTBOX_POLL_SECS)
+
+def start():
+  """Start this process' outbox worker pool (idempotent)"""
+  with _workersLock:
+    if len([worker for worker in _workers if worker.is_alive()]) > 0:
+      return
+    if len(_workers) == 0:
+      try:
+        ensure_table()
+      except Exception as e:
+        print(f"[OUTBOX] Could not ensure {TABLE} table: {e}")
+
+    _workers.clear()
+    for index in range(max(1, OUTBOX_WORKERS)):
+      worker = threading.Thread(target=_workerLoop, name=f"outbox-{index}", daemon=True)
+      worker.start()
+      _workers.append(worker)
+
+STATUS_COLUMNS = ["id", "mailTo", "subject", "status", "attempts", "maxAttempts", "nextAttemptAt",
+                  "provider", "providerId", "lastError", "createdAt", "sentAt"]
+
+def getStatus(mailId: int):
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT {", ".join(STATUS_COLUMNS)} FROM {quote_identifier(TABLE)} WHERE id = ?
+    """), (mailId,))
+    row = cursor.fetchone()
+  finally:
+    conn.close()
+
+  return dict(zip(STATUS_COLUMNS, row)) if row != None else None
+
+def getSummary(status: str = None, limit: int = 50):
+  """Counts per status plus the most recent messages (optionally of one status)"""
+  table = quote_identifier(TABLE)
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(f"SELECT status, COUNT(*) FROM {table} GROUP BY status")
+    counts = { rowStatus: count for rowStatus, count in cursor.fetchall() }
+
+    query = f"SELECT {', '.join(STATUS_COLUMNS)} FROM {table}"
+    params = []
+    if status != None:
+      query += " WHERE status = ?"
+      params.append(status)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    cursor.execute(convert_placeholders(query), tuple(params))
+    recent = [dict(zip(STATUS_COLUMNS, row)) for row in cursor.fetchall()]
+  finally:
+    conn.close()
+
+  return {
+    "counts": counts,
+    "recent": recent
+  }
+
+def requeue(mailId: int):
+  """Put a dead-lettered (or stuck) message back in the queue"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier(TABLE)}
+      SET status = 'queued', attempts = 0, nextAttemptAt = ?, leaseOwner = NULL, leaseUntil = NULL
+      WHERE id = ? AND status IN ('dead', 'queued')
+    """), (nowMs(), mailId))
+    conn.commit()
+    requeued = cursor.rowcount > 0
+  finally:
+    conn.close()
+
+  if requeued:
+    start()
+    with _wakeup:
+      _wakeup.notify()
+  return requeued
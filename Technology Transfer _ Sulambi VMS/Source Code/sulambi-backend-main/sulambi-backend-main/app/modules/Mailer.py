@@ -177,7 +177,27 @@ def htmlMailer(mailTo: str, subject: str, htmlRendered: str):
     return False
 
 def threadedHtmlMailer(mailTo: str, subject: str, htmlRendered: str):
-  """Send HTML email in background thread with error handling"""
-  th = Thread(target=htmlMailer, args=(mailTo, subject, htmlRendered))
-  th.daemon = True
-  th.start()
+  """Queue HTML email in the durable outbox, delivered by the outbox worker pool"""
+  from .MailOutbox import enqueue
+  try:
+    return enqueue(mailTo, subject, htmlRendered)
+  except Exception as e:
+    # outbox table unavailable (e.g. not initialized yet), keep the old fire-and-forget path
+    print(f"[EMAIL ERROR] Could not queue email to {mailTo}, sending directly: {str(e)}")
+    th = Thread(target=htmlMailer, args=(mailTo, subject, htmlRendered))
+    th.daemon = True
+    th.start()
+    return None
+
+def threadedHtmlMailerMany(messages: list):
+  """Queue many (mailTo, subject, htmlRendered) messages in the durable outbox at once"""
+  from .MailOutbox import enqueueMany
+  try:
+    return enqueueMany(messages)
+  except Exception as e:
+    print(f"[EMAIL ERROR] Could not queue {len(messages)} emails, sending directly: {str(e)}")
+    for mailTo, subject, htmlRendered in messages:
+      th = Thread(target=htmlMailer, args=(mailTo, subject, htmlRendered))
+      th.daemon = True
+      th.start()
+    return None
@@ -0,0 +1,366 @@
+"""
+Bulk import of membership applications from the Google Forms spreadsheet.
+
+The sheet is mapped onto membership columns with vectorized pandas operations,
+validated as a whole (missing or malformed emails, duplicates inside the file,
+and emails/srcodes already in the database, checked against one set lookup)
+and inserted in chunks of IMPORT_CHUNK_SIZE inside one transaction, committed
+once at the end: a failed chunk or a crash mid-import leaves no members behind.
+Rows that are not imported end up in a rejects CSV with the reason.
+
+Imports run in a background thread and report progress through the
+importJobs table, so any worker can answer a status poll:
+
+  jobId = startImport("/tmp/member-app.xlsx", "member-app.xlsx")
+  getJob(jobId)  # {"status": "running", "processed": 1500, "total": 3200, ...}
+
+Per-chunk progress is written on PostgreSQL only. SQLite has a single writer,
+so the job row could not be updated while the import transaction is open; there
+the job stays at its validation counts until the insert commits.
+
+A restart kills the import thread; failStaleJobs() runs at startup and marks
+jobs that stopped reporting for IMPORT_STALE_MINUTES as failed.
+"""
+from dotenv import load_dotenv
+import threading
+import json
+import io
+import os
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, convert_boolean_value, DATABASE_URL
+from ..utils.lazyImport import lazyModule
+from . import FeatureStore
+from . import Scheduler
+
+load_dotenv()
+
+pd = lazyModule("pandas")
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+IMPORT_DEFAULT_PASSWORD = os.getenv("IMPORT_DEFAULT_PASSWORD", "password")
+IMPORT_AFFILIATION = "Batangas State University"
+# a live import updates its job row once per chunk (PostgreSQL) or when its insert commits (SQLite)
+IMPORT_STALE_MINUTES = float(os.getenv("IMPORT_STALE_MINUTES", 30))
+
+TABLE = "importJobs"
+
+# spreadsheet header -> membership column
+COLUMN_MAP = {
+  "I'm applying as": "applyingAs",
+  "Do you have any prior volunteerism experience?": "volunterismExperience",
+  "How much time can you devote for volunteering activities on weekdays?": "weekdaysTimeDevotion",
+  "How much time can you devote for volunteering activities on weekends?": "weekendsTimeDevotion",
+  "What areas or interests do you want to volunteer in? Check the area(s) that interest you. ": "areasOfInterest",
+  "Name (Last Name, First Name, Middle Initial)": "fullname",
+  "Email Address": "email",
+  "Gsuite Email": "gsuiteEmail",
+  "Sr-Code": "srcode",
+  "Age": "age",
+  "Birthday": "birthday",
+  "Sex": "sex",
+  "Campus": "campus",
+  "College/Department": "collegeDept",
+  "Year Level & Program": "yrlevelprogram",
+  "Address": "address",
+  "Contact Number": "contactNum",
+  "Facebook Link": "fblink",
+  "Blood Type": "bloodType",
+  "Blood Donation": "bloodDonation",
+  "Do you have any existing medical condition/s? If yes, please specify. If none, type N/A.": "medicalCondition",
+  "Payment Options": "paymentOption",
+  "1. What volunteering activities of Sulambi VOSA last Academic Year did you join?": "volunteerExpQ1",
+  "2. What volunteering activities did you join outside Sulambi VOSA and/or the University?": "volunteerExpQ2",
+  "2.1 Upload proof for the volunteering activities you joined outside(e.g. Pictures, Certificate)": "volunteerExpProof",
+  "Why do you want to become a member?": "reasonQ1",
+  "What can you contribute to the organization?": "reasonQ2",
+}
+
+INSERT_COLUMNS = [
+  "applyingAs", "volunterismExperience", "weekdaysTimeDevotion", "weekendsTimeDevotion",
+  "areasOfInterest", "fullname", "email", "affiliation", "srcode", "age", "birthday", "sex",
+  "campus", "collegeDept", "yrlevelprogram", "address", "contactNum", "fblink",
+  "bloodType", "bloodDonation", "medicalCondition", "paymentOption",
+  "username", "password", "active", "accepted",
+  "volunteerExpQ1", "volunteerExpQ2", "volunteerExpProof", "reasonQ1", "reasonQ2",
+]
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+#################
+#  Job records  #
+#################
+def ensure_table(cursor=None):
+  """Create the importJobs table used for progress reporting"""
+  ownConnection = cursor is None
+  if ownConnection:
+    conn, cursor = cursorInstance()
+
+  idColumn = "id SERIAL PRIMARY KEY" if is_postgresql else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+  textType = "VARCHAR(255)" if is_postgresql else "STRING"
+  cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {quote_identifier(TABLE)}(
+      {idColumn},
+      filename {textType},
+      status {textType} NOT NULL DEFAULT 'queued',
+      total INTEGER NOT NULL DEFAULT 0,
+      processed INTEGER NOT NULL DEFAULT 0,
+      inserted INTEGER NOT NULL DEFAULT 0,
+      rejected INTEGER NOT NULL DEFAULT 0,
+      rejects TEXT,
+      error TEXT,
+      createdAt BIGINT NOT NULL,
+      updatedAt BIGINT NOT NULL
+    )
+  """)
+
+  if ownConnection:
+    conn.commit()
+    conn.close()
+
+JOB_COLUMNS = ["id", "filename", "status", "total", "processed", "inserted", "rejected", "error", "createdAt", "updatedAt"]
+
+def _createJob(filename: str):
+  timeNow = Scheduler.nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    query = f"INSERT INTO {quote_identifier(TABLE)} (filename, status, createdAt, updatedAt) VALUES (?, 'queued', ?, ?)"
+    if is_postgresql:
+      cursor.execute(convert_placeholders(query + " RETURNING id"), (filename, timeNow, timeNow))
+      jobId = cursor.fetchone()[0]
+    else:
+      cursor.execute(query, (filename, timeNow, timeNow))
+      jobId = cursor.lastrowid
+    conn.commit()
+    return jobId
+  finally:
+    conn.close()
+
+def _updateJob(jobId: int, **fields):
+  if (jobId == None):
+    return
+  fields["updatedAt"] = Scheduler.nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    cursor.execute(convert_placeholders(
+      f"UPDATE {quote_identifier(TABLE)} SET {assignments} WHERE id = ?"
+    ), (*fields.values(), jobId))
+    conn.commit()
+  finally:
+    conn.close()
+
+def failStaleJobs():
+  """Mark imports whose thread died with its process (queued/running, no update for a while) as failed"""
+  timeNow = Scheduler.nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier(TABLE)} SET status = 'failed', error = ?, updatedAt = ?
+      WHERE status IN ('queued', 'running') AND updatedAt < ?
+    """), ("Import was interrupted by a server restart", timeNow, timeNow - int(IMPORT_STALE_MINUTES * 60 * 1000)))
+    failed = cursor.rowcount
+    conn.commit()
+  finally:
+    conn.close()
+  if (failed > 0):
+    print(f"[MEMBER_IMPORT] Marked {failed} interrupted import job(s) as failed")
+  return failed
+
+def getJob(jobId: int):
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(
+      f"SELECT {', '.join(JOB_COLUMNS)} FROM {quote_identifier(TABLE)} WHERE id = ?"
+    ), (jobId,))
+    row = cursor.fetchone()
+  finally:
+    conn.close()
+  return None if row == None else dict(zip(JOB_COLUMNS, row))
+
+def getRejects(jobId: int):
+  """Rejects CSV of a finished import, or None"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"SELECT rejects FROM {quote_identifier(TABLE)} WHERE id = ?"), (jobId,))
+    row = cursor.fetchone()
+  finally:
+    conn.close()
+  return None if row == None else row[0]
+
+##############
+#  Pipeline  #
+##############
+def readSheet(path: str):
+  if path.lower().endswith(".csv"):
+    return pd.read_csv(path, dtype=object)
+  return pd.read_excel(path, dtype=object)
+
+def _text(frame, column: str):
+  if (column not in frame.columns):
+    return pd.Series("", index=frame.index, dtype=object)
+  return frame[column].fillna("").astype(str).str.strip().replace({"nan": "", "NaT": ""})
+
+def prepareFrame(sheet):
+  """Spreadsheet rows -> membership columns, all column-wise"""
+  frame = sheet.rename(columns=COLUMN_MAP)
+  members = pd.DataFrame(index=frame.index)
+
+  for column in set(COLUMN_MAP.values()) - {"age", "birthday", "volunterismExperience", "areasOfInterest", "gsuiteEmail", "email"}:
+    members[column] = _text(frame, column)
+
+  # the G Suite address wins over the personal one when present
+  gsuite = _text(frame, "gsuiteEmail")
+  members["email"] = gsuite.where(gsuite != "", _text(frame, "email"))
+
+  members["volunterismExperience"] = _text(frame, "volunterismExperience").str.lower().isin(["yes", "true", "1"])
+  rawAge = frame["age"] if "age" in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+  members["age"] = pd.to_numeric(rawAge, errors="coerce").fillna(0).astype(int)
+
+  rawBirthday = frame["birthday"] if "birthday" in frame.columns else pd.Series(None, index=frame.index, dtype=object)
+  parsedBirthday = pd.to_datetime(rawBirthday, errors="coerce")
+  members["birthday"] = parsedBirthday.dt.strftime("%B %d, %Y").where(parsedBirthday.notna(), _text(frame, "birthday"))
+
+  members["areasOfInterest"] = _text(frame, "areasOfInterest").str.split(", ").map(
+    lambda areas: json.dumps([area for area in areas if area]) if isinstance(areas, list) else "[]"
+  )
+  members["medicalCondition"] = members["medicalCondition"].where(members["medicalCondition"] != "", "N/A")
+
+  members["affiliation"] = IMPORT_AFFILIATION
+  members["password"] = IMPORT_DEFAULT_PASSWORD
+  members["active"] = True
+  members["accepted"] = None
+  # spreadsheet row number as in the original loader, made unique against the database later
+  firstName = members["fullname"].str.split(" ").str[0].str.replace(",", "", regex=False)
+  members["username"] = firstName + pd.Series(frame.index + 2, index=frame.index).astype(str)
+  return members
+
+def _existingKeys():
+  """emails, srcodes and usernames already in membership, in one query"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute("SELECT email, srcode, username FROM membership")
+    emails, srcodes, usernames = set(), set(), set()
+    for email, srcode, username in cursor.fetchall():
+      if email: emails.add(email.strip().lower())
+      if srcode: srcodes.add(srcode.strip())
+      if username: usernames.add(username)
+    return emails, srcodes, usernames
+  finally:
+    conn.close()
+
+def validate(members):
+  """(accepted rows, rejected rows with a reason column)"""
+  emails, srcodes, usernames = _existingKeys()
+  reason = pd.Series("", index=members.index, dtype=object)
+  emailKey = members["email"].str.lower()
+
+  checks = [
+    (members["fullname"] == "", "missing name"),
+    (members["email"] == "", "missing email"),
+    (~members["email"].str.match(EMAIL_PATTERN), "invalid email"),
+    (emailKey.isin(emails), "email already registered"),
+    ((members["srcode"] != "") & members["srcode"].isin(srcodes), "srcode already registered"),
+    ((emailKey != "") & emailKey.duplicated(keep="first"), "duplicate email in file"),
+    ((members["srcode"] != "") & members["srcode"].duplicated(keep="first"), "duplicate srcode in file"),
+  ]
+  for mask, message in checks:
+    reason = reason.where(~(mask & (reason == "")), message)
+
+  accepted = members[reason == ""].copy()
+  rejected = members[reason != ""].assign(reason=reason[reason != ""])
+
+  # usernames are not user-facing keys, so clashes are renamed instead of rejected
+  clash = accepted["username"].isin(usernames) | accepted["username"].duplicated(keep="first")
+  suffix = accepted["srcode"].where(accepted["srcode"] != "", pd.Series(accepted.index.astype(str), index=accepted.index))
+  accepted.loc[clash, "username"] = accepted.loc[clash, "username"] + "-" + suffix[clash]
+  return accepted, rejected
+
+def _rows(frame):
+  booleans = {"volunterismExperience", "active"}
+  for record in frame[INSERT_COLUMNS].itertuples(index=False, name=None):
+    yield tuple(
+      convert_boolean_value(bool(value)) if column in booleans
+      # numpy scalars cannot be bound by sqlite3 or psycopg2
+      else (value.item() if hasattr(value, "item") else value)
+      for column, value in zip(INSERT_COLUMNS, record)
+    )
+
+def bulkInsert(accepted, onProgress=None):
+  """Insert in chunks inside one transaction and commit once; nothing is kept if any chunk fails"""
+  columns = ", ".join(INSERT_COLUMNS)
+  conn, cursor = cursorInstance()
+  inserted = 0
+  rows = list(_rows(accepted))
+  try:
+    for start in range(0, len(rows), IMPORT_CHUNK_SIZE):
+      chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+      if is_postgresql:
+        from psycopg2.extras import execute_values
+        execute_values(cursor, f"INSERT INTO membership ({columns}) VALUES %s", chunk, page_size=IMPORT_CHUNK_SIZE)
+      else:
+        placeholders = ", ".join("?" * len(INSERT_COLUMNS))
+        cursor.executemany(f"INSERT INTO membership ({columns}) VALUES ({placeholders})", chunk)
+      inserted += len(chunk)
+      if onProgress:
+        onProgress(inserted)
+    conn.commit()
+  except Exception:
+    conn.rollback()
+    raise
+  finally:
+    conn.close()
+  return inserted
+
+def rejectsCsv(rejected, sheet):
+  """Original spreadsheet rows that were not imported, with the reason first"""
+  report = sheet.loc[rejected.index].copy()
+  report.insert(0, "reason", rejected["reason"])
+  report.insert(0, "row", rejected.index + 2)  # spreadsheet row number, header is row 1
+  buffer = io.StringIO()
+  report.to_csv(buffer, index=False)
+  return buffer.getvalue()
+
+def importFile(path: str, jobId: int = None, dryRun: bool = False):
+  """Run the whole pipeline and return the summary; progress goes to the job row when jobId is set"""
+  try:
+    sheet = readSheet(path)
+    _updateJob(jobId, status="running", total=len(sheet))
+
+    accepted, rejected = validate(prepareFrame(sheet))
+    rejects = rejectsCsv(rejected, sheet) if len(rejected) else None
+    _updateJob(jobId, rejected=len(rejected), rejects=rejects)
+
+    inserted = 0
+    if not dryRun and len(accepted):
+      # on SQLite the job row is locked out by the open import transaction until it commits
+      onProgress = (lambda done: _updateJob(jobId, processed=len(rejected) + done)) if is_postgresql else None
+      inserted = bulkInsert(accepted, onProgress)
+      if FeatureStore.FEATURE_STORE_ENABLED:
+        FeatureStore.refreshAllVolunteers()
+
+    summary = {"total": len(sheet), "inserted": inserted, "rejected": len(rejected), "dryRun": dryRun, "rejects": rejects}
+    _updateJob(jobId, status="done", processed=len(sheet), inserted=inserted)
+    print(f"[MEMBER_IMPORT] {path}: {inserted} inserted, {len(rejected)} rejected of {len(sheet)} rows")
+    return summary
+  except Exception as e:
+    print(f"[MEMBER_IMPORT] Import of {path} failed: {e}")
+    _updateJob(jobId, status="failed", error=str(e))
+    raise
+
+def startImport(path: str, filename: str, dryRun: bool = False, removeAfter: bool = True):
+  """Queue an import in a background thread and return its job id"""
+  jobId = _createJob(filename)
+
+  def run():
+    try:
+      importFile(path, jobId, dryRun)
+    except Exception:
+      pass  # recorded on the job row
+    finally:
+      if removeAfter and os.path.exists(path):
+        os.remove(path)
+
+  threading.Thread(target=run, name=f"member-import-{jobId}", daemon=True).start()
+  return jobId
@@ -0,0 +1,196 @@
+"""
+Versioned on-disk registry for the AnalyticsEngine models.
+
+Layout (relative to MODEL_REGISTRY_PATH, default <backend>/models):
+
+    <name>/<version>/artifact.pkl   joblib dump of {"model", "scaler", "encoders", "features"}
+    <name>/<version>/metadata.json  training metadata (metrics, rows, feature schema hash)
+    <name>/LATEST                   version string of the promoted artifact
+
+Each gunicorn worker keeps the promoted artifact warm in memory and only
+reloads it when the LATEST pointer changes, so predictions never retrain.
+"""
+from datetime import datetime
+from uuid import uuid4
+from dotenv import load_dotenv
+import threading
+import hashlib
+import json
+import os
+import shutil
+import time
+
+load_dotenv()
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODEL_REGISTRY_PATH = os.getenv("MODEL_REGISTRY_PATH") or os.path.join(BACKEND_ROOT, "models")
+MODEL_REGISTRY_KEEP = int(os.getenv("MODEL_REGISTRY_KEEP", 5))
+
+# lock file older than this is considered abandoned by a crashed trainer
+TRAINING_LOCK_STALE_SECS = 30 * 60
+
+_warmCache = {}
+_warmCacheLock = threading.Lock()
+
+
+def featureSchemaHash(featureColumns: list, categoricalColumns: list = []):
+    """Stable hash of the feature layout a model was trained on"""
+    schema = json.dumps({
+        "features": list(featureColumns),
+        "categorical": list(categoricalColumns)
+    }, sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+def _modelDir(name: str):
+    return os.path.join(MODEL_REGISTRY_PATH, name)
+
+
+def _latestPointer(name: str):
+    return os.path.join(_modelDir(name), "LATEST")
+
+
+def getLatestVersion(name: str):
+    try:
+        with open(_latestPointer(name), "r") as pointer:
+            return pointer.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def listVersions(name: str):
+    """Versions of a model, newest first"""
+    modelDir = _modelDir(name)
+    if not os.path.isdir(modelDir):
+        return []
+    versions = [
+        entry for entry in os.listdir(modelDir)
+        if os.path.isfile(os.path.join(modelDir, entry, "metadata.json"))
+    ]
+    return sorted(versions, reverse=True)
+
+
+def getMetadata(name: str, version: str = None):
+    version = version or getLatestVersion(name)
+    if version is None:
+        return None
+    try:
+        with open(os.path.join(_modelDir(name), version, "metadata.json"), "r") as metaFile:
+            return json.load(metaFile)
+    except FileNotFoundError:
+        return None
+
+
+def promote(name: str, version: str):
+    """Atomically point LATEST at the given version"""
+    if not os.path.isdir(os.path.join(_modelDir(name), version)):
+        raise ValueError(f"Model {name} has no version {version}")
+
+    tmpPointer = f"{_latestPointer(name)}.{uuid4().hex}.tmp"
+    with open(tmpPointer, "w") as pointer:
+        pointer.write(version)
+    os.replace(tmpPointer, _latestPointer(name))
+
+
+def saveArtifact(name: str, artifact: dict, metadata: dict, makeLatest: bool = True):
+    """Persist a trained artifact as a new immutable version and return the version string"""
+    import joblib
+
+    version = datetime.now().strftime("%Y%m%d%H%M%S") + "-" + uuid4().hex[:6]
+    versionDir = os.path.join(_modelDir(name), version)
+    os.makedirs(versionDir, exist_ok=True)
+
+    joblib.dump(artifact, os.path.join(versionDir, "artifact.pkl"))
+
+    metadata = dict(metadata)
+    metadata["name"] = name
+    metadata["version"] = version
+    metadata.setdefault("trainedAt", int(datetime.now().timestamp() * 1000))
+    with open(os.path.join(versionDir, "metadata.json"), "w") as metaFile:
+        json.dump(metadata, metaFile, indent=2, default=str)
+
+    if makeLatest:
+        promote(name, version)
+        pruneVersions(name)
+
+    return version
+
+
+def pruneVersions(name: str, keep: int = MODEL_REGISTRY_KEEP):
+    """Delete old versions, never touching the promoted one"""
+    latest = getLatestVersion(name)
+    for version in listVersions(name)[keep:]:
+        if version == latest:
+            continue
+        shutil.rmtree(os.path.join(_modelDir(name), version), ignore_errors=True)
+
+
+def loadArtifact(name: str, version: str = None):
+    """
+    Return (artifact, metadata) for a model, or (None, None) when nothing is registered.
+    The promoted version is cached per process and reloaded only when LATEST changes.
+    """
+    import joblib
+
+    pinned = version is not None
+    version = version or getLatestVersion(name)
+    if version is None:
+        return None, None
+
+    with _warmCacheLock:
+        cached = _warmCache.get(name)
+        if cached and cached[0] == version:
+            return cached[1], cached[2]
+
+    artifactPath = os.path.join(_modelDir(name), version, "artifact.pkl")
+    if not os.path.exists(artifactPath):
+        return None, None
+
+    artifact = joblib.load(artifactPath)
+    metadata = getMetadata(name, version)
+
+    if not pinned:
+        with _warmCacheLock:
+            _warmCache[name] = (version, artifact, metadata)
+
+    return artifact, metadata
+
+
+def clearWarmCache(name: str = None):
+    with _warmCacheLock:
+        if name is None:
+            _warmCache.clear()
+        else:
+            _warmCache.pop(name, None)
+
+
+def acquireTrainingLock():
+    """Cross-process guard so only one worker trains at a time"""
+    os.makedirs(MODEL_REGISTRY_PATH, exist_ok=True)
+    lockPath = os.path.join(MODEL_REGISTRY_PATH, ".training.lock")
+
+    try:
+        if time.time() - os.path.getmtime(lockPath) > TRAINING_LOCK_STALE_SECS:
+            os.remove(lockPath)
+    except OSError:
+        pass
+
+    try:
+        fd = os.open(lockPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+
+    with os.fdopen(fd, "w") as lockFile:
+        lockFile.write(str(os.getpid()))
+    return True
+
+
+def releaseTrainingLock():
+    try:
+        os.remove(os.path.join(MODEL_REGISTRY_PATH, ".training.lock"))
+    except OSError:
+        pass
+
+
+def isTraining():
+    return os.path.exists(os.path.join(MODEL_REGISTRY_PATH, ".training.lock"))
@@ -0,0 +1,168 @@
+"""
+Duplicate-registration guard for requirement submissions.
+
+A member may register once per event. That is enforced by a unique partial
+index on requirements (eventId, type, lower(email)) and checked through the
+same index before the medCert/waiver uploads start, so a duplicate costs one
+indexed lookup instead of two Cloudinary uploads. When two submissions race
+past the early check, the index rejects the second insert.
+
+Retried submissions can carry an idempotency key (form field
+"idempotencyKey" or an Idempotency-Key header). The first successful
+submission records key -> requirementId; a retry with the same key within
+IDEMPOTENCY_KEY_TTL_HOURS gets the stored requirement back instead of an
+"already registered" error.
+
+Registrations that were duplicated before the index existed keep it from
+being created. They are logged at error level on every startup, with the ids
+of each duplicate group, until they are resolved; with
+REGISTRATION_GUARD_STRICT=True the startup fails instead.
+"""
+from datetime import datetime
+from dotenv import load_dotenv
+import logging
+import os
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, DATABASE_URL
+
+load_dotenv()
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+REGISTRATION_GUARD_STRICT = os.getenv("REGISTRATION_GUARD_STRICT", "False") == "True"
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+TABLE = "requirementSubmissions"
+INDEX = "idx_requirements_event_email"
+
+# an email-less submission cannot be matched to a member, so it is never a duplicate
+REGISTERED_EMAIL = "email IS NOT NULL AND email <> ''"
+
+logger = logging.getLogger(__name__)
+
+def nowMs():
+  return int(datetime.now().timestamp() * 1000)
+
+def ensure_table(cursor=None):
+  """Create the idempotency key table and the unique registration index"""
+  ownConnection = cursor is None
+  if ownConnection:
+    conn, cursor = cursorInstance()
+
+  textType = "VARCHAR(255)" if is_postgresql else "STRING"
+  cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {quote_identifier(TABLE)}(
+      idempotencyKey {textType} PRIMARY KEY,
+      requirementId {textType} NOT NULL,
+      createdAt BIGINT NOT NULL
+    )
+  """)
+
+  # existing duplicates would make CREATE UNIQUE INDEX fail (and abort the
+  # PostgreSQL transaction), so they are looked up first
+  duplicates = findDuplicates(cursor)
+  if (len(duplicates) == 0):
+    cursor.execute(f"""
+      CREATE UNIQUE INDEX IF NOT EXISTS {INDEX}
+      ON {quote_identifier("requirements")}(eventId, type, lower(email))
+      WHERE {REGISTERED_EMAIL}
+    """)
+  else:
+    message = (
+      f"{len(duplicates)} event registration(s) are duplicated, so unique index {INDEX} was not created "
+      "and the same email can register for an event twice. Keep one requirement of each group and delete the others: "
+      + "; ".join(
+        f"event {eventId} ({eventType}) {email}: {', '.join(str(id) for id in ids)}"
+        for (eventId, eventType, email), ids in duplicates.items()
+      )
+    )
+    if (REGISTRATION_GUARD_STRICT):
+      raise RuntimeError(message)
+    logger.error(message)
+
+  if ownConnection:
+    conn.commit()
+    conn.close()
+
+def findDuplicates(cursor):
+  """{(eventId, type, email): [requirement ids]} of every email registered twice for an event"""
+  cursor.execute(f"""
+    SELECT r.eventId, r.type, lower(r.email), r.id
+    FROM {quote_identifier("requirements")} r
+    JOIN (
+      SELECT eventId, type, lower(email) AS duplicateEmail FROM {quote_identifier("requirements")}
+      WHERE {REGISTERED_EMAIL}
+      GROUP BY eventId, type, lower(email)
+      HAVING COUNT(*) > 1
+    ) duplicates ON duplicates.eventId = r.eventId AND duplicates.type = r.type AND duplicates.duplicateEmail = lower(r.email)
+    ORDER BY r.eventId, r.type, lower(r.email), r.id
+  """)
+  duplicates = {}
+  for eventId, eventType, email, id in cursor.fetchall():
+    duplicates.setdefault((eventId, eventType, email), []).append(id)
+  return duplicates
+
+def findRegistration(eventId, eventType: str, email: str):
+  """Id of the requirement this email already submitted for the event, or None"""
+  if (email == None or email.strip() == ""):
+    return None
+
+  conn, cursor = cursorInstance()
+  try:
+    # the email condition repeats the index predicate so the partial index is usable
+    cursor.execute(convert_placeholders(f"""
+      SELECT id FROM {quote_identifier("requirements")}
+      WHERE eventId = ? AND type = ? AND lower(email) = lower(?) AND {REGISTERED_EMAIL}
+      LIMIT 1
+    """), (eventId, eventType, email.strip()))
+    row = cursor.fetchone()
+    return row[0] if row != None else None
+  finally:
+    conn.close()
+
+def readIdempotencyKey(request):
+  """The submission's idempotency key, or None if it has none (or an unusable one)"""
+  key = request.headers.get("Idempotency-Key") or request.form.get("idempotencyKey")
+  if (key == None):
+    return None
+  key = key.strip()
+  if (key == "" or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH):
+    return None
+  return key
+
+def findSubmission(idempotencyKey: str):
+  """Requirement id stored for this key, if it has not expired"""
+  if (idempotencyKey == None):
+    return None
+
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT requirementId FROM {quote_identifier(TABLE)}
+      WHERE idempotencyKey = ? AND createdAt >= ?
+    """), (idempotencyKey, nowMs() - int(IDEMPOTENCY_KEY_TTL_HOURS * 3600 * 1000)))
+    row = cursor.fetchone()
+    return row[0] if row != None else None
+  finally:
+    conn.close()
+
+def rememberSubmission(idempotencyKey: str, requirementId):
+  """Record the requirement created for this key and drop expired keys"""
+  if (idempotencyKey == None):
+    return
+
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      DELETE FROM {quote_identifier(TABLE)} WHERE createdAt < ?
+    """), (timeNow - int(IDEMPOTENCY_KEY_TTL_HOURS * 3600 * 1000),))
+    cursor.execute(convert_placeholders(f"""
+      INSERT INTO {quote_identifier(TABLE)} (idempotencyKey, requirementId, createdAt)
+      VALUES (?, ?, ?)
+      ON CONFLICT (idempotencyKey) DO NOTHING
+    """), (idempotencyKey, str(requirementId), timeNow))
+    conn.commit()
+  finally:
+    conn.close()
@@ -0,0 +1,131 @@
+"""
+Set-based attendance and evaluation counts for event reports.
+
+All accepted requirements of an event are joined with their (first) finalized
+evaluation in one query that already groups identical rows. The grouped rows
+are folded into a cross-tab keyed by (affiliation class, sex, criterion,
+rating), from which reports.getReportCalculations builds its response.
+
+Cross-tabs are cached per event in-process. The evaluation and requirements
+controllers call invalidate() when an evaluation is submitted or a volunteer
+is accepted or rejected; REPORT_CACHE_TTL_SECS bounds how long another gunicorn
+worker can serve counts that predate a change it did not see.
+"""
+from collections import Counter
+from dotenv import load_dotenv
+import threading
+import time
+import json
+import os
+
+from ..database.connection import cursorInstance, convert_placeholders, convert_boolean_value
+
+load_dotenv()
+
+REPORT_CACHE_TTL_SECS = float(os.getenv("REPORT_CACHE_TTL_SECS", 60))
+
+RATINGS = {
+  "excellent": "excellent",
+  "very satisfactory": "verySatisfactory",
+  "satisfactory": "satisfactory",
+  "fair": "fair",
+  "poor": "poor",
+}
+CRITERIA = {"overall": "overall", "time": "timeline"}
+
+_cache = {}
+_cacheLock = threading.Lock()
+
+def _parseCriteria(criteria: str):
+  try:
+    parsed = json.loads(criteria)
+    return parsed if isinstance(parsed, dict) else None
+  except:
+    return None
+
+def _fetchGroups(eventId: int, eventType: str):
+  """(affiliationClass, sex, criteria, count) for every attended volunteer, in one query"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders("""
+      SELECT
+        CASE WHEN r.affiliation = 'N/A' THEN 'outsider' ELSE 'insider' END AS affiliationClass,
+        r.sex, ev.criteria, COUNT(*)
+      FROM requirements r
+      JOIN evaluation ev ON ev.id = (
+        SELECT MIN(firstEval.id) FROM evaluation firstEval WHERE firstEval.requirementId = r.id
+      )
+      WHERE r.eventId = ? AND r.type = ? AND r.accepted = ? AND ev.finalized = ?
+      GROUP BY affiliationClass, r.sex, ev.criteria
+    """), (eventId, eventType, convert_boolean_value(1), convert_boolean_value(1)))
+    return cursor.fetchall()
+  finally:
+    conn.close()
+
+def crossTab(eventId: int, eventType: str):
+  """
+  Counter of attended volunteers keyed by (affiliationClass, sex, criterion,
+  rating), plus (affiliationClass, sex, None, None) for the sex totals.
+
+  External events keep the original rules: sex is compared case-insensitively
+  and volunteers with unreadable criteria are left out. Internal events only
+  count an exact "male" as male.
+  """
+  cacheKey = (eventType, int(eventId))
+  with _cacheLock:
+    cached = _cache.get(cacheKey)
+  if (cached != None and time.monotonic() - cached[0] < REPORT_CACHE_TTL_SECS):
+    return cached[1]
+
+  counts = Counter()
+  parsedCriteria = {}
+  for affiliationClass, sex, criteria, total in _fetchGroups(eventId, eventType):
+    if (criteria not in parsedCriteria):
+      parsedCriteria[criteria] = _parseCriteria(criteria)
+    evalCriteria = parsedCriteria[criteria]
+
+    if (eventType == "external"):
+      if (not evalCriteria):
+        continue
+      sexClass = "male" if (sex or "").lower() == "male" else "female"
+    else:
+      sexClass = "male" if sex == "male" else "female"
+
+    counts[(affiliationClass, sexClass, None, None)] += total
+    for criterion, label in CRITERIA.items():
+      rating = RATINGS.get(((evalCriteria or {}).get(criterion) or "").lower())
+      if (rating != None):
+        counts[(affiliationClass, sexClass, label, rating)] += total
+
+  with _cacheLock:
+    _cache[cacheKey] = (time.monotonic(), counts)
+  return counts
+
+def invalidate(eventId: int, eventType: str):
+  with _cacheLock:
+    _cache.pop((eventType, int(eventId)), None)
+
+def invalidateRequirement(requirement: dict):
+  """Drop the cached counts of the event a requirement belongs to"""
+  if (requirement == None or requirement.get("eventId") == None):
+    return
+  try:
+    invalidate(requirement["eventId"], requirement.get("type"))
+  except (TypeError, ValueError):
+    pass
+
+def ratingCounts(counts: Counter, criterion: str, affiliationClasses: list = None, sexes: list = None):
+  """{excellent, verySatisfactory, ...} summed over the given affiliation classes and sexes"""
+  affiliationClasses = affiliationClasses or ["outsider", "insider"]
+  sexes = sexes or ["male", "female"]
+  return {
+    rating: sum(counts[(affiliationClass, sex, criterion, rating)] for affiliationClass in affiliationClasses for sex in sexes)
+    for rating in RATINGS.values()
+  }
+
+def sexCounts(counts: Counter, affiliationClasses: list = None):
+  affiliationClasses = affiliationClasses or ["outsider", "insider"]
+  return {
+    sex: sum(counts[(affiliationClass, sex, None, None)] for affiliationClass in affiliationClasses)
+    for sex in ["male", "female"]
+  }
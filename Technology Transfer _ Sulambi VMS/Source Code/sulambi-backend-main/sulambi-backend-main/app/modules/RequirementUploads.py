@@ -0,0 +1,250 @@
+"""
+Two-phase requirement submissions.
+
+The medCert and waiver files of a submission are copied into a local staging
+store (UPLOAD_STAGING_ROOT, content-addressed like the local blob store) and
+the requirement row is created right away with "pending-upload" in place of
+the file URLs. A "requirement_upload" Scheduler job then pushes the staged
+files to the UPLOAD_BACKEND storage, writes the URLs into the requirement and
+deletes the staged copies. A failed upload is retried by the Scheduler with
+exponential backoff, so the volunteer's request never waits on Cloudinary.
+
+  staged = stagingFileWriter(["medCert", "waiver"], stagingStorage())
+  requirement = RequirementsDb.create(PENDING_UPLOAD, PENDING_UPLOAD, ...)
+  track(requirement["id"], staged)
+
+Every upload is a row in requirementUploads (status pending-upload, uploaded
+or failed, attempts and the last error), which is what getStatus() reports
+through GET /api/requirements/<id>/uploads. An upload that runs out of
+Scheduler attempts, or whose staged file is gone, is failed for good and its
+requirement column is set to "upload-failed". RequirementsModel never returns
+either placeholder as a URL: the column comes back as None with
+<field>Status set to "pending-upload" or "upload-failed".
+
+The staging directory must be shared by every worker that runs the Scheduler,
+and it must survive restarts: on an ephemeral disk (e.g. Render without a
+persistent disk) files staged before a restart are lost and their uploads fail.
+"""
+from datetime import datetime
+from dotenv import load_dotenv
+import os
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, DATABASE_URL
+from ..utils.blobStorage import LocalBlobStorage, getStorage
+from . import Scheduler
+
+load_dotenv()
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+UPLOAD_STAGING = os.getenv("UPLOAD_STAGING", "True") == "True"
+UPLOAD_STAGING_ROOT = os.getenv("UPLOAD_STAGING_ROOT", "staging")
+UPLOAD_BACKEND = os.getenv("UPLOAD_BACKEND", "cloudinary")
+
+PENDING_UPLOAD = "pending-upload"
+UPLOADED = "uploaded"
+FAILED = "failed"
+# stored in the requirement column once an upload has failed for good
+UPLOAD_FAILED = "upload-failed"
+
+TABLE = "requirementUploads"
+JOB_TYPE = "requirement_upload"
+FOLDER = "requirements"
+
+# requirement columns that hold uploaded file URLs
+FILE_FIELDS = ["medCert", "waiver"]
+
+_staging = None
+
+def nowMs():
+  return int(datetime.now().timestamp() * 1000)
+
+def stagingStorage():
+  global _staging
+  if (_staging == None):
+    # never served: staged files stay private until they reach the real storage
+    _staging = LocalBlobStorage(root=UPLOAD_STAGING_ROOT, baseUrl="staging://")
+  return _staging
+
+def ensure_table(cursor=None):
+  """Create the requirementUploads table tracking staged files"""
+  ownConnection = cursor is None
+  if ownConnection:
+    conn, cursor = cursorInstance()
+
+  idColumn = "id SERIAL PRIMARY KEY" if is_postgresql else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+  textType = "VARCHAR(255)" if is_postgresql else "STRING"
+  cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {quote_identifier(TABLE)}(
+      {idColumn},
+      requirementId {textType} NOT NULL,
+      field {textType} NOT NULL,
+      stagedKey TEXT NOT NULL,
+      filename TEXT NOT NULL,
+      status {textType} NOT NULL DEFAULT '{PENDING_UPLOAD}',
+      url TEXT,
+      attempts INTEGER NOT NULL DEFAULT 0,
+      error TEXT,
+      createdAt BIGINT NOT NULL,
+      updatedAt BIGINT NOT NULL
+    )
+  """)
+  cursor.execute(f"""
+    CREATE INDEX IF NOT EXISTS idx_requirement_uploads_requirement
+    ON {quote_identifier(TABLE)}(requirementId)
+  """)
+
+  if ownConnection:
+    conn.commit()
+    conn.close()
+
+def track(requirementId, staged: dict):
+  """Record the staged files of a new requirement and schedule their upload"""
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.executemany(convert_placeholders(f"""
+      INSERT INTO {quote_identifier(TABLE)} (requirementId, field, stagedKey, filename, status, createdAt, updatedAt)
+      VALUES (?, ?, ?, ?, ?, ?, ?)
+    """), [
+      (str(requirementId), field, blob.key, filename, PENDING_UPLOAD, timeNow, timeNow)
+      for field, (blob, filename) in staged.items()
+    ])
+    conn.commit()
+  finally:
+    conn.close()
+
+  Scheduler.schedule(JOB_TYPE, { "requirementId": str(requirementId) }, dedupeKey=f"{JOB_TYPE}:{requirementId}")
+
+def discard(staged: dict):
+  """Delete staged files of a submission that was not saved"""
+  storage = stagingStorage()
+  for blob, _ in staged.values():
+    if (blob.created and not _isReferenced(blob.key)):
+      try:
+        storage.delete(blob.key)
+      except OSError as e:
+        print(f"[UPLOAD_STAGING] Could not delete staged file {blob.key}: {e}")
+
+def _isReferenced(stagedKey: str):
+  """Whether a pending upload still needs this staged file (identical files share one)"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT 1 FROM {quote_identifier(TABLE)} WHERE stagedKey = ? AND status = ? LIMIT 1
+    """), (stagedKey, PENDING_UPLOAD))
+    return cursor.fetchone() != None
+  finally:
+    conn.close()
+
+def _pendingUploads(requirementId: str):
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT id, field, stagedKey, filename, attempts FROM {quote_identifier(TABLE)}
+      WHERE requirementId = ? AND status = ?
+      ORDER BY id
+    """), (requirementId, PENDING_UPLOAD))
+    return cursor.fetchall()
+  finally:
+    conn.close()
+
+def _markUploaded(uploadId: int, requirementId: str, field: str, url: str):
+  """Store the URL on the requirement and close the upload, in one transaction"""
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier("requirements")} SET {field} = ? WHERE id = ?
+    """), (url, requirementId))
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier(TABLE)} SET status = ?, url = ?, error = NULL, updatedAt = ? WHERE id = ?
+    """), (UPLOADED, url, timeNow, uploadId))
+    conn.commit()
+  finally:
+    conn.close()
+
+def _markAttempt(requirementId: str, uploads: list, error: str, terminal: bool = False):
+  """
+  Count a failed attempt of (uploadId, field, attempts) uploads. Uploads out of
+  Scheduler retries, or terminal failures, are marked failed on both tables.
+  """
+  timeNow = nowMs()
+  failedFields = []
+  rows = []
+  for uploadId, field, attempts in uploads:
+    failed = terminal or attempts + 1 >= Scheduler.SCHEDULER_MAX_ATTEMPTS
+    if failed:
+      failedFields.append(field)
+    rows.append((attempts + 1, error, FAILED if failed else PENDING_UPLOAD, timeNow, uploadId))
+
+  conn, cursor = cursorInstance()
+  try:
+    cursor.executemany(convert_placeholders(f"""
+      UPDATE {quote_identifier(TABLE)} SET attempts = ?, error = ?, status = ?, updatedAt = ? WHERE id = ?
+    """), rows)
+    for field in failedFields:
+      if (field not in FILE_FIELDS):
+        continue
+      cursor.execute(convert_placeholders(f"""
+        UPDATE {quote_identifier("requirements")} SET {field} = ? WHERE id = ?
+      """), (UPLOAD_FAILED, requirementId))
+    conn.commit()
+  finally:
+    conn.close()
+
+  for field in failedFields:
+    print(f"[UPLOAD_STAGING] ❌ Upload of {field} for requirement {requirementId} failed for good: {error}")
+
+@Scheduler.jobHandler(JOB_TYPE)
+def finalize(payload: dict):
+  """Push the staged files of one requirement to the upload backend"""
+  requirementId = str(payload["requirementId"])
+  pending = _pendingUploads(requirementId)
+  if (len(pending) == 0):
+    return
+
+  staging = stagingStorage()
+  storage = getStorage(UPLOAD_BACKEND)
+  finished = []
+  try:
+    storage.configure()
+    for uploadId, field, stagedKey, filename, _ in pending:
+      if (field not in FILE_FIELDS):
+        raise ValueError(f"Unexpected upload field '{field}'")
+      with staging.open(stagedKey) as stream:
+        blob = storage.put(stream, filename, FOLDER)
+
+      _markUploaded(uploadId, requirementId, field, blob.url)
+      finished.append(uploadId)
+      print(f"[UPLOAD_STAGING] ✅ Uploaded {field} of requirement {requirementId}")
+  except FileNotFoundError as e:
+    # the staged copy is gone (e.g. lost with the disk on a restart), retrying cannot help
+    _markAttempt(requirementId, [(row[0], row[1], row[4]) for row in pending if row[0] not in finished], f"Staged file missing: {e}", terminal=True)
+  except Exception as e:
+    _markAttempt(requirementId, [(row[0], row[1], row[4]) for row in pending if row[0] not in finished], str(e) or type(e).__name__)
+    raise
+  finally:
+    # staged copies are only needed until their last pending upload is done
+    for uploadId, _, stagedKey, _, _ in pending:
+      if (uploadId in finished and not _isReferenced(stagedKey)):
+        try:
+          staging.delete(stagedKey)
+        except OSError as e:
+          print(f"[UPLOAD_STAGING] Could not delete staged file {stagedKey}: {e}")
+
+def getStatus(requirementId):
+  """Upload state of every file of a requirement"""
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT field, filename, status, url, attempts, error, updatedAt FROM {quote_identifier(TABLE)}
+      WHERE requirementId = ?
+      ORDER BY id
+    """), (str(requirementId),))
+    return [
+      { "field": row[0], "filename": row[1], "status": row[2], "url": row[3], "attempts": row[4], "error": row[5], "updatedAt": row[6] }
+      for row in cursor.fetchall()
+    ]
+  finally:
+    conn.close()
@@ -0,0 +1,320 @@
+"""
+Durable job scheduler backed by the scheduled_jobs table.
+
+Jobs survive restarts and Render spin-downs: they are rows with a due time
+(runAt, epoch ms), a JSON payload and a registered handler name. Every process
+runs one dispatcher thread that keeps the upcoming jobs in a min-heap, sleeps
+until the earliest one is due and claims it with a lease so only one gunicorn
+worker ever runs it. Failed jobs are retried with exponential backoff, and jobs
+that came due while the process was down are picked up on the first poll.
+
+  @jobHandler("evaluation_mail")
+  def sendEvaluation(payload): ...
+
+  schedule("evaluation_mail", {"requirementId": "..."}, runAt=targetEpochMs)
+"""
+from datetime import datetime
+from dotenv import load_dotenv
+from uuid import uuid4
+import threading
+import heapq
+import json
+import os
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, DATABASE_URL
+
+load_dotenv()
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "True") == "True"
+SCHEDULER_POLL_SECS = float(os.getenv("SCHEDULER_POLL_SECS", 30))
+SCHEDULER_LEASE_SECS = int(os.getenv("SCHEDULER_LEASE_SECS", 300))
+SCHEDULER_MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", 5))
+SCHEDULER_BACKOFF_SECS = int(os.getenv("SCHEDULER_BACKOFF_SECS", 60))
+SCHEDULER_BACKOFF_MAX_SECS = 6 * 60 * 60
+
+# jobs due within this window are kept in the in-memory heap
+SCHEDULER_HORIZON_SECS = max(SCHEDULER_POLL_SECS * 2, 60)
+
+TABLE = "scheduled_jobs"
+
+_handlers = {}
+_heap = []
+_queued = set()
+_wakeup = threading.Condition()
+_dispatcher = None
+_workerId = f"{os.getpid()}-{uuid4().hex[:8]}"
+
+def nowMs():
+  return int(datetime.now().timestamp() * 1000)
+
+def ensure_table(cursor=None):
+  """Create the scheduled_jobs table and its due-time index"""
+  ownConnection = cursor is None
+  if ownConnection:
+    conn, cursor = cursorInstance()
+
+  idColumn = "id SERIAL PRIMARY KEY" if is_postgresql else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+  textType = "VARCHAR(255)" if is_postgresql else "STRING"
+  cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS {quote_identifier(TABLE)}(
+      {idColumn},
+      jobType {textType} NOT NULL,
+      payload TEXT NOT NULL DEFAULT '{{}}',
+      dedupeKey {textType} UNIQUE,
+      runAt BIGINT NOT NULL,
+      status {textType} NOT NULL DEFAULT 'pending',
+      attempts INTEGER NOT NULL DEFAULT 0,
+      maxAttempts INTEGER NOT NULL DEFAULT {SCHEDULER_MAX_ATTEMPTS},
+      leaseOwner {textType},
+      leaseUntil BIGINT,
+      lastError TEXT,
+      createdAt BIGINT NOT NULL,
+      updatedAt BIGINT NOT NULL
+    )
+  """)
+  cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON {quote_identifier(TABLE)}(status, runAt)")
+
+  if ownConnection:
+    conn.commit()
+    conn.close()
+
+def jobHandler(jobType: str):
+  """Decorator registering the function that runs jobs of the given type"""
+  def register(callback):
+    _handlers[jobType] = callback
+    return callback
+  return register
+
+def _upsertQuery():
+  return f"""
+    INSERT INTO {quote_identifier(TABLE)}
+      (jobType, payload, dedupeKey, runAt, status, attempts, maxAttempts, createdAt, updatedAt)
+    VALUES (?, ?, ?, ?, 'pending', 0, ?, ?, ?)
+    ON CONFLICT (dedupeKey) DO UPDATE SET
+      jobType = excluded.jobType, payload = excluded.payload, runAt = excluded.runAt,
+      status = 'pending', attempts = 0, maxAttempts = excluded.maxAttempts,
+      leaseOwner = NULL, leaseUntil = NULL, lastError = NULL, updatedAt = excluded.updatedAt
+    WHERE {quote_identifier(TABLE)}.status <> 'running'
+  """
+
+def schedule(jobType: str, payload: dict, runAt: int = None, dedupeKey: str = None, maxAttempts: int = SCHEDULER_MAX_ATTEMPTS):
+  """
+  Persist a job due at runAt (epoch ms, default now) and return its id.
+  Scheduling again with the same dedupeKey reschedules the existing job instead
+  of adding a second one; a cancelled, done or failed job is reset to pending
+  with fresh attempts. A job that is running right now is left alone.
+  """
+  runAt = int(runAt or nowMs())
+  timeNow = nowMs()
+
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(_upsertQuery()), (
+      jobType, json.dumps(payload), dedupeKey, runAt, maxAttempts, timeNow, timeNow
+    ))
+
+    if (dedupeKey is not None):
+      cursor.execute(convert_placeholders(f"SELECT id FROM {quote_identifier(TABLE)} WHERE dedupeKey = ?"), (dedupeKey,))
+      jobId = cursor.fetchone()[0]
+    elif is_postgresql:
+      cursor.execute("SELECT lastval()")
+      jobId = cursor.fetchone()[0]
+    else:
+      jobId = cursor.lastrowid
+    conn.commit()
+  finally:
+    conn.close()
+
+  _enqueue(jobId, runAt)
+  return jobId
+
+def scheduleMany(jobType: str, jobs: list, maxAttempts: int = SCHEDULER_MAX_ATTEMPTS):
+  """
+  Persist many (payload, runAt, dedupeKey) jobs of one type in one statement.
+  Every job needs a dedupeKey, which is how their ids are read back.
+  """
+  if (len(jobs) == 0):
+    return []
+  timeNow = nowMs()
+  rows = [
+    (jobType, json.dumps(payload), dedupeKey, int(runAt or timeNow), maxAttempts, timeNow, timeNow)
+    for payload, runAt, dedupeKey in jobs
+  ]
+
+  conn, cursor = cursorInstance()
+  try:
+    cursor.executemany(convert_placeholders(_upsertQuery()), rows)
+    dedupeKeys = [row[2] for row in rows]
+    cursor.execute(convert_placeholders(f"""
+      SELECT id, runAt FROM {quote_identifier(TABLE)}
+      WHERE status = 'pending' AND dedupeKey IN ({", ".join("?" * len(dedupeKeys))})
+    """), tuple(dedupeKeys))
+    scheduled = cursor.fetchall()
+    conn.commit()
+  finally:
+    conn.close()
+
+  for jobId, runAt in scheduled:
+    _enqueue(jobId, runAt)
+  return [jobId for jobId, _ in scheduled]
+
+def cancel(dedupeKey: str):
+  """Drop a pending job by its dedupe key"""
+  return cancelMany([dedupeKey]) > 0
+
+def cancelMany(dedupeKeys: list):
+  """Drop the pending jobs of many dedupe keys in one statement, returns how many were dropped"""
+  if (len(dedupeKeys) == 0):
+    return 0
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier(TABLE)} SET status = 'cancelled', updatedAt = ?
+      WHERE status = 'pending' AND dedupeKey IN ({", ".join("?" * len(dedupeKeys))})
+    """), (nowMs(), *dedupeKeys))
+    conn.commit()
+    return cursor.rowcount
+  finally:
+    conn.close()
+
+def _enqueue(jobId: int, runAt: int):
+  if (runAt > nowMs() + SCHEDULER_HORIZON_SECS * 1000):
+    return
+  # a rescheduled job may leave a stale heap entry behind, claiming it is a no-op
+  with _wakeup:
+    _queued.add(jobId)
+    heapq.heappush(_heap, (runAt, jobId))
+    _wakeup.notify()
+
+def _loadUpcoming():
+  """Fill the heap with pending jobs (and expired leases) due within the horizon"""
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT id, runAt FROM {quote_identifier(TABLE)}
+      WHERE (status = 'pending' AND runAt <= ?)
+         OR (status = 'running' AND leaseUntil < ?)
+      ORDER BY runAt
+    """), (timeNow + int(SCHEDULER_HORIZON_SECS * 1000), timeNow))
+    rows = cursor.fetchall()
+  finally:
+    conn.close()
+
+  with _wakeup:
+    for jobId, runAt in rows:
+      if (jobId not in _queued):
+        _queued.add(jobId)
+        heapq.heappush(_heap, (runAt, jobId))
+
+def _claim(jobId: int):
+  """Lease a due job for this worker, returns the row or None if another worker has it"""
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier(TABLE)}
+      SET status = 'running', leaseOwner = ?, leaseUntil = ?, attempts = attempts + 1, updatedAt = ?
+      WHERE id = ? AND runAt <= ?
+        AND (status = 'pending' OR (status = 'running' AND leaseUntil < ?))
+    """), (_workerId, timeNow + SCHEDULER_LEASE_SECS * 1000, timeNow, jobId, timeNow, timeNow))
+    claimed = cursor.rowcount == 1
+    conn.commit()
+    if not claimed:
+      return None
+
+    cursor.execute(convert_placeholders(f"""
+      SELECT jobType, payload, attempts, maxAttempts FROM {quote_identifier(TABLE)} WHERE id = ?
+    """), (jobId,))
+    return cursor.fetchone()
+  finally:
+    conn.close()
+
+def _finish(jobId: int, error: str = None, attempts: int = 0, maxAttempts: int = 0):
+  timeNow = nowMs()
+  conn, cursor = cursorInstance()
+  try:
+    if (error == None):
+      cursor.execute(convert_placeholders(f"""
+        UPDATE {quote_identifier(TABLE)} SET status = 'done', leaseOwner = NULL, leaseUntil = NULL, lastError = NULL, updatedAt = ?
+        WHERE id = ? AND leaseOwner = ?
+      """), (timeNow, jobId, _workerId))
+      retryAt = None
+    elif (attempts >= maxAttempts):
+      cursor.execute(convert_placeholders(f"""
+        UPDATE {quote_identifier(TABLE)} SET status = 'failed', leaseOwner = NULL, leaseUntil = NULL, lastError = ?, updatedAt = ?
+        WHERE id = ? AND leaseOwner = ?
+      """), (error, timeNow, jobId, _workerId))
+      retryAt = None
+    else:
+      backoffSecs = min(SCHEDULER_BACKOFF_SECS * (2 ** (attempts - 1)), SCHEDULER_BACKOFF_MAX_SECS)
+      retryAt = timeNow + backoffSecs * 1000
+      cursor.execute(convert_placeholders(f"""
+        UPDATE {quote_identifier(TABLE)} SET status = 'pending', runAt = ?, leaseOwner = NULL, leaseUntil = NULL, lastError = ?, updatedAt = ?
+        WHERE id = ? AND leaseOwner = ?
+      """), (retryAt, error, timeNow, jobId, _workerId))
+    conn.commit()
+  finally:
+    conn.close()
+
+  if (retryAt != None):
+    _enqueue(jobId, retryAt)
+
+def _runJob(jobId: int):
+  row = _claim(jobId)
+  if (row == None):
+    return
+
+  jobType, payload, attempts, maxAttempts = row
+  handler = _handlers.get(jobType)
+  try:
+    if (handler == None):
+      raise LookupError(f"No handler registered for job type '{jobType}'")
+    handler(json.loads(payload or "{}"))
+    _finish(jobId)
+    print(f"[SCHEDULER] Job {jobId} ({jobType}) done")
+  except Exception as e:
+    print(f"[SCHEDULER] Job {jobId} ({jobType}) failed on attempt {attempts}/{maxAttempts}: {e}")
+    _finish(jobId, str(e) or type(e).__name__, attempts, maxAttempts)
+
+def _dispatchLoop():
+  nextPoll = 0
+  while True:
+    try:
+      if (nowMs() >= nextPoll):
+        _loadUpcoming()
+        nextPoll = nowMs() + int(SCHEDULER_POLL_SECS * 1000)
+
+      dueJob = None
+      with _wakeup:
+        if (len(_heap) > 0 and _heap[0][0] <= nowMs()):
+          _, dueJob = heapq.heappop(_heap)
+          _queued.discard(dueJob)
+        else:
+          nextDue = _heap[0][0] if len(_heap) > 0 else nextPoll
+          _wakeup.wait(timeout=max(0, min(nextDue, nextPoll) - nowMs()) / 1000)
+
+      if (dueJob != None):
+        _runJob(dueJob)
+    except Exception as e:
+      print(f"[SCHEDULER] Dispatcher error: {e}")
+      with _wakeup:
+        _wakeup.wait(timeout=SCHEDULER_POLL_SECS)
+      nextPoll = 0
+
+def start():
+  """Start this process' dispatcher thread (idempotent)"""
+  global _dispatcher
+  if not SCHEDULER_ENABLED or (_dispatcher != None and _dispatcher.is_alive()):
+    return _dispatcher
+
+  try:
+    ensure_table()
+  except Exception as e:
+    print(f"[SCHEDULER] Could not ensure {TABLE} table: {e}")
+
+  _dispatcher = threading.Thread(target=_dispatchLoop, name="scheduler-dispatcher", daemon=True)
+  _dispatcher.start()
+  return _dispatcher
@@ -0,0 +1,83 @@
+"""
+Compiled email templates.
+
+Templates in templates/ use [placeholder] markers. Each file is read once and
+split into literal chunks and placeholder slots; rendering is a single join of
+those chunks with the HTML-escaped values. With TEMPLATE_HOT_RELOAD (defaults to
+DEBUG) the file's mtime is checked on every render and the template recompiled
+when it changes.
+
+  render("we-are-pleased-to-inform-requirements.html", name="Juan", event="Tree Planting")
+  renderMany("evaluation-mail-template.html", [{"name": ...}, {"name": ...}])
+"""
+from dotenv import load_dotenv
+import threading
+import html
+import os
+import re
+
+load_dotenv()
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TEMPLATES_DIR = os.getenv("TEMPLATES_DIR") or os.path.join(BACKEND_ROOT, "templates")
+TEMPLATE_HOT_RELOAD = os.getenv("TEMPLATE_HOT_RELOAD", os.getenv("DEBUG", "False")) == "True"
+
+PLACEHOLDER_PATTERN = re.compile(r"\[([a-z][a-z0-9_-]*)\]")
+
+_cache = {}
+_cacheLock = threading.Lock()
+
+class CompiledTemplate:
+  def __init__(self, source: str, mtime: float = None):
+    self.mtime = mtime
+    # even indexes are literal text, odd indexes are placeholder names
+    self.parts = PLACEHOLDER_PATTERN.split(source)
+    self.placeholders = set(self.parts[1::2])
+
+  def render(self, values: dict):
+    rendered = []
+    for index, part in enumerate(self.parts):
+      if (index % 2 == 0):
+        rendered.append(part)
+      elif (part in values):
+        value = values[part]
+        rendered.append(html.escape("" if value == None else str(value), quote=True))
+      else:
+        # unknown placeholders are left untouched
+        rendered.append(f"[{part}]")
+    return "".join(rendered)
+
+def _templatePath(name: str):
+  return os.path.join(TEMPLATES_DIR, name)
+
+def getTemplate(name: str):
+  """Compiled template for a file in TEMPLATES_DIR, raises FileNotFoundError if missing"""
+  cached = _cache.get(name)
+  if (cached != None and not TEMPLATE_HOT_RELOAD):
+    return cached
+
+  path = _templatePath(name)
+  mtime = os.path.getmtime(path)
+  if (cached != None and cached.mtime == mtime):
+    return cached
+
+  with open(path, "r", encoding="utf-8") as templateFile:
+    compiled = CompiledTemplate(templateFile.read(), mtime)
+
+  with _cacheLock:
+    _cache[name] = compiled
+  return compiled
+
+def render(name: str, values: dict = None, /, **kwargs):
+  # positional-only, so templates can use [name] and [values] placeholders as keywords
+  values = dict(values or {}, **kwargs)
+  return getTemplate(name).render(values)
+
+def renderMany(name: str, valuesList: list):
+  """Render one template for many recipients, compiling (and stat-ing) it once"""
+  template = getTemplate(name)
+  return [template.render(values) for values in valuesList]
+
+def clearCache():
+  with _cacheLock:
+    _cache.clear()
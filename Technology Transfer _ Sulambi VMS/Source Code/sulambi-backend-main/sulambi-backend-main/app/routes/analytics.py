@@ -7,8 +7,13 @@ from ..controllers.analytics import (
     getEventSatisfactionAnalytics,
     seedDemoEvaluations,
     clearAnalyticsData,
-    deleteDummyVolunteersData
+    deleteDummyVolunteersData,
+    getEventSuccessPredictions,
+    getVolunteerDropoutPredictions,
+    getModelRegistryStatus,
+    triggerModelTraining
 )
+from ..middlewares import tokenCheck
 from ..tools.rebuild_semester_satisfaction import rebuild as rebuild_semester_satisfaction
 from ..controllers.participation import (
     getVolunteerParticipationHistory,
@@ -41,6 +46,39 @@ def insightsRoute():
     result = getPredictiveInsights()
     return result, 200 if result.get("success") else 500
 
+@AnalyticsBlueprint.route("/analytics/predictions/event-success", methods=["GET"])
+def eventSuccessPredictionsRoute():
+    """Batch event success probabilities from the registered model"""
+    result = getEventSuccessPredictions()
+    if result.get("warming"):
+        return result, 503, { "Retry-After": "30" }
+    return result, 200 if result.get("success") else 500
+
+@AnalyticsBlueprint.route("/analytics/predictions/volunteer-dropout", methods=["GET"])
+def volunteerDropoutPredictionsRoute():
+    """Batch volunteer dropout probabilities from the registered model"""
+    result = getVolunteerDropoutPredictions()
+    if result.get("warming"):
+        return result, 503, { "Retry-After": "30" }
+    return result, 200 if result.get("success") else 500
+
+@AnalyticsBlueprint.route("/analytics/models", methods=["GET"])
+def modelRegistryRoute():
+    """Registered model versions and training metadata"""
+    result = getModelRegistryStatus()
+    return result, 200 if result.get("success") else 500
+
+@AnalyticsBlueprint.route("/analytics/models/train", methods=["POST"])
+def trainModelsRoute():
+    """Admin: retrain models in a background process"""
+    userCheck = tokenCheck.authCheckMiddleware(["admin"])
+    if (userCheck != None):
+        return userCheck
+
+    body = request.get_json(silent=True) or {}
+    result = triggerModelTraining(body.get("models"))
+    return result, 202 if result.get("success") else 400
+
 @AnalyticsBlueprint.route("/analytics/satisfaction/rebuild", methods=["POST", "OPTIONS"])
 def rebuildSatisfactionRoute():
     """Admin: rebuild semester_satisfaction from evaluations"""
@@ -1,7 +1,7 @@
 from flask import Blueprint, request
 from ..middlewares import tokenCheck
 from ..middlewares.requiredParams import evaluationParams
-from ..controllers import evaluation
+from ..controllers import evaluation, exports
 
 EvaluationBlueprint = Blueprint('evaluation', __name__, url_prefix="/evaluation")
 
@@ -9,6 +9,10 @@ EvaluationBlueprint = Blueprint('evaluation', __name__, url_prefix="/evaluation"
 def getAllEvaluationRoute():
   return evaluation.getAllEvaluation()
 
+@EvaluationBlueprint.get("/export")
+def exportEvaluationRoute():
+  return exports.exportDataset("evaluations")
+
 @EvaluationBlueprint.get("/personal")
 def getPersonalEvaluationRoute():
   return evaluation.getPersonalEvaluationStatus()
@@ -25,6 +29,10 @@ def getInternalEventEvaluationsRoute(id):
 def getEvaluatable(requirementId):
   return evaluation.isEvaluatable(requirementId)
 
+@EvaluationBlueprint.post("/batch")
+def createEvaluationBatch():
+  return evaluation.evaluateBatch()
+
 @EvaluationBlueprint.post("/<requirementId>")
 def createEvaluation(requirementId):
   return evaluation.evaluateByRequirement(requirementId)
@@ -43,6 +51,11 @@ def evaluationMiddleware():
       if (userCheck != None):
         return userCheck
 
+    if (request.path in ['/api/evaluation/export', '/api/evaluation/batch']):
+      userCheck = tokenCheck.authCheckMiddleware(["admin", "officer"])
+      if (userCheck != None):
+        return userCheck
+
     if (request.method not in ["GET", "DELETE", "PATCH"]):
       # Skip param check for beneficiary endpoint (public submission)
       if "/api/evaluation/beneficiary" in request.path:
@@ -0,0 +1,24 @@
+from flask import Blueprint, request
+from ..middlewares import tokenCheck
+from ..controllers import mail
+
+MailBlueprint = Blueprint('mail', __name__, url_prefix="/mail")
+
+@MailBlueprint.get("/outbox")
+def getOutboxSummaryRoute():
+  return mail.getOutboxSummary()
+
+@MailBlueprint.get("/outbox/<int:id>")
+def getOutboxMailRoute(id):
+  return mail.getOutboxMail(id)
+
+@MailBlueprint.post("/outbox/<int:id>/requeue")
+def requeueOutboxMailRoute(id):
+  return mail.requeueOutboxMail(id)
+
+@MailBlueprint.before_request
+def mailMiddleware():
+  if (request.method != "OPTIONS"):
+    userCheck = tokenCheck.authCheckMiddleware(["admin"])
+    if (userCheck != None):
+      return userCheck
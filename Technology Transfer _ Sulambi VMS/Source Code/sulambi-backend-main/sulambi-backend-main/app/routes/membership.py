@@ -1,5 +1,5 @@
-from flask import Blueprint
-from ..controllers import membership
+from flask import Blueprint, request
+from ..controllers import membership, exports
 from ..middlewares import tokenCheck
 
 MembershipBlueprint = Blueprint('membership', __name__, url_prefix="/membership")
@@ -8,6 +8,30 @@ MembershipBlueprint = Blueprint('membership', __name__, url_prefix="/membership"
 def getAllMembershipRoute():
   return membership.getAllMembership()
 
+@MembershipBlueprint.get("/export")
+def exportMembershipRoute():
+  return exports.exportDataset("members")
+
+@MembershipBlueprint.post("/import")
+def importMembershipRoute():
+  return membership.importMembership()
+
+@MembershipBlueprint.get("/import/<int:id>")
+def getImportStatusRoute(id):
+  return membership.getImportStatus(id)
+
+@MembershipBlueprint.get("/import/<int:id>/rejects")
+def getImportRejectsRoute(id):
+  return membership.getImportRejects(id)
+
+@MembershipBlueprint.patch("/approve")
+def approveMembershipBulk():
+  return membership.approveMembershipBulk()
+
+@MembershipBlueprint.patch("/reject")
+def rejectMembershipBulk():
+  return membership.rejectMembershipBulk()
+
 @MembershipBlueprint.patch("/approve/<membershipRequestId>")
 def approveMembership(membershipRequestId):
   return membership.approveMembership(membershipRequestId)
@@ -23,3 +47,16 @@ def activateMembership(membershipRequestId):
 @MembershipBlueprint.patch("/deactivate/<membershipRequestId>")
 def deactivateMembership(membershipRequestId):
   return membership.deactivateMembership(membershipRequestId)
+
+@MembershipBlueprint.before_request
+def membershipMiddleware():
+  if (request.method != "OPTIONS"):
+    if (request.path in ["/api/membership/export", "/api/membership/approve", "/api/membership/reject"]):
+      userCheck = tokenCheck.authCheckMiddleware(["admin", "officer"])
+      if (userCheck != None):
+        return userCheck
+
+    if (request.path.startswith("/api/membership/import")):
+      userCheck = tokenCheck.authCheckMiddleware(["admin"])
+      if (userCheck != None):
+        return userCheck
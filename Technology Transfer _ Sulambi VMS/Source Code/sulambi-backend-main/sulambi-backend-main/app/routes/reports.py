@@ -1,5 +1,6 @@
 from flask import Blueprint, request
-from ..controllers import reports
+from ..controllers import reports, exports
+from ..middlewares import tokenCheck
 from ..middlewares.requiredParams import reportsParams
 
 ReportsBlueprint = Blueprint('reports', __name__, url_prefix="/reports")
@@ -8,6 +9,10 @@ ReportsBlueprint = Blueprint('reports', __name__, url_prefix="/reports")
 def getAllReportDetails():
   return reports.getAllReports()
 
+@ReportsBlueprint.get("/export")
+def exportReportsRoute():
+  return exports.exportDataset("reports")
+
 @ReportsBlueprint.get("/analytics/external/<eventId>")
 def getExternalReportDetails(eventId):
   return reports.getReportCalculations(eventId, "external")
@@ -43,6 +48,11 @@ def deleteInternalReportRoute(reportId):
 @ReportsBlueprint.before_request
 def reportsMiddleware():
   if (request.method != "OPTIONS"):
+    if (request.path == "/api/reports/export"):
+      userCheck = tokenCheck.authCheckMiddleware(["admin", "officer"])
+      if (userCheck != None):
+        return userCheck
+
     if (request.method not in ["GET", "DELETE", "PATCH", "PUT"]):
       missingParams = None
 
@@ -1,6 +1,6 @@
 from flask import Blueprint, request
 from ..middlewares import tokenCheck
-from ..controllers import requirements
+from ..controllers import requirements, exports
 from ..middlewares.requiredParams import requirementsParams
 
 RequirementsBlueprint = Blueprint('requirements', __name__, url_prefix="/requirements")
@@ -9,10 +9,26 @@ RequirementsBlueprint = Blueprint('requirements', __name__, url_prefix="/require
 def getAllRequirementsRoute():
   return requirements.getAllRequirements()
 
+@RequirementsBlueprint.get("/export")
+def exportRequirementsRoute():
+  return exports.exportDataset("requirements")
+
+@RequirementsBlueprint.get("/<requirementId>/uploads")
+def getRequirementUploadsRoute(requirementId):
+  return requirements.getRequirementUploads(requirementId)
+
 @RequirementsBlueprint.post("/<eventId>")
 def uploadRequirementsRoute(eventId):
   return requirements.createNewRequirement(eventId)
 
+@RequirementsBlueprint.patch("/accept")
+def acceptRequirementsBulkRoute():
+  return requirements.acceptRequirementsBulk()
+
+@RequirementsBlueprint.patch("/reject")
+def rejectRequirementsBulkRoute():
+  return requirements.rejectRequirementsBulk()
+
 @RequirementsBlueprint.patch("/accept/<requirementId>")
 def acceptRequirementsRoute(requirementId):
   return requirements.acceptRequirements(requirementId)
@@ -24,8 +40,8 @@ def rejectRequirementsRoute(requirementId):
 @RequirementsBlueprint.before_request
 def requirementsMiddleware():
   if (request.method != "OPTIONS"):
-    # Add authentication check for GET requests (viewing requirements)
-    if (request.method == "GET"):
+    # Add authentication check for GET requests (viewing requirements) and bulk decisions
+    if (request.method == "GET" or request.path in ["/api/requirements/accept", "/api/requirements/reject"]):
       userCheck = tokenCheck.authCheckMiddleware(["admin", "officer"])
       if (userCheck != None):
         return userCheck
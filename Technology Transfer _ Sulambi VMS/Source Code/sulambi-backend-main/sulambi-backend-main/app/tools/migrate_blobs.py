@@ -0,0 +1,91 @@
+"""
+Stream uploaded files from one blob storage backend to another and point the
+database at the new copies.
+
+  python -m app.tools.migrate_blobs --from local --to cloudinary
+  python -m app.tools.migrate_blobs --from local --source-root uploads --to local   # legacy uuid files into the content-addressed store
+  python -m app.tools.migrate_blobs --from cloudinary --folder requirements --to local --dry-run
+"""
+import argparse
+import json
+from datetime import datetime
+from dotenv import load_dotenv
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from ..utils.blobStorage import getStorage, copyBlobs, LocalBlobStorage
+
+load_dotenv()
+
+# columns that hold upload URLs or paths (report photos are comma separated)
+REFERENCE_COLUMNS = [
+  ("requirements", "medCert"),
+  ("requirements", "waiver"),
+  ("internalReport", "photos"),
+  ("externalReport", "photos"),
+]
+
+
+def rewrite_references(cursor, oldReference: str, newReference: str):
+  updated = 0
+  for table, column in REFERENCE_COLUMNS:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier(table)} SET {column} = REPLACE({column}, ?, ?)
+      WHERE {column} LIKE ?
+    """), (oldReference, newReference, f"%{oldReference}%"))
+    updated += cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+  return updated
+
+
+def migrate(sourceName: str, targetName: str, folder: str = None, sourceRoot: str = None,
+            dryRun: bool = False, mappingFile: str = None):
+  source = LocalBlobStorage(root=sourceRoot) if (sourceName == "local" and sourceRoot) else getStorage(sourceName)
+  target = getStorage(targetName)
+
+  mapping = {}
+  copied = 0
+  updatedRows = 0
+
+  conn, cursor = cursorInstance()
+  try:
+    keys = list(source.iterKeys(folder))
+    print(f"[MIGRATE_BLOBS] {len(keys)} blobs to copy from {sourceName} to {targetName}")
+
+    if dryRun:
+      for key in keys:
+        print(f"[MIGRATE_BLOBS] would copy {key}")
+      return {"copied": 0, "updatedRows": 0, "mapping": {}}
+
+    for key, stored in copyBlobs(source, target, folder, keys):
+      copied += 1
+      for reference in source.references(key):
+        # keep the reference style: URLs stay URLs, relative upload paths stay paths when the target has one
+        isUrl = reference.startswith(("http://", "https://"))
+        newReference = stored.url if (isUrl or stored.path == None) else stored.path.replace("\\", "/")
+        if reference != newReference:
+          mapping[reference] = newReference
+          updatedRows += rewrite_references(cursor, reference, newReference)
+      # commit per blob so an interrupted run can simply be restarted
+      conn.commit()
+      print(f"[MIGRATE_BLOBS] {key} -> {stored.key}{'' if stored.created else ' (deduped)'}")
+  finally:
+    conn.close()
+
+  if mappingFile:
+    with open(mappingFile, "w") as output:
+      json.dump({"migratedAt": datetime.now().isoformat(), "mapping": mapping}, output, indent=2)
+
+  print(f"[MIGRATE_BLOBS] Copied {copied} blobs, updated {updatedRows} database values")
+  return {"copied": copied, "updatedRows": updatedRows, "mapping": mapping}
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Copy uploaded files between storage backends")
+  parser.add_argument("--from", dest="source", required=True, choices=["cloudinary", "local", "memory"])
+  parser.add_argument("--to", dest="target", required=True, choices=["cloudinary", "local", "memory"])
+  parser.add_argument("--folder", default=None, help="only copy blobs in this folder")
+  parser.add_argument("--source-root", default=None, help="directory to read when copying from local, e.g. uploads")
+  parser.add_argument("--mapping-file", default="blob_migration_mapping.json")
+  parser.add_argument("--dry-run", action="store_true")
+  args = parser.parse_args()
+
+  migrate(args.source, args.target, args.folder, args.source_root, args.dry_run, args.mapping_file)
@@ -0,0 +1,364 @@
+"""
+Pluggable blob storage for uploaded documents and photos.
+
+Every backend stores a stream and hands back a StoredBlob (key, url, path, size,
+sha256, created). Blobs are content-addressed by SHA-256, so uploading the same
+certificate or photo twice stores it once; `created` is False for a dedupe hit
+and callers must not delete blobs they did not create.
+
+    cloudinary  Cloudinary, public_id = <folder>/<sha256>
+    local       uploads/blobs/<aa>/<bb>/<sha256>.<ext>, served by /uploads/<path>
+    memory      in-process dict, for tests and offline runs
+
+copyBlobs() streams every blob from one backend into another, which is what
+app/tools/migrate_blobs.py uses to move files between backends.
+"""
+from dotenv import load_dotenv
+from .lazyImport import lazyModule
+import urllib.request
+import threading
+import tempfile
+import hashlib
+import shutil
+import io
+import os
+
+load_dotenv()
+
+cloudinary = lazyModule("cloudinary")
+cloudinaryUploader = lazyModule("cloudinary.uploader")
+cloudinaryApi = lazyModule("cloudinary.api")
+
+BLOB_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 6 * 1024 * 1024))
+BLOB_LARGE_THRESHOLD = int(os.getenv("UPLOAD_LARGE_THRESHOLD", 10 * 1024 * 1024))
+BLOB_TIMEOUT_SECS = int(os.getenv("UPLOAD_TIMEOUT_SECS", 60))
+# local uploads live here, relative to the directory the server is started from
+UPLOADS_ROOT = "uploads"
+
+
+def uploadsPath(*parts):
+    """Path of a local upload; the blob store, photo variants and the /uploads route all resolve through it"""
+    return os.path.join(UPLOADS_ROOT, *parts)
+
+
+LOCAL_BLOB_ROOT = os.getenv("LOCAL_BLOB_ROOT", uploadsPath("blobs"))
+LOCAL_UPLOAD_BASE_URL = os.getenv("LOCAL_UPLOAD_BASE_URL", "http://localhost:8000")
+# generated files under uploads/ that are not uploads themselves
+DERIVED_UPLOAD_DIRS = [uploadsPath("variants"), uploadsPath("precompressed")]
+
+
+class StoredBlob:
+    def __init__(self, key: str, url: str, size: int, sha256: str, created: bool, path: str = None):
+        self.key = key
+        self.url = url
+        self.size = size
+        self.sha256 = sha256
+        self.created = created
+        self.path = path
+
+    def __repr__(self):
+        return f"<StoredBlob {self.key} ({self.size} bytes{'' if self.created else ', deduped'})>"
+
+
+def _extension(filename: str):
+    return filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+
+
+def hashStream(stream):
+    """SHA-256 and size of a seekable stream, leaving it rewound"""
+    digest = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(BLOB_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+
+class BlobStorage:
+    name = "base"
+
+    def configure(self):
+        """Validate configuration; raise if the backend cannot be used"""
+
+    def put(self, stream, filename: str, folder: str = "uploads"):
+        raise NotImplementedError
+
+    def open(self, key: str):
+        """Readable binary stream of a stored blob"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def exists(self, key: str):
+        raise NotImplementedError
+
+    def iterKeys(self, folder: str = None):
+        raise NotImplementedError
+
+    def references(self, key: str):
+        """Every string under which a blob may be referenced in the database"""
+        return [self.urlFor(key)]
+
+    def urlFor(self, key: str):
+        raise NotImplementedError
+
+
+class LocalBlobStorage(BlobStorage):
+    """Content-addressed files sharded two levels deep by hash prefix"""
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_BLOB_ROOT, baseUrl: str = LOCAL_UPLOAD_BASE_URL):
+        self.root = root
+        self.baseUrl = baseUrl.rstrip('/')
+
+    def configure(self):
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+
+    def _keyFor(self, sha256: str, filename: str):
+        extension = _extension(filename)
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}" + (f".{extension}" if extension else "")
+
+    def pathFor(self, key: str):
+        return os.path.join(self.root, *key.split("/"))
+
+    def urlFor(self, key: str):
+        return f"{self.baseUrl}/{self.pathFor(key).replace(os.sep, '/')}"
+
+    def put(self, stream, filename: str, folder: str = "uploads"):
+        self.configure()
+        digest = hashlib.sha256()
+        size = 0
+
+        # hash while spooling to a temp file in the same filesystem, then rename into place
+        fd, tmpPath = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as tmpFile:
+                for chunk in iter(lambda: stream.read(BLOB_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    tmpFile.write(chunk)
+
+            sha256 = digest.hexdigest()
+            key = self._keyFor(sha256, filename)
+            targetPath = self.pathFor(key)
+            created = not os.path.exists(targetPath)
+            if created:
+                os.makedirs(os.path.dirname(targetPath), exist_ok=True)
+                os.replace(tmpPath, targetPath)
+        finally:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+
+        return StoredBlob(key, self.urlFor(key), size, sha256, created, path=targetPath)
+
+    def open(self, key: str):
+        return open(self.pathFor(key), "rb")
+
+    def delete(self, key: str):
+        path = self.pathFor(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def exists(self, key: str):
+        return os.path.exists(self.pathFor(key))
+
+    def iterKeys(self, folder: str = None):
+        # walking a parent such as uploads/ must not descend into the blob store
+        # itself or into resized/compressed copies derived from it
+        skipped = {os.path.abspath(path) for path in [LOCAL_BLOB_ROOT] + DERIVED_UPLOAD_DIRS}
+        for directory, subdirectories, files in os.walk(self.root):
+            subdirectories[:] = [
+                name for name in subdirectories
+                if name != "tmp" and os.path.abspath(os.path.join(directory, name)) not in skipped
+            ]
+            for name in files:
+                relative = os.path.relpath(os.path.join(directory, name), self.root)
+                yield relative.replace(os.sep, "/")
+
+    def references(self, key: str):
+        path = self.pathFor(key)
+        return [self.urlFor(key), path, path.replace(os.sep, "/")]
+
+
+class MemoryBlobStorage(BlobStorage):
+    name = "memory"
+
+    def __init__(self, baseUrl: str = "memory://blobs"):
+        self.baseUrl = baseUrl
+        self.blobs = {}
+        self.lock = threading.Lock()
+
+    def urlFor(self, key: str):
+        return f"{self.baseUrl}/{key}"
+
+    def put(self, stream, filename: str, folder: str = "uploads"):
+        data = stream.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        extension = _extension(filename)
+        key = f"{folder}/{sha256}" + (f".{extension}" if extension else "")
+        with self.lock:
+            created = key not in self.blobs
+            self.blobs.setdefault(key, data)
+        return StoredBlob(key, self.urlFor(key), len(data), sha256, created)
+
+    def open(self, key: str):
+        return io.BytesIO(self.blobs[key])
+
+    def delete(self, key: str):
+        with self.lock:
+            self.blobs.pop(key, None)
+
+    def exists(self, key: str):
+        return key in self.blobs
+
+    def iterKeys(self, folder: str = None):
+        return [key for key in list(self.blobs) if folder is None or key.startswith(f"{folder}/")]
+
+
+class CloudinaryBlobStorage(BlobStorage):
+    """
+    Cloudinary keyed as "<resource_type>:<public_id>". The public_id is the
+    content hash, so re-uploading identical bytes returns the existing asset.
+    """
+    name = "cloudinary"
+
+    def __init__(self):
+        self._configured = False
+        self._configLock = threading.Lock()
+        self._urls = {}
+
+    def configure(self):
+        cloudName = os.getenv("CLOUDINARY_CLOUD_NAME")
+        apiKey = os.getenv("CLOUDINARY_API_KEY")
+        apiSecret = os.getenv("CLOUDINARY_API_SECRET")
+        if not all([cloudName, apiKey, apiSecret]):
+            raise ValueError(
+                "Cloudinary configuration is missing. "
+                "Please set CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, and CLOUDINARY_API_SECRET environment variables."
+            )
+
+        if not self._configured:
+            with self._configLock:
+                if not self._configured:
+                    cloudinary.config(cloud_name=cloudName, api_key=apiKey, api_secret=apiSecret, secure=True)
+                    self._configured = True
+                    print(f"[CLOUDINARY_UPLOAD] ✅ Cloudinary configured. Cloud: {cloudName}")
+
+    def put(self, stream, filename: str, folder: str = "uploads"):
+        self.configure()
+        sha256, size = hashStream(stream)
+        options = dict(
+            folder=folder,
+            public_id=sha256,
+            resource_type="auto",  # Auto-detect resource type (image, pdf, etc.)
+            overwrite=False,
+            use_filename=False,
+            unique_filename=False,
+            timeout=BLOB_TIMEOUT_SECS
+        )
+        if size >= BLOB_LARGE_THRESHOLD:
+            # stream big documents in chunks instead of one request body
+            result = cloudinaryUploader.upload_large(stream, chunk_size=BLOB_CHUNK_SIZE, **options)
+        else:
+            result = cloudinaryUploader.upload(stream, **options)
+
+        url = result.get('secure_url') or result.get('url')
+        if not url:
+            raise Exception("Cloudinary upload succeeded but no URL was returned")
+        # documents must be served by Cloudinary, never from a local path
+        if not url.startswith(('http://', 'https://')):
+            raise Exception(f"Invalid Cloudinary URL format: {url}")
+
+        key = f"{result.get('resource_type', 'image')}:{result.get('public_id')}"
+        self._urls[key] = url
+        return StoredBlob(key, url, size, sha256, not result.get("existing", False))
+
+    def _split(self, key: str):
+        resourceType, publicId = key.split(":", 1)
+        return resourceType, publicId
+
+    def urlFor(self, key: str):
+        if key not in self._urls:
+            resourceType, publicId = self._split(key)
+            self.configure()
+            self._urls[key] = cloudinary.CloudinaryResource(publicId, resource_type=resourceType).build_url()
+        return self._urls[key]
+
+    def open(self, key: str):
+        return urllib.request.urlopen(self.urlFor(key), timeout=BLOB_TIMEOUT_SECS)
+
+    def delete(self, key: str):
+        self.configure()
+        resourceType, publicId = self._split(key)
+        cloudinaryUploader.destroy(publicId, resource_type=resourceType, invalidate=True)
+
+    def exists(self, key: str):
+        self.configure()
+        resourceType, publicId = self._split(key)
+        try:
+            cloudinaryApi.resource(publicId, resource_type=resourceType)
+            return True
+        except Exception:
+            return False
+
+    def iterKeys(self, folder: str = None):
+        self.configure()
+        for resourceType in ["image", "raw"]:
+            cursor = None
+            while True:
+                options = dict(type="upload", resource_type=resourceType, max_results=500)
+                if folder:
+                    options["prefix"] = f"{folder}/"
+                if cursor:
+                    options["next_cursor"] = cursor
+                page = cloudinaryApi.resources(**options)
+                for resource in page.get("resources", []):
+                    key = f"{resourceType}:{resource['public_id']}"
+                    self._urls[key] = resource.get("secure_url") or resource.get("url")
+                    yield key
+                cursor = page.get("next_cursor")
+                if not cursor:
+                    break
+
+
+STORAGE_BACKENDS = {
+    "cloudinary": CloudinaryBlobStorage,
+    "local": LocalBlobStorage,
+    "memory": MemoryBlobStorage,
+}
+
+_instances = {}
+_instancesLock = threading.Lock()
+
+
+def getStorage(name: str):
+    """Shared per-process instance of a storage backend"""
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}', expected one of {sorted(STORAGE_BACKENDS)}")
+    with _instancesLock:
+        if name not in _instances:
+            _instances[name] = STORAGE_BACKENDS[name]()
+        return _instances[name]
+
+
+def copyBlobs(source: BlobStorage, target: BlobStorage, folder: str = None, keys=None):
+    """
+    Stream blobs from one backend into another, yielding (sourceKey, StoredBlob)
+    per copied blob. Already-present content is deduped by the target.
+    """
+    target.configure()
+    for key in (keys if keys is not None else source.iterKeys(folder)):
+        filename = key.rsplit("/", 1)[-1]
+        with source.open(key) as stream:
+            if hasattr(stream, "seekable") and stream.seekable():
+                stored = target.put(stream, filename, folder or "uploads")
+            else:
+                # hashing backends need to rewind, so spool remote bodies first
+                with tempfile.SpooledTemporaryFile(max_size=BLOB_CHUNK_SIZE) as spooled:
+                    shutil.copyfileobj(stream, spooled, BLOB_CHUNK_SIZE)
+                    spooled.seek(0)
+                    stored = target.put(spooled, filename, folder or "uploads")
+        yield key, stored
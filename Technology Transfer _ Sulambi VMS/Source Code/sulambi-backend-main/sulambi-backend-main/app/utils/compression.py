@@ -0,0 +1,169 @@
+"""
+Response compression, negotiated from Accept-Encoding.
+
+compressResponse runs after every request and encodes text-like bodies (JSON,
+CSV, HTML, SVG...) with brotli when the brotli package is installed and the
+client accepts it, gzip otherwise:
+
+  - bodies shorter than COMPRESSION_MIN_BYTES are sent as they are;
+  - streamed bodies (streamJsonResponse, the exports) are compressed chunk by
+    chunk and flushed after each one, so they keep streaming; the leading
+    chunks are read first, and a stream that ends (or declares a
+    Content-Length) below COMPRESSION_MIN_BYTES is sent as it is;
+  - images, PDFs, spreadsheets and other uploads are already compressed and
+    are never touched, nor are file responses, ranges, or responses that
+    already carry a Content-Encoding (the precompressed copies that
+    staticFiles keeps under uploads/precompressed/).
+"""
+from flask import request
+from dotenv import load_dotenv
+from .lazyImport import isAvailable, lazyModule
+import itertools
+import zlib
+import os
+
+load_dotenv()
+
+brotli = lazyModule("brotli")
+BROTLI_AVAILABLE = isAvailable("brotli")
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+# per-request compression: quality 5 is close to gzip's speed with smaller output
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 5))
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json", "application/javascript", "application/xml",
+    "application/xhtml+xml", "image/svg+xml",
+}
+
+
+def isCompressible(mimetype: str):
+    return bool(mimetype) and (mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+def acceptedEncodings():
+    """Encodings the client accepts that can be produced here, preferred first"""
+    accepted = request.accept_encodings
+    return [
+        encoding for encoding in ["br", "gzip"]
+        if accepted.quality(encoding) > 0 and (encoding != "br" or BROTLI_AVAILABLE)
+    ]
+
+
+class Encoder:
+    """Incremental gzip or brotli encoder"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits 31: zlib stream with a gzip header
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes):
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self):
+        if self.encoding == "br":
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def _close(chunks):
+    if hasattr(chunks, "close"):
+        chunks.close()
+
+
+def _peek(chunks, size: int):
+    """(leading chunks totalling at least size bytes, iterator over the rest or None once the stream ended)"""
+    head = []
+    total = 0
+    iterator = iter(chunks)
+    for chunk in iterator:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        head.append(chunk)
+        total += len(chunk)
+        if total >= size:
+            return head, iterator
+    return head, None
+
+
+def _compressedChunks(chunks, encoder: Encoder, source=None):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = encoder.compress(chunk) + encoder.flush()
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        _close(source if source is not None else chunks)
+
+
+def _skip(response):
+    return (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in [204, 206, 304]
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "Content-Range" in response.headers
+        or "X-Accel-Redirect" in response.headers
+        or "X-Sendfile" in response.headers
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    )
+
+
+def compressResponse(response):
+    if not isCompressible(response.mimetype) or _skip(response):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encodings = acceptedEncodings()
+    if len(encodings) == 0:
+        return response
+    encoder = Encoder(encodings[0])
+
+    if response.is_streamed:
+        if response.content_length is not None and response.content_length < COMPRESSION_MIN_BYTES:
+            return response
+        source = response.response
+        head, rest = _peek(source, COMPRESSION_MIN_BYTES)
+        if rest is None:
+            # the whole stream fit under COMPRESSION_MIN_BYTES
+            _close(source)
+            response.set_data(b"".join(head))
+            return response
+        response.response = _compressedChunks(itertools.chain(head, rest), encoder, source)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_MIN_BYTES:
+            return response
+        compressed = encoder.compress(data) + encoder.finish()
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+
+    response.headers["Content-Encoding"] = encoder.encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoder.encoding}", weak)
+    return response
+
+
+def install(app):
+    app.after_request(compressResponse)
+    if not BROTLI_AVAILABLE:
+        app.logger.warning("brotli is not installed, responses are gzip-compressed only")
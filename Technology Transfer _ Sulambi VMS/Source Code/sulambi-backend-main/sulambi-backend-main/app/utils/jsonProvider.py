@@ -0,0 +1,115 @@
+"""
+JSON encoding for API responses.
+
+FastJSONProvider is installed as the app's JSON provider, so every dict a
+controller returns is encoded by orjson when it is installed, and by Flask's
+stdlib encoder otherwise. Dates keep Flask's HTTP-date format and objects
+orjson cannot encode (e.g. integers beyond 64 bits) fall back to the stdlib
+encoder, so the output does not depend on which encoder ran.
+
+List endpoints can stream instead of building one large body:
+
+  return streamJsonResponse({"message": "...", "data": rows})
+
+Top-level list values are encoded JSON_STREAM_CHUNK items at a time and sent
+as they are encoded; everything else is encoded in one piece.
+"""
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from itertools import islice
+from dotenv import load_dotenv
+import types
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+load_dotenv()
+
+JSON_STREAM_CHUNK = int(os.getenv("JSON_STREAM_CHUNK", 200))
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    # insertion order is kept; sorting every object is the slowest part of the stdlib path
+    sort_keys = False
+
+    def encode(self, obj) -> bytes:
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+            except TypeError:
+                pass
+        return super().dumps(obj).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # debug responses are indented by the default provider
+        if self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b"\n", mimetype=self.mimetype)
+
+
+def install(app):
+    app.json = FastJSONProvider(app)
+    if orjson is None:
+        app.logger.warning("orjson is not installed, responses use the stdlib encoder")
+
+
+def _isArray(value):
+    return isinstance(value, (list, tuple, types.GeneratorType))
+
+
+def _arrayChunks(items, encode, chunkSize: int):
+    iterator = iter(items)
+    yield b"["
+    first = True
+    while True:
+        batch = list(islice(iterator, chunkSize))
+        if len(batch) == 0:
+            break
+        # strip the brackets of the encoded batch and join it to the previous one
+        yield (b"" if first else b",") + encode(batch)[1:-1]
+        first = False
+    yield b"]"
+
+
+def _documentChunks(document, encode, chunkSize: int):
+    if _isArray(document):
+        yield from _arrayChunks(document, encode, chunkSize)
+    else:
+        yield b"{"
+        for index, (key, value) in enumerate(document.items()):
+            yield (b"," if index else b"") + encode(str(key)) + b":"
+            if _isArray(value):
+                yield from _arrayChunks(value, encode, chunkSize)
+            else:
+                yield encode(value)
+        yield b"}"
+    yield b"\n"
+
+
+def streamJsonResponse(document, status: int = 200, chunkSize: int = JSON_STREAM_CHUNK):
+    """Response that encodes a dict or list while it is being sent"""
+    provider = current_app.json
+    if isinstance(provider, FastJSONProvider):
+        encode = provider.encode
+    else:
+        encode = lambda obj: provider.dumps(obj).encode()
+    return current_app.response_class(
+        _documentChunks(document, encode, chunkSize), status=status, mimetype=provider.mimetype
+    )
@@ -0,0 +1,70 @@
+"""
+Deferred imports for the heavy scientific stack (pandas, numpy, scikit-learn,
+joblib) so gunicorn workers can serve requests before those modules are loaded.
+
+    pd = lazyModule("pandas")   # nothing imported yet
+    pd.DataFrame(...)           # pandas is imported here, once
+"""
+import importlib
+import importlib.util
+import threading
+import time
+
+_importLock = threading.RLock()
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with _importLock:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazyModule(name: str):
+    return LazyModule(name)
+
+
+def isAvailable(name: str):
+    """Check that a module can be imported without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def prewarm(names: list, delay: float = 0):
+    """Import the given modules on a daemon thread, after an optional delay"""
+    def worker():
+        if delay > 0:
+            time.sleep(delay)
+        for name in names:
+            try:
+                startedAt = time.perf_counter()
+                with _importLock:
+                    importlib.import_module(name)
+                print(f"[PREWARM] {name} loaded in {(time.perf_counter() - startedAt) * 1000:.0f}ms")
+            except ImportError as e:
+                print(f"[PREWARM] Skipping {name}: {e}")
+
+    thread = threading.Thread(target=worker, name="module-prewarm", daemon=True)
+    thread.start()
+    return thread
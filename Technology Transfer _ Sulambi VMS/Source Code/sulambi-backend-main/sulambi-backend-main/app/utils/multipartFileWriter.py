@@ -1,14 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
 from flask import request
-from uuid import uuid4
+import threading
 import os
 from dotenv import load_dotenv
-import cloudinary
-import cloudinary.uploader
+from .blobStorage import getStorage, uploadsPath
 from werkzeug.exceptions import BadRequest
 
 load_dotenv()
 
-BASIC_WRITER_PATH = "uploads"
+BASIC_WRITER_PATH = uploadsPath()
+
+# blob storage backend for documents: "cloudinary" in production, "local" or "memory" offline
+UPLOAD_BACKEND = os.getenv("UPLOAD_BACKEND", "cloudinary")
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", 4))
+UPLOAD_TIMEOUT_SECS = int(os.getenv("UPLOAD_TIMEOUT_SECS", 60))
 
 # Allowed file extensions for requirements documents
 ALLOWED_EXTENSIONS = {
@@ -43,13 +48,75 @@ def is_allowed_file(filename: str, content_type: str) -> bool:
     
     return True
 
+_uploadExecutor = None
+_uploadExecutorLock = threading.Lock()
+
+def _getUploadExecutor():
+    global _uploadExecutor
+    if _uploadExecutor is None:
+        with _uploadExecutorLock:
+            if _uploadExecutor is None:
+                _uploadExecutor = ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS, thread_name_prefix="upload")
+    return _uploadExecutor
+
+def _fileSize(file):
+    try:
+        position = file.stream.tell()
+        file.stream.seek(0, os.SEEK_END)
+        size = file.stream.tell()
+        file.stream.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return file.content_length or 0
+
+def _rollbackUploads(storage, blobs: list):
+    # deduped blobs belong to earlier uploads as well, only delete what this request created
+    for blob in blobs:
+        if not blob.created:
+            continue
+        try:
+            storage.delete(blob.key)
+            print(f"[CLOUDINARY_UPLOAD] Rolled back upload {blob.key}")
+        except Exception as e:
+            print(f"[CLOUDINARY_UPLOAD] ⚠️ Could not roll back upload {blob.key}: {e}")
+
+def _rollbackWhenDone(storage):
+    def callback(future):
+        if not future.cancelled() and future.exception() is None:
+            _rollbackUploads(storage, [future.result()])
+    return callback
+
+def _collectFiles(keys: list[str]):
+    """(key, file, size) of every non-empty upload among keys, raising BadRequest for disallowed types"""
+    pending = []
+    for k in list(request.files):
+        if k not in keys:
+            continue
+
+        file = request.files.get(k)
+        if file is None:
+            continue
+        if file.filename == "":
+            continue
+
+        if not is_allowed_file(file.filename, file.content_type):
+            raise BadRequest(
+                f"File '{file.filename}' is not allowed. "
+                f"Only PDF and image files (jpg, jpeg, png, gif, bmp, webp, svg, ico, tiff) are allowed."
+            )
+
+        pending.append((k, file, _fileSize(file)))
+    return pending
+
 def cloudinaryFileWriter(keys: list[str], folder: str = "requirements"):
     """
     Upload files to Cloudinary with validation.
     Only allows PDF and image file formats.
     
-    REQUIRES Cloudinary configuration - will NOT fall back to local storage.
-    All files MUST be uploaded to Cloudinary.
+    Files are uploaded concurrently on a bounded thread pool, with one
+    UPLOAD_TIMEOUT_SECS deadline for the whole request. The upload is all-or-nothing: if any file fails, the ones that
+    already reached Cloudinary are deleted again. UPLOAD_BACKEND selects the
+    blob storage backend (see app/utils/blobStorage.py).
     
     Args:
         keys: List of file field names to process
@@ -61,106 +128,87 @@ def cloudinaryFileWriter(keys: list[str], folder: str = "requirements"):
     Raises:
         BadRequest: If Cloudinary is not configured, file type is not allowed, or upload fails
     """
+    storage = getStorage(UPLOAD_BACKEND)
+    try:
+        storage.configure()
+    except ValueError as e:
+        # STRICT: Check if Cloudinary is configured - NO FALLBACK TO LOCAL STORAGE
+        print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {e}")
+        raise BadRequest(str(e))
+
+    # collect and validate every file in the request thread before uploading anything
+    pending = _collectFiles(keys)
+
+    executor = _getUploadExecutor()
+    futures = {}
+    for k, file, size in pending:
+        print(f"[CLOUDINARY_UPLOAD] Uploading {k}: {file.filename} ({size} bytes) to {storage.name} folder '{folder}'...")
+        futures[k] = executor.submit(storage.put, file.stream, file.filename, folder)
+
+    # one deadline for the whole submission, not one timeout per file
+    _, notDone = wait(futures.values(), timeout=UPLOAD_TIMEOUT_SECS, return_when=FIRST_EXCEPTION)
+
     keyPaths = {}
-    filenames = list(request.files)
-    
-    # Configure Cloudinary
-    cloudinary.config(
-        cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-        api_key=os.getenv("CLOUDINARY_API_KEY"),
-        api_secret=os.getenv("CLOUDINARY_API_SECRET")
-    )
-    
-    # STRICT: Check if Cloudinary is configured - NO FALLBACK TO LOCAL STORAGE
-    cloudinary_cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
-    cloudinary_api_key = os.getenv("CLOUDINARY_API_KEY")
-    cloudinary_api_secret = os.getenv("CLOUDINARY_API_SECRET")
-    
-    if not all([cloudinary_cloud_name, cloudinary_api_key, cloudinary_api_secret]):
-        error_msg = (
-            "Cloudinary configuration is missing. "
-            "All file uploads must use Cloudinary. "
-            "Please set CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, and CLOUDINARY_API_SECRET environment variables. "
-            "Local file storage is disabled for security and scalability."
-        )
-        print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {error_msg}")
-        raise BadRequest(error_msg)
-    
-    print(f"[CLOUDINARY_UPLOAD] ✅ Cloudinary configured. Cloud: {cloudinary_cloud_name}")
-    
-    for k in filenames:
-        if k not in keys:
+    uploaded = []
+    failure = None
+    for k, file, size in pending:
+        future = futures[k]
+        if future in notDone:
             continue
-            
-        file = request.files.get(k)
-        if file is None:
+        error = future.exception()
+        if error is not None:
+            failure = failure or f"Failed to upload file '{file.filename}' to Cloudinary: {str(error)}"
             continue
-        if file.filename == "":
-            continue
-        
-        # Validate file type
-        if not is_allowed_file(file.filename, file.content_type):
-            raise BadRequest(
-                f"File '{file.filename}' is not allowed. "
-                f"Only PDF and image files (jpg, jpeg, png, gif, bmp, webp, svg, ico, tiff) are allowed."
-            )
-        
-        try:
-            # Generate unique filename
-            unique_filename = f"{str(uuid4())}_{file.filename}"
-            
-            print(f"[CLOUDINARY_UPLOAD] Uploading {k}: {file.filename} to Cloudinary folder '{folder}'...")
-            
-            # Upload to Cloudinary - NO FALLBACK TO LOCAL STORAGE
-            result = cloudinary.uploader.upload(
-                file,
-                folder=folder,
-                public_id=unique_filename.rsplit('.', 1)[0],  # Remove extension for public_id
-                resource_type="auto",  # Auto-detect resource type (image, pdf, etc.)
-                overwrite=False,
-                use_filename=False,
-                unique_filename=True
-            )
-            
-            # Store the secure URL (or regular URL if secure is not available)
-            cloudinary_url = result.get('secure_url') or result.get('url')
-            
-            if not cloudinary_url:
-                raise Exception("Cloudinary upload succeeded but no URL was returned")
-            
-            # Verify it's a Cloudinary URL (not a local path)
-            if not cloudinary_url.startswith('http://') and not cloudinary_url.startswith('https://'):
-                raise Exception(f"Invalid Cloudinary URL format: {cloudinary_url}")
-            
-            keyPaths[k] = cloudinary_url
-            
-            print(f"[CLOUDINARY_UPLOAD] ✅ Successfully uploaded {k}: {file.filename}")
-            print(f"[CLOUDINARY_UPLOAD]    URL: {cloudinary_url[:80]}...")
-            
-        except Exception as e:
-            error_msg = f"Failed to upload file '{file.filename}' to Cloudinary: {str(e)}"
-            print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {error_msg}")
-            print(f"[CLOUDINARY_UPLOAD] ❌ Local storage fallback is disabled. Upload must succeed in Cloudinary.")
-            raise BadRequest(error_msg)
-    
+        blob = future.result()
+        uploaded.append(blob)
+        # each backend hands back URLs it can serve (CloudinaryBlobStorage checks its own)
+        keyPaths[k] = blob.url
+        print(f"[CLOUDINARY_UPLOAD] ✅ Successfully uploaded {k}: {file.filename}")
+
+    if failure is None and len(notDone) > 0:
+        slowest = next(file.filename for k, file, _ in pending if futures[k] in notDone)
+        failure = f"Failed to upload file '{slowest}' to Cloudinary: timed out after {UPLOAD_TIMEOUT_SECS}s"
+
+    if failure is not None:
+        print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {failure}")
+        # finished uploads are rolled back below; the ones still running are deleted once they land
+        for future in notDone:
+            if not future.cancel():
+                future.add_done_callback(_rollbackWhenDone(storage))
+        _rollbackUploads(storage, uploaded)
+        raise BadRequest(failure)
+
     return keyPaths
 
+def stagingFileWriter(keys: list[str], storage):
+    """
+    Validate files like cloudinaryFileWriter, but only copy them into a local
+    staging storage; the remote upload happens later (see
+    app/modules/RequirementUploads.py). Returns {key: (StoredBlob, filename)}.
+    """
+    storage.configure()
+    staged = {}
+    for k, file, size in _collectFiles(keys):
+        staged[k] = (storage.put(file.stream, file.filename), file.filename)
+        print(f"[UPLOAD_STAGING] Staged {k}: {file.filename} ({size} bytes)")
+    return staged
+
 def basicFileWriter(keys: list[str]):
     """
-    Legacy function for local file storage.
-    Kept for backward compatibility, but consider using cloudinaryFileWriter for production.
+    Local file storage for report photos, through the content-addressed local
+    blob store so re-uploaded photos are stored once. Returns relative paths
+    under uploads/ that the /uploads route serves.
     """
     keyPaths = {}
     filenames = list(request.files)
+    storage = getStorage("local")
 
     for k in filenames:
         file = request.files.get(k)
         if (file == None): continue
         if (file.filename == ""): continue
 
-        # generate unique filenames to prevent overwrites
-        fwpath = os.path.join(BASIC_WRITER_PATH, str(uuid4()) + file.filename)
-        file.save(fwpath)
-        keyPaths[k] = fwpath
+        stored = storage.put(file.stream, file.filename)
+        keyPaths[k] = stored.path.replace(os.sep, "/")
 
-    return keyPaths
\ No newline at end of file
+    return keyPaths
@@ -0,0 +1,154 @@
+"""
+Serving of files under uploads/ for the /uploads/<path> route.
+
+Uploaded files are named by their SHA-256 (legacy uploads start with a uuid
+followed by the original filename) and never change, so those responses are cached as immutable for a year and carry
+the hash as a strong ETag. Everything else is revalidated hourly. Range
+requests are honoured, so reviewers can seek through large PDFs. Text-like
+files (SVG, CSS, JSON, CSV...) are gzip- or brotli-compressed once into
+uploads/precompressed/ and served from there to clients that accept it.
+
+With STATIC_OFFLOAD set, the body is left to the front proxy:
+
+    x-sendfile   X-Sendfile: <absolute path> via Flask's USE_X_SENDFILE (Apache, lighttpd)
+    x-accel      X-Accel-Redirect: <STATIC_ACCEL_PREFIX>/<path> (nginx internal location)
+"""
+from flask import send_file, request, Response
+from werkzeug.security import safe_join
+from werkzeug.exceptions import NotFound
+from dotenv import load_dotenv
+from .compression import acceptedEncodings, brotli
+from .blobStorage import uploadsPath
+import mimetypes
+import tempfile
+import shutil
+import gzip
+import os
+import re
+
+load_dotenv()
+
+PRECOMPRESSED_DIR = "precompressed"
+STATIC_OFFLOAD = os.getenv("STATIC_OFFLOAD", "").lower()
+STATIC_ACCEL_PREFIX = os.getenv("STATIC_ACCEL_PREFIX", "/protected-uploads").rstrip("/")
+STATIC_MUTABLE_MAX_AGE = int(os.getenv("STATIC_MUTABLE_MAX_AGE", 3600))
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+PRECOMPRESS_MIN_BYTES = 1024
+PRECOMPRESS_MAX_BYTES = int(os.getenv("STATIC_PRECOMPRESS_MAX_BYTES", 20 * 1024 * 1024))
+PRECOMPRESS_EXTENSIONS = {"svg", "txt", "csv", "json", "xml", "html", "css", "js", "md"}
+
+# sha256 content-addressed blobs, or names from before the blob store, which
+# start with a uuid4 followed by the original filename (with or without "_")
+CONTENT_ADDRESSED_NAME = re.compile(
+    r"^(?:(?P<digest>[0-9a-f]{64}|[0-9a-f]{32})$"
+    r"|(?P<uuid>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}))"
+)
+
+
+def uploadsRoot():
+    # the same directory the blob store and photo variants write to
+    return os.path.abspath(uploadsPath())
+
+
+def contentDigest(path: str):
+    """Hash or uuid a file is named after (variants use their folder name), or None"""
+    parts = path.replace("\\", "/").split("/")
+    stem = os.path.splitext(parts[-1])[0]
+    if parts[0] == "variants" and len(parts) >= 3:
+        stem = parts[-2]
+    match = CONTENT_ADDRESSED_NAME.match(stem.lower())
+    return (match.group("digest") or match.group("uuid")) if match else None
+
+
+def _compress(sourcePath: str, targetPath: str, encoding: str):
+    os.makedirs(os.path.dirname(targetPath), exist_ok=True)
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(targetPath))
+    try:
+        with os.fdopen(fd, "wb") as output, open(sourcePath, "rb") as source:
+            if encoding == "gzip":
+                with gzip.GzipFile(fileobj=output, mode="wb", compresslevel=9, mtime=0) as compressed:
+                    shutil.copyfileobj(source, compressed)
+            else:
+                output.write(brotli.compress(source.read(), quality=11))
+        os.replace(tmpPath, targetPath)
+    finally:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+
+def precompressed(path: str, fullPath: str):
+    """(compressed file path, encoding) for the best encoding the client accepts, or None"""
+    extension = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    if extension not in PRECOMPRESS_EXTENSIONS or request.range:
+        return None
+    size = os.path.getsize(fullPath)
+    if size < PRECOMPRESS_MIN_BYTES or size > PRECOMPRESS_MAX_BYTES:
+        return None
+
+    for encoding in acceptedEncodings():
+        suffix = ".br" if encoding == "br" else ".gz"
+        targetPath = safe_join(uploadsRoot(), PRECOMPRESSED_DIR, path + suffix)
+        try:
+            # compressed once per source version, regenerated if the source is newer
+            if not os.path.isfile(targetPath) or os.path.getmtime(targetPath) < os.path.getmtime(fullPath):
+                _compress(fullPath, targetPath, encoding)
+            return targetPath, encoding
+        except Exception as e:
+            print(f"[STATIC_FILES] Could not precompress {path} ({encoding}): {e}")
+    return None
+
+
+def _offloaded(path: str, etag: str):
+    """Empty response carrying X-Accel-Redirect; nginx serves the body, ranges and 304s"""
+    response = Response(status=200, mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream")
+    response.headers["X-Accel-Redirect"] = f"{STATIC_ACCEL_PREFIX}/{path}"
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+def sendUpload(path: str, variant: str = None):
+    """
+    Response for /uploads/<path>, optionally swapping in a resized photo variant
+    (see app.modules.ImageVariants).
+    """
+    root = uploadsRoot()
+    fullPath = safe_join(root, path)
+    if fullPath is None or not os.path.isfile(fullPath) or path.startswith(PRECOMPRESSED_DIR + "/"):
+        raise NotFound()
+
+    servedPath = path
+    if variant is not None:
+        from ..modules.ImageVariants import servedVariant
+        servedPath = servedVariant(path, variant, acceptsWebp="image/webp" in request.headers.get("Accept", "")) or path
+        fullPath = safe_join(root, servedPath)
+
+    digest = contentDigest(servedPath)
+    # the ETag changes with the representation, not just the source file
+    etag = f"{digest}-{os.path.basename(servedPath)}" if digest else None
+
+    if STATIC_OFFLOAD == "x-accel":
+        response = _offloaded(servedPath, etag)
+    else:
+        encoded = precompressed(servedPath, fullPath) if variant is None else None
+        sendPath, encoding = encoded if encoded else (fullPath, None)
+        response = send_file(
+            sendPath,
+            mimetype=mimetypes.guess_type(servedPath)[0] or "application/octet-stream",
+            conditional=True,  # If-None-Match / If-Modified-Since and Range
+            etag=f"{etag}-{encoding}" if (etag and encoding) else (etag if etag else True),
+            max_age=None,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+
+    response.vary.add("Accept-Encoding")
+    if variant is not None:
+        response.vary.add("Accept")
+
+    # a variant URL answered with the original must not be pinned, the variant may exist later
+    if digest and (variant is None or servedPath != path):
+        response.headers["Cache-Control"] = f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response.headers["Cache-Control"] = f"public, max-age={STATIC_MUTABLE_MAX_AGE}, must-revalidate"
+    return response
@@ -0,0 +1,151 @@
+"""
+Size limits and content sniffing for multipart uploads, applied while the
+request body is being parsed.
+
+GuardedRequest replaces Flask's request class. Every file part is written
+into a GuardedUpload instead of werkzeug's default buffer:
+
+  - the extension must be one of UPLOAD_EXTENSION_KINDS, checked before any
+    byte of the part is stored;
+  - the first bytes must look like that kind of file (PDF, image, spreadsheet
+    or text), so a renamed executable is rejected after its first chunk;
+  - a part larger than UPLOAD_MAX_FILE_BYTES is rejected as soon as it crosses
+    the limit, and the whole body is capped by MAX_CONTENT_LENGTH
+    (UPLOAD_MAX_REQUEST_BYTES);
+  - parts are spooled to a temp file above UPLOAD_SPOOL_BYTES instead of
+    being held in memory.
+
+Violations raise RequestEntityTooLarge (413) or UnsupportedMediaType (415).
+parseUploads() runs before every multipart request, so the errors become
+responses before a controller can swallow them into a generic 500.
+Endpoint-specific rules (is_allowed_file, the import's extensions) still apply
+on top of this.
+"""
+from flask import Request, request
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from dotenv import load_dotenv
+import tempfile
+import os
+
+load_dotenv()
+
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", 10 * 1024 * 1024))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", 25 * 1024 * 1024))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", 512 * 1024))
+# non-file form fields are small; anything bigger is not a form we serve
+UPLOAD_MAX_FORM_BYTES = 512 * 1024
+SNIFF_BYTES = 512
+
+
+def _startsWithAny(head: bytes, prefixes):
+    return any(head.startswith(prefix) for prefix in prefixes)
+
+
+def _isText(head: bytes):
+    return b"\x00" not in head
+
+
+def _isMarkup(head: bytes):
+    return _isText(head) and head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<")
+
+
+# kind -> check on the first SNIFF_BYTES bytes
+SIGNATURES = {
+    "pdf": lambda head: head.startswith(b"%PDF-"),
+    "jpeg": lambda head: head.startswith(b"\xff\xd8\xff"),
+    "png": lambda head: head.startswith(b"\x89PNG\r\n\x1a\n"),
+    "gif": lambda head: _startsWithAny(head, [b"GIF87a", b"GIF89a"]),
+    "bmp": lambda head: head.startswith(b"BM"),
+    "webp": lambda head: head[:4] == b"RIFF" and head[8:12] == b"WEBP",
+    "tiff": lambda head: _startsWithAny(head, [b"II*\x00", b"MM\x00*"]),
+    "ico": lambda head: head.startswith(b"\x00\x00\x01\x00"),
+    "heif": lambda head: head[4:8] == b"ftyp" and head[8:12] in [b"heic", b"heix", b"mif1", b"msf1", b"hevc"],
+    "svg": _isMarkup,
+    "zip": lambda head: head.startswith(b"PK\x03\x04"),
+    "ole": lambda head: head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"),
+    "text": _isText,
+}
+
+# phones and browsers mislabel images, so any raster image passes for an image extension
+IMAGE_KINDS = ["jpeg", "png", "gif", "bmp", "webp", "tiff", "ico", "heif"]
+
+# extension -> kinds its content may have; other extensions are refused outright
+UPLOAD_EXTENSION_KINDS = {
+    "pdf": ["pdf"],
+    **{extension: IMAGE_KINDS for extension in ["jpg", "jpeg", "png", "gif", "bmp", "webp", "tiff", "tif", "ico", "heic", "heif"]},
+    "svg": ["svg"],
+    "xlsx": ["zip"],
+    "xls": ["ole", "zip"],
+    "csv": ["text"],
+}
+
+
+def _extension(filename: str):
+    return filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else ''
+
+
+class GuardedUpload:
+    """Spooled file part that enforces the per-file limit and sniffs its first bytes"""
+
+    def __init__(self, filename: str, maxBytes: int = UPLOAD_MAX_FILE_BYTES):
+        self.filename = filename
+        self.maxBytes = maxBytes
+        self.size = 0
+        self._kinds = UPLOAD_EXTENSION_KINDS.get(_extension(filename))
+        if self._kinds is None:
+            raise UnsupportedMediaType(f"File '{filename}' has a file type that cannot be uploaded")
+        self._head = b""
+        self._sniffed = False
+        self._file = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+
+    def _sniff(self):
+        self._sniffed = True
+        if self.size > 0 and not any(SIGNATURES[kind](self._head) for kind in self._kinds):
+            raise UnsupportedMediaType(f"The content of '{self.filename}' does not match its file type")
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.maxBytes:
+            raise RequestEntityTooLarge(
+                f"File '{self.filename}' is larger than {self.maxBytes / (1024 * 1024):g} MB"
+            )
+        if not self._sniffed:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+        return self._file.write(data)
+
+    def seek(self, *args):
+        # the parser rewinds once the part is complete; short files are sniffed here
+        if not self._sniffed:
+            self._sniff()
+        return self._file.seek(*args)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class GuardedRequest(Request):
+    max_form_memory_size = UPLOAD_MAX_FORM_BYTES
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # empty file inputs arrive as parts without a filename
+        if not filename:
+            return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+        return GuardedUpload(filename)
+
+
+def install(app):
+    """Use GuardedRequest on the app and parse multipart bodies before the view runs"""
+    app.request_class = GuardedRequest
+    app.config["MAX_CONTENT_LENGTH"] = UPLOAD_MAX_REQUEST_BYTES
+    app.before_request(parseUploads)
+
+
+def parseUploads():
+    if request.method != "OPTIONS" and request.mimetype == "multipart/form-data":
+        # raises 413/415 here instead of inside a controller's try block
+        request.files
@@ -0,0 +1,42 @@
+"""
+Shared pytest fixtures for the root test modules.
+
+The database connection reads DB_PATH once, when app.database.connection is
+first imported, so every test module of a run shares one throwaway SQLite
+database created here.
+"""
+import tempfile
+import sys
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def database():
+    pytest.importorskip("dotenv")
+
+    # the database has to be chosen before the app modules are imported
+    if "app.database.connection" not in sys.modules:
+        os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(), "test_sulambi.db")
+        os.environ["DATABASE_URL"] = ""
+
+    import app.database.tableInitializer
+    return os.environ["DB_PATH"]
+
+
+@pytest.fixture
+def query(database):
+    """Run one statement on the test database and return its rows"""
+    from app.database.connection import cursorInstance
+
+    def run(statement: str, params: tuple = ()):
+        conn, cursor = cursorInstance()
+        try:
+            cursor.execute(statement, params)
+            rows = cursor.fetchall()
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
+    return run
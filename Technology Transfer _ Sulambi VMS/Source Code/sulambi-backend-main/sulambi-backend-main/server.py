@@ -1,6 +1,8 @@
-from flask import Flask, send_from_directory, request
+from flask import Flask, request
 from flask_cors import CORS
 from app.blueprint import ApiBlueprint
+from app.utils.staticFiles import sendUpload, STATIC_OFFLOAD
+from app.utils import uploadGuard, jsonProvider, compression
 from dotenv import load_dotenv
 import sys
 import os
@@ -12,6 +14,13 @@ def testFunction():
 
 # Create Flask app (needed for both dev and production)
 Server = Flask(__name__)
+Server.config["USE_X_SENDFILE"] = STATIC_OFFLOAD == "x-sendfile"
+# size caps and type sniffing while multipart bodies are parsed
+uploadGuard.install(Server)
+# orjson-backed JSON responses
+jsonProvider.install(Server)
+# gzip/brotli for text responses
+compression.install(Server)
 
 # Allow common development and production origins
 # Get production frontend URL from environment or use default
@@ -123,15 +132,34 @@ def handle_error(error):
 
 @Server.route("/uploads/<path:path>")
 def staticFileHost(path):
-  response = send_from_directory("uploads", path)
+  # ?variant=thumb|medium serves a resized copy once it has been generated
+  response = sendUpload(path, request.args.get("variant"))
   response.headers['Access-Control-Allow-Origin'] = '*'
   response.headers['Access-Control-Allow-Methods'] = 'GET'
-  response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
-  response.headers['Cache-Control'] = 'public, max-age=3600'
+  response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Range'
+  response.headers['Access-Control-Expose-Headers'] = 'Content-Range,Content-Length,ETag'
   return response
 
 Server.register_blueprint(ApiBlueprint)
 
+# One durable job dispatcher and mail outbox pool per worker; work left over from downtime runs on the first poll
+if (not any(flag in sys.argv for flag in ["--init", "--reset", "--test", "--migrate-photo-captions", "--train-models", "--rebuild-features"])):
+  from app.modules import Scheduler, MailOutbox, MemberImporter
+  Scheduler.start()
+  MailOutbox.start()
+  # imports run on daemon threads, so a restart leaves their jobs at "running"
+  try:
+    MemberImporter.failStaleJobs()
+  except Exception as e:
+    print(f"[MEMBER_IMPORT] Could not check for interrupted imports: {e}")
+
+# Optionally load the analytics stack in the background once the worker is up,
+# otherwise it is imported on the first analytics request
+if (os.getenv("PREWARM_ANALYTICS", "False") == "True"):
+  from app.utils.lazyImport import prewarm
+  prewarm(["numpy", "pandas", "sklearn.feature_extraction.text", "sklearn.ensemble", "joblib"],
+          delay=float(os.getenv("PREWARM_ANALYTICS_DELAY", 5)))
+
 # Export app for Gunicorn (production)
 app = Server
 
@@ -143,6 +171,15 @@ if __name__ == "__main__":
     from app.database.migrate_photo_captions import migrate_photo_captions
     migrate_photo_captions()
     exit()
+  if ("--train-models" in sys.argv):
+    from app.modules.AnalyticsEngine import trainModels
+    trainModels()
+    exit()
+  if ("--rebuild-features" in sys.argv):
+    from app.modules import FeatureStore
+    FeatureStore.rebuildAll()
+    FeatureStore.snapshotAll()
+    exit()
   if ("--test" in sys.argv):
     testFunction()
     exit()
@@ -24,5 +24,7 @@ fi
 
 # Start the server with Gunicorn
 echo "Starting Gunicorn server..."
-gunicorn --bind 0.0.0.0:$PORT --workers 2 --timeout 120 server:app
+# Threaded workers keep heartbeating while a long export streams, so the
+# 120s timeout only applies to workers that are actually stuck
+gunicorn --bind 0.0.0.0:$PORT --workers 2 --threads ${GUNICORN_THREADS:-4} --timeout 120 server:app
 
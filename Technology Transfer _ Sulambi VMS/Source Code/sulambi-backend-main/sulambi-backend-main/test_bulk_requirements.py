@@ -0,0 +1,82 @@
+"""
+Bulk requirement decisions with real requirement ids.
+
+Requirement ids are uuid strings, so PATCH /api/requirements/accept and
+/reject are exercised with ids created by RequirementsModel.create, on a
+throwaway SQLite database.
+
+    python -m pytest -q test_bulk_requirements.py
+"""
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def api(database):
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+
+    from app.models.AccountModel import AccountModel
+    from app.models.SessionModel import SessionModel
+    from server import Server
+
+    account = AccountModel().create("bulk-test-admin", "password", "admin")
+    token = SessionModel().create(account["id"], "admin")["token"]
+    return Server.test_client(), {"Authorization": f"Bearer {token}"}
+
+
+def createRequirements(count: int):
+    from app.models.ExternalEventModel import ExternalEventModel
+    from app.models.RequirementsModel import RequirementsModel
+
+    timeNow = int(datetime.now().timestamp() * 1000)
+    event = ExternalEventModel().create(
+        "", "Bulk Test Event", "Campus", timeNow + 86400000, timeNow + 2 * 86400000,
+        "", "", "", "", "", "", 0, "", "", "", "", "", "", "", "", "", 1, "accepted", 0
+    )
+    return [
+        RequirementsModel().create(
+            "https://example.com/medcert.pdf", "https://example.com/waiver.pdf", event["id"], "external",
+            "", "", "", "", "", "", f"Volunteer {index}", f"volunteer{index}-{timeNow}@example.com", f"21-{index:05d}", 20,
+            "", "", "", "", "", "", "", ""
+        )["id"]
+        for index in range(count)
+    ]
+
+
+def requirementStatus(id: str):
+    from app.models.RequirementsModel import RequirementsModel
+    return RequirementsModel().get(id)["accepted"]
+
+
+def test_bulk_accept_takes_uuid_ids(api):
+    client, headers = api
+    ids = createRequirements(3)
+    assert all(isinstance(id, str) and not id.isdigit() for id in ids)
+
+    # a repeated id is only accepted once
+    response = client.patch("/api/requirements/accept", json={"ids": ids + [ids[0]]}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert sorted(requirement["id"] for requirement in body["data"]) == sorted(ids)
+    assert body["skipped"] == []
+    assert all(requirementStatus(id) in [True, 1] for id in ids)
+
+
+def test_bulk_reject_takes_uuid_ids(api):
+    client, headers = api
+    ids = createRequirements(2)
+
+    response = client.patch("/api/requirements/reject", json={"ids": ids + ["no-such-requirement"]}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert sorted(requirement["id"] for requirement in body["data"]) == sorted(ids)
+    assert [skipped["id"] for skipped in body["skipped"]] == ["no-such-requirement"]
+    assert all(requirementStatus(id) in [False, 0] for id in ids)
+
+
+def test_bulk_refuses_ids_that_are_not_numbers_or_strings(api):
+    client, headers = api
+    response = client.patch("/api/requirements/accept", json={"ids": [{"id": 1}]}, headers=headers)
+    assert response.status_code == 400
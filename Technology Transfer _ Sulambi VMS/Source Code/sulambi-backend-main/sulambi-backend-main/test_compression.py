@@ -0,0 +1,87 @@
+"""
+Minimum-size rule of app.utils.compression for buffered and streamed responses.
+
+    python -m pytest -q test_compression.py
+"""
+import gzip
+
+import pytest
+
+BODY = "x" * 4000
+
+
+@pytest.fixture
+def client():
+    pytest.importorskip("flask")
+    pytest.importorskip("dotenv")
+    from flask import Flask, Response
+    from app.utils import compression
+
+    app = Flask(__name__)
+    compression.install(app)
+    closed = []
+
+    def stream(parts):
+        try:
+            for part in parts:
+                yield part
+        finally:
+            closed.append(True)
+
+    @app.get("/buffered/<int:size>")
+    def buffered(size):
+        return Response(BODY[:size], mimetype="text/plain")
+
+    @app.get("/streamed/<int:size>")
+    def streamed(size):
+        body = BODY[:size]
+        return Response(stream([body[index:index + 100] for index in range(0, len(body), 100)]), mimetype="text/csv")
+
+    @app.get("/streamed-with-length")
+    def streamedWithLength():
+        return Response(stream(["small"]), mimetype="text/csv", headers={"Content-Length": "5"})
+
+    return app.test_client(), closed
+
+
+def get(client, path):
+    return client.get(path, headers={"Accept-Encoding": "gzip"})
+
+
+def test_small_buffered_body_is_sent_as_is(client):
+    client, _ = client
+    response = get(client, "/buffered/100")
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data(as_text=True) == BODY[:100]
+
+
+def test_large_buffered_body_is_compressed(client):
+    client, _ = client
+    response = get(client, "/buffered/4000")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.get_data()).decode() == BODY
+
+
+def test_small_stream_is_sent_as_is(client):
+    client, closed = client
+    response = get(client, "/streamed/300")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Content-Length"] == "300"
+    assert response.get_data(as_text=True) == BODY[:300]
+    assert closed == [True]
+
+
+def test_small_content_length_stream_is_not_read_ahead(client):
+    client, _ = client
+    response = get(client, "/streamed-with-length")
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data(as_text=True) == "small"
+
+
+def test_large_stream_is_compressed_whole(client):
+    client, closed = client
+    response = get(client, "/streamed/4000")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.get_data()).decode() == BODY
+    assert closed == [True]
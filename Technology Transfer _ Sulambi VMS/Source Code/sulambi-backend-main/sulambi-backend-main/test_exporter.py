@@ -0,0 +1,95 @@
+"""
+Formula escaping and response headers of the CSV/XLSX exports
+(app.modules.Exporter), on a throwaway SQLite database.
+
+    python -m pytest -q test_exporter.py
+"""
+from datetime import datetime
+import csv
+import io
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def api(database):
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+
+    from app.models.AccountModel import AccountModel
+    from app.models.SessionModel import SessionModel
+    from server import Server
+
+    account = AccountModel().create("export-test-admin", "password", "admin")
+    token = SessionModel().create(account["id"], "admin")["token"]
+    return Server.test_client(), {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def exporter(database):
+    from app.modules import Exporter
+    return Exporter
+
+
+def createRequirement(fullname: str, contactNum: str):
+    from app.models.ExternalEventModel import ExternalEventModel
+    from app.models.RequirementsModel import RequirementsModel
+
+    timeNow = int(datetime.now().timestamp() * 1000)
+    event = ExternalEventModel().create(
+        "", "Export Test Event", "Campus", timeNow + 86400000, timeNow + 2 * 86400000,
+        "", "", "", "", "", "", 0, "", "", "", "", "", "", "", "", "", 1, "accepted", 0
+    )
+    RequirementsModel().create(
+        "https://example.com/medcert.pdf", "https://example.com/waiver.pdf", event["id"], "external",
+        "", "", "", "", "", "", fullname, f"export-{timeNow}@example.com", "21-00001", 20,
+        "", "", "", "", "", "", contactNum, ""
+    )
+    return event["id"]
+
+
+def test_formulas_are_escaped_but_signed_numbers_are_not(exporter):
+    assert exporter._safeText("=HYPERLINK(\"http://evil\")") == "'=HYPERLINK(\"http://evil\")"
+    assert exporter._safeText("@SUM(A1:A2)") == "'@SUM(A1:A2)"
+    assert exporter._safeText("-2+3+cmd|' /C calc'!A0") == "'-2+3+cmd|' /C calc'!A0"
+    assert exporter._safeText("+63 912 345 6789") == "+63 912 345 6789"
+    assert exporter._safeText("-12.50") == "-12.50"
+    assert exporter._safeText(42) == 42
+
+
+def test_csv_chunks_start_with_a_bom_and_escape_cells(exporter):
+    body = b"".join(exporter.csvChunks(["name", "phone"], [("=1+1", "+63 912 345 6789")])).decode("utf-8")
+    assert body.startswith("﻿")
+    assert list(csv.reader(io.StringIO(body[1:]))) == [["name", "phone"], ["'=1+1", "+63 912 345 6789"]]
+
+
+def test_csv_export_headers_and_body(api):
+    client, headers = api
+    eventId = createRequirement("=HYPERLINK(\"http://evil\")", "+63 912 345 6789")
+
+    response = client.get(f"/api/requirements/export?format=csv&columns=fullname,contactNum&eventId={eventId}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
+    assert response.headers["Content-Disposition"].startswith("attachment; filename=\"requirements-")
+    assert response.headers["Content-Disposition"].endswith(".csv\"")
+    assert response.headers["Cache-Control"] == "no-store"
+
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip("﻿"))))
+    assert rows == [["fullname", "contactNum"], ["'=HYPERLINK(\"http://evil\")", "+63 912 345 6789"]]
+
+
+def test_xlsx_export_headers(api):
+    pytest.importorskip("openpyxl")
+    client, headers = api
+    eventId = createRequirement("Plain Name", "0912")
+
+    response = client.get(f"/api/requirements/export?format=xlsx&eventId={eventId}", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    assert response.get_data()[:2] == b"PK"
+
+
+def test_unknown_export_parameters_are_rejected(api):
+    client, headers = api
+    assert client.get("/api/requirements/export?format=pdf", headers=headers).status_code == 400
+    assert client.get("/api/requirements/export?columns=password", headers=headers).status_code == 400
@@ -0,0 +1,136 @@
+"""
+Round trips of app.utils.multipartFileWriter through the in-memory blob store.
+
+    python -m pytest -q test_file_writers.py
+"""
+import time
+import io
+
+import pytest
+
+PDF_BYTES = b"%PDF-1.4\n% medical certificate\n"
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    pytest.importorskip("flask")
+    pytest.importorskip("dotenv")
+    from app.utils import multipartFileWriter, blobStorage
+
+    storage = blobStorage.MemoryBlobStorage()
+    monkeypatch.setattr(multipartFileWriter, "UPLOAD_BACKEND", "memory")
+    monkeypatch.setitem(blobStorage._instances, "memory", storage)
+    return multipartFileWriter, storage
+
+
+def uploadContext(files: dict):
+    from flask import Flask
+    return Flask(__name__).test_request_context(
+        "/", method="POST", content_type="multipart/form-data",
+        data={key: (io.BytesIO(data), filename, mimetype) for key, (data, filename, mimetype) in files.items()}
+    )
+
+
+def test_memory_backend_round_trip(writer):
+    multipartFileWriter, storage = writer
+    with uploadContext({
+        "medCert": (PDF_BYTES, "cert.pdf", "application/pdf"),
+        "waiver": (PNG_BYTES, "waiver.png", "image/png"),
+    }):
+        urls = multipartFileWriter.cloudinaryFileWriter(["medCert", "waiver"], folder="requirements")
+
+    assert set(urls) == {"medCert", "waiver"}
+    keys = {url.split("memory://blobs/", 1)[1] for url in urls.values()}
+    assert all(key.startswith("requirements/") for key in keys)
+    assert sorted(storage.open(key).read() for key in keys) == sorted([PDF_BYTES, PNG_BYTES])
+
+
+def test_identical_files_are_stored_once(writer):
+    multipartFileWriter, storage = writer
+    with uploadContext({
+        "medCert": (PDF_BYTES, "cert.pdf", "application/pdf"),
+        "waiver": (PDF_BYTES, "copy.pdf", "application/pdf"),
+    }):
+        urls = multipartFileWriter.cloudinaryFileWriter(["medCert", "waiver"])
+
+    assert urls["medCert"] == urls["waiver"]
+    assert len(storage.iterKeys()) == 1
+
+
+def test_disallowed_file_type_is_refused_before_upload(writer):
+    from werkzeug.exceptions import BadRequest
+    multipartFileWriter, storage = writer
+    with uploadContext({
+        "medCert": (PDF_BYTES, "cert.pdf", "application/pdf"),
+        "waiver": (b"MZ", "waiver.exe", "application/octet-stream"),
+    }):
+        with pytest.raises(BadRequest):
+            multipartFileWriter.cloudinaryFileWriter(["medCert", "waiver"])
+
+    assert storage.iterKeys() == []
+
+
+class SlowOrFailingStorage:
+    """Memory storage whose puts sleep or fail per filename, counting deletes"""
+
+    def __init__(self, memory, delays: dict = None, failures: set = None):
+        self.memory = memory
+        self.name = "memory"
+        self.delays = delays or {}
+        self.failures = failures or set()
+        self.deleted = []
+
+    def configure(self):
+        pass
+
+    def put(self, stream, filename: str, folder: str = "uploads"):
+        time.sleep(self.delays.get(filename, 0))
+        if filename in self.failures:
+            raise IOError("backend unavailable")
+        return self.memory.put(stream, filename, folder)
+
+    def delete(self, key: str):
+        self.deleted.append(key)
+        self.memory.delete(key)
+
+
+def test_failed_upload_rolls_back_finished_uploads_once(writer, monkeypatch):
+    from werkzeug.exceptions import BadRequest
+    multipartFileWriter, memory = writer
+    storage = SlowOrFailingStorage(memory, delays={"waiver.pdf": 0.2}, failures={"waiver.pdf"})
+    monkeypatch.setitem(multipartFileWriter.getStorage.__globals__["_instances"], "memory", storage)
+
+    with uploadContext({
+        "medCert": (PDF_BYTES, "cert.pdf", "application/pdf"),
+        "waiver": (PDF_BYTES + b"waiver", "waiver.pdf", "application/pdf"),
+    }):
+        with pytest.raises(BadRequest):
+            multipartFileWriter.cloudinaryFileWriter(["medCert", "waiver"])
+
+    time.sleep(0.1)
+    assert len(storage.deleted) == 1
+    assert memory.iterKeys() == []
+
+
+def test_one_deadline_for_the_whole_submission(writer, monkeypatch):
+    from werkzeug.exceptions import BadRequest
+    multipartFileWriter, memory = writer
+    storage = SlowOrFailingStorage(memory, delays={"cert.pdf": 0.3, "waiver.pdf": 0.9})
+    monkeypatch.setitem(multipartFileWriter.getStorage.__globals__["_instances"], "memory", storage)
+    monkeypatch.setattr(multipartFileWriter, "UPLOAD_TIMEOUT_SECS", 0.5)
+
+    started = time.monotonic()
+    with uploadContext({
+        "medCert": (PDF_BYTES, "cert.pdf", "application/pdf"),
+        "waiver": (PDF_BYTES + b"waiver", "waiver.pdf", "application/pdf"),
+    }):
+        with pytest.raises(BadRequest, match="timed out"):
+            multipartFileWriter.cloudinaryFileWriter(["medCert", "waiver"])
+    assert time.monotonic() - started < 0.8
+
+    # the finished upload is deleted right away; the late one is deleted once
+    # it lands, or never lands because the request stream is already closed
+    time.sleep(0.7)
+    assert len(set(storage.deleted)) == len(storage.deleted) >= 1
+    assert memory.iterKeys() == []
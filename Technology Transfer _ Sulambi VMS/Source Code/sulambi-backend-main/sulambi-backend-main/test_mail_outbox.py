@@ -0,0 +1,114 @@
+"""
+Claim, retry and dead-letter rules of app.modules.MailOutbox.
+
+Each test gets its own outbox table and a fake clock. The outbox wake-up
+condition is held for the whole test, so worker threads started by another
+test module stay parked in their wait and never claim these rows.
+
+    python -m pytest -q test_mail_outbox.py
+"""
+from uuid import uuid4
+
+import pytest
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class Clock:
+    def __init__(self, now: int):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def outbox(database, monkeypatch):
+    from app.modules import MailOutbox
+
+    monkeypatch.setattr(MailOutbox, "TABLE", f"outbox_test_{uuid4().hex[:8]}")
+    monkeypatch.setattr(MailOutbox, "start", lambda: None)
+    monkeypatch.setattr(MailOutbox, "nowMs", Clock(MailOutbox.nowMs() + DAY_MS))
+    MailOutbox.ensure_table()
+    with MailOutbox._wakeup:
+        yield MailOutbox
+
+
+def test_claim_leases_due_messages_once(outbox):
+    first = outbox.enqueue("a@example.com", "Subject", "<p>a</p>")
+    second = outbox.enqueue("b@example.com", "Subject", "<p>b</p>")
+    outbox.nowMs.now += 1
+
+    claimed = outbox._claimBatch("worker-1")
+    assert [row[0] for row in claimed] == [first, second]
+    assert all(row[4] == 1 for row in claimed)  # attempts
+    # leased rows are not handed to another worker
+    assert outbox._claimBatch("worker-2") == []
+    assert outbox.getStatus(first)["status"] == "sending"
+
+
+def test_expired_lease_is_claimed_again(outbox):
+    mailId = outbox.enqueue("a@example.com", "Subject", "<p>a</p>")
+    outbox._claimBatch("crashed-worker")
+
+    outbox.nowMs.now += outbox.OUTBOX_LEASE_SECS * 1000 + 1
+    claimed = outbox._claimBatch("worker-2")
+    assert [(row[0], row[4]) for row in claimed] == [(mailId, 2)]
+
+
+def test_failed_send_is_retried_with_backoff(outbox):
+    mailId = outbox.enqueue("a@example.com", "Subject", "<p>a</p>", maxAttempts=3)
+    (row,) = outbox._claimBatch("worker-1")
+    outbox._recordResults("worker-1", [(mailId, row[4], row[5], "SMTP", None, "connection refused")])
+
+    status = outbox.getStatus(mailId)
+    assert status["status"] == "queued"
+    assert status["lastError"] == "connection refused"
+    assert status["nextAttemptAt"] == outbox.nowMs() + outbox.OUTBOX_BACKOFF_SECS * 1000
+    # not due before the backoff has passed
+    assert outbox._claimBatch("worker-1") == []
+
+    outbox.nowMs.now += outbox.OUTBOX_BACKOFF_SECS * 1000
+    (row,) = outbox._claimBatch("worker-1")
+    outbox._recordResults("worker-1", [(mailId, row[4], row[5], "SMTP", None, "connection refused")])
+    assert outbox.getStatus(mailId)["nextAttemptAt"] == outbox.nowMs() + 2 * outbox.OUTBOX_BACKOFF_SECS * 1000
+
+
+def test_message_is_dead_lettered_after_max_attempts_and_can_be_requeued(outbox):
+    mailId = outbox.enqueue("a@example.com", "Subject", "<p>a</p>", maxAttempts=1)
+    (row,) = outbox._claimBatch("worker-1")
+    outbox._recordResults("worker-1", [(mailId, row[4], row[5], "Resend", None, "invalid recipient")])
+
+    assert outbox.getStatus(mailId)["status"] == "dead"
+    assert outbox.getSummary("dead")["counts"]["dead"] == 1
+    assert outbox._claimBatch("worker-1") == []
+
+    assert outbox.requeue(mailId) is True
+    status = outbox.getStatus(mailId)
+    assert (status["status"], status["attempts"]) == ("queued", 0)
+
+
+def test_sent_message_records_the_provider_id(outbox):
+    mailId = outbox.enqueue("a@example.com", "Subject", "<p>a</p>")
+    (row,) = outbox._claimBatch("worker-1")
+    outbox._recordResults("worker-1", [(mailId, row[4], row[5], "Resend", "re_123", None)])
+
+    status = outbox.getStatus(mailId)
+    assert (status["status"], status["provider"], status["providerId"]) == ("sent", "Resend", "re_123")
+    assert status["sentAt"] == outbox.nowMs()
+    assert outbox.requeue(mailId) is False
+
+
+def test_results_of_a_lost_lease_are_ignored(outbox):
+    mailId = outbox.enqueue("a@example.com", "Subject", "<p>a</p>")
+    outbox._claimBatch("slow-worker")
+    outbox.nowMs.now += outbox.OUTBOX_LEASE_SECS * 1000 + 1
+    outbox._claimBatch("worker-2")
+
+    outbox._recordResults("slow-worker", [(mailId, 1, 6, "SMTP", None, None)])
+    assert outbox.getStatus(mailId)["status"] == "sending"
+
+
+def test_enqueue_many_stores_every_message(outbox):
+    assert outbox.enqueueMany([(f"{index}@example.com", "Subject", "<p></p>") for index in range(3)]) == 3
+    assert outbox.getSummary()["counts"] == {"queued": 3}
@@ -0,0 +1,122 @@
+"""
+Validation and all-or-nothing insert of app.modules.MemberImporter, on a
+throwaway SQLite database with CSV sheets.
+
+    python -m pytest -q test_member_importer.py
+"""
+from uuid import uuid4
+
+import pytest
+
+HEADERS = {
+    "name": "Name (Last Name, First Name, Middle Initial)",
+    "email": "Email Address",
+    "srcode": "Sr-Code",
+    "age": "Age",
+}
+
+
+@pytest.fixture
+def importer(database):
+    pytest.importorskip("pandas")
+    from app.modules import MemberImporter
+    return MemberImporter
+
+
+@pytest.fixture(scope="module")
+def api(database):
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+
+    from app.models.AccountModel import AccountModel
+    from app.models.SessionModel import SessionModel
+    from server import Server
+
+    account = AccountModel().create("import-test-admin", "password", "admin")
+    token = SessionModel().create(account["id"], "admin")["token"]
+    return Server.test_client(), {"Authorization": f"Bearer {token}"}
+
+
+def sheet(rows: list):
+    import pandas as pd
+    return pd.DataFrame([{HEADERS[key]: value for key, value in row.items()} for row in rows], dtype=object)
+
+
+def member(tag: str, index: int):
+    return {"name": f"Member, Test {index}", "email": f"{tag}-{index}@g.batstate-u.edu.ph", "srcode": f"{tag}-{index}", "age": "20"}
+
+
+def countMembers(query, tag: str):
+    return query("SELECT COUNT(*) FROM membership WHERE email LIKE ?", (f"{tag}-%",))[0][0]
+
+
+def test_validate_rejects_bad_and_duplicate_rows(importer):
+    tag = uuid4().hex[:8]
+    rows = [
+        member(tag, 1),
+        {**member(tag, 2), "name": ""},
+        {**member(tag, 3), "email": "not-an-email"},
+        {**member(tag, 4), "email": member(tag, 1)["email"].upper()},
+        {**member(tag, 5), "srcode": member(tag, 1)["srcode"]},
+    ]
+    accepted, rejected = importer.validate(importer.prepareFrame(sheet(rows)))
+
+    assert list(accepted["email"]) == [member(tag, 1)["email"]]
+    assert list(rejected["reason"]) == [
+        "missing name", "invalid email", "duplicate email in file", "duplicate srcode in file"
+    ]
+
+
+def test_rows_already_in_the_database_are_rejected(importer, query):
+    tag = uuid4().hex[:8]
+    importer.bulkInsert(importer.validate(importer.prepareFrame(sheet([member(tag, 1)])))[0])
+
+    accepted, rejected = importer.validate(importer.prepareFrame(sheet([member(tag, 1), member(tag, 2)])))
+    assert list(accepted["email"]) == [member(tag, 2)["email"]]
+    assert list(rejected["reason"]) == ["email already registered"]
+    assert countMembers(query, tag) == 1
+
+
+def test_failed_chunk_inserts_nothing(importer, query, monkeypatch):
+    tag = uuid4().hex[:8]
+    monkeypatch.setattr(importer, "IMPORT_CHUNK_SIZE", 2)
+    accepted, _ = importer.validate(importer.prepareFrame(sheet([member(tag, index) for index in range(5)])))
+    # fullname is NOT NULL, so the third chunk fails after two chunks went in
+    accepted.loc[accepted.index[4], "fullname"] = None
+
+    progress = []
+    with pytest.raises(Exception):
+        importer.bulkInsert(accepted, progress.append)
+
+    assert progress == [2, 4]
+    assert countMembers(query, tag) == 0
+
+
+def test_import_file_records_the_job(importer, query, tmp_path):
+    tag = uuid4().hex[:8]
+    path = tmp_path / "member-app.csv"
+    sheet([member(tag, 1), member(tag, 2), {**member(tag, 3), "email": ""}]).to_csv(path, index=False)
+
+    jobId = importer._createJob("member-app.csv")
+    summary = importer.importFile(str(path), jobId)
+
+    assert (summary["inserted"], summary["rejected"]) == (2, 1)
+    assert "missing email" in summary["rejects"]
+    job = importer.getJob(jobId)
+    assert (job["status"], job["processed"], job["inserted"], job["rejected"]) == ("done", 3, 2, 1)
+    assert countMembers(query, tag) == 2
+
+
+def test_rejects_download_is_plain_csv(importer, api, tmp_path):
+    client, headers = api
+    tag = uuid4().hex[:8]
+    path = tmp_path / "member-app.csv"
+    sheet([member(tag, 1), {**member(tag, 2), "name": ""}]).to_csv(path, index=False)
+    jobId = importer._createJob("member-app.csv")
+    importer.importFile(str(path), jobId)
+
+    response = client.get(f"/api/membership/import/{jobId}/rejects", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "text/csv; charset=utf-8"
+    assert response.headers["Content-Disposition"] == f"attachment; filename=\"member-import-{jobId}-rejects.csv\""
+    assert "missing name" in response.get_data(as_text=True)
@@ -0,0 +1,167 @@
+"""
+Staging, promotion and cleanup of two-phase requirement uploads
+(app.modules.RequirementUploads), with a temporary staging directory and the
+in-memory blob store as upload backend.
+
+finalize() is called directly; the upload job is never scheduled, so the
+Scheduler dispatcher started by another test module cannot run it as well.
+
+    python -m pytest -q test_requirement_uploads.py
+"""
+from datetime import datetime
+from uuid import uuid4
+import io
+
+import pytest
+
+
+class FlakyStorage:
+    """Memory storage whose puts fail while failing is set"""
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.name = "memory"
+        self.failing = False
+
+    def configure(self):
+        pass
+
+    def put(self, stream, filename: str, folder: str = "uploads"):
+        if self.failing:
+            raise IOError("backend unavailable")
+        return self.memory.put(stream, filename, folder)
+
+
+@pytest.fixture
+def uploads(database, tmp_path, monkeypatch):
+    from app.modules import RequirementUploads
+    from app.utils import blobStorage
+
+    remote = FlakyStorage(blobStorage.MemoryBlobStorage())
+    monkeypatch.setattr(RequirementUploads, "_staging", blobStorage.LocalBlobStorage(root=str(tmp_path), baseUrl="staging://"))
+    monkeypatch.setattr(RequirementUploads, "UPLOAD_BACKEND", "memory")
+    monkeypatch.setitem(blobStorage._instances, "memory", remote)
+    monkeypatch.setattr(RequirementUploads.Scheduler, "schedule", lambda *args, **kwargs: None)
+    return RequirementUploads, remote
+
+
+def createRequirement(uploads):
+    from app.models.ExternalEventModel import ExternalEventModel
+    from app.models.RequirementsModel import RequirementsModel
+
+    timeNow = int(datetime.now().timestamp() * 1000)
+    event = ExternalEventModel().create(
+        "", "Upload Test Event", "Campus", timeNow + 86400000, timeNow + 2 * 86400000,
+        "", "", "", "", "", "", 0, "", "", "", "", "", "", "", "", "", 1, "accepted", 0
+    )
+    return RequirementsModel().create(
+        uploads.PENDING_UPLOAD, uploads.PENDING_UPLOAD, event["id"], "external",
+        "", "", "", "", "", "", "Volunteer", f"upload-{uuid4().hex[:8]}@example.com", "21-00001", 20,
+        "", "", "", "", "", "", "", ""
+    )["id"]
+
+
+def stage(uploads, files: dict):
+    """{field: (bytes, filename)} -> the staged dict stagingFileWriter returns"""
+    storage = uploads.stagingStorage()
+    return {field: (storage.put(io.BytesIO(data), filename), filename) for field, (data, filename) in files.items()}
+
+
+def submit(uploads, medCert: bytes = b"%PDF medcert", waiver: bytes = b"%PDF waiver"):
+    requirementId = createRequirement(uploads)
+    staged = stage(uploads, {"medCert": (medCert, "cert.pdf"), "waiver": (waiver, "waiver.pdf")})
+    uploads.track(requirementId, staged)
+    return requirementId, staged
+
+
+def requirement(requirementId):
+    from app.models.RequirementsModel import RequirementsModel
+    return RequirementsModel().get(requirementId)
+
+
+def test_finalize_promotes_staged_files_and_deletes_them(uploads):
+    uploads, remote = uploads
+    requirementId, staged = submit(uploads)
+    assert requirement(requirementId)["medCert"] is None
+    assert requirement(requirementId)["medCertStatus"] == uploads.PENDING_UPLOAD
+
+    uploads.finalize({"requirementId": requirementId})
+
+    saved = requirement(requirementId)
+    assert saved["medCert"].startswith("memory://blobs/requirements/")
+    assert saved["waiver"].startswith("memory://blobs/requirements/")
+    assert [status["status"] for status in uploads.getStatus(requirementId)] == [uploads.UPLOADED] * 2
+    assert not any(uploads.stagingStorage().exists(blob.key) for blob, _ in staged.values())
+    # nothing left to do on a second run
+    uploads.finalize({"requirementId": requirementId})
+
+
+def test_shared_staged_file_is_kept_until_its_last_upload(uploads):
+    uploads, remote = uploads
+    firstId, staged = submit(uploads, medCert=b"%PDF same", waiver=b"%PDF first")
+    secondId, _ = submit(uploads, medCert=b"%PDF same", waiver=b"%PDF second")
+    sharedKey = staged["medCert"][0].key
+
+    uploads.finalize({"requirementId": firstId})
+    assert uploads.stagingStorage().exists(sharedKey)
+
+    uploads.finalize({"requirementId": secondId})
+    assert not uploads.stagingStorage().exists(sharedKey)
+
+
+def test_failed_upload_keeps_the_staged_file_for_the_retry(uploads):
+    uploads, remote = uploads
+    requirementId, staged = submit(uploads)
+    remote.failing = True
+
+    with pytest.raises(IOError):
+        uploads.finalize({"requirementId": requirementId})
+
+    statuses = uploads.getStatus(requirementId)
+    assert [(status["status"], status["attempts"]) for status in statuses] == [(uploads.PENDING_UPLOAD, 1)] * 2
+    assert statuses[0]["error"] == "backend unavailable"
+    assert all(uploads.stagingStorage().exists(blob.key) for blob, _ in staged.values())
+
+    remote.failing = False
+    uploads.finalize({"requirementId": requirementId})
+    assert requirement(requirementId)["medCert"].startswith("memory://")
+
+
+def test_upload_fails_for_good_after_the_last_attempt(uploads, monkeypatch):
+    uploads, remote = uploads
+    monkeypatch.setattr(uploads.Scheduler, "SCHEDULER_MAX_ATTEMPTS", 2)
+    requirementId, _ = submit(uploads)
+    remote.failing = True
+
+    for _ in range(2):
+        with pytest.raises(IOError):
+            uploads.finalize({"requirementId": requirementId})
+
+    assert [status["status"] for status in uploads.getStatus(requirementId)] == [uploads.FAILED] * 2
+    saved = requirement(requirementId)
+    assert saved["medCert"] is None
+    assert saved["medCertStatus"] == uploads.UPLOAD_FAILED
+
+
+def test_missing_staged_file_fails_without_retry(uploads):
+    uploads, remote = uploads
+    requirementId, staged = submit(uploads)
+    uploads.stagingStorage().delete(staged["medCert"][0].key)
+
+    # terminal: finalize does not raise, so the Scheduler does not retry
+    uploads.finalize({"requirementId": requirementId})
+    statuses = {status["field"]: status for status in uploads.getStatus(requirementId)}
+    assert statuses["medCert"]["status"] == uploads.FAILED
+    assert statuses["medCert"]["error"].startswith("Staged file missing")
+    assert requirement(requirementId)["medCertStatus"] == uploads.UPLOAD_FAILED
+
+
+def test_discard_deletes_unreferenced_staged_files_only(uploads):
+    uploads, remote = uploads
+    _, tracked = submit(uploads, medCert=b"%PDF tracked", waiver=b"%PDF tracked waiver")
+    staged = stage(uploads, {"medCert": (b"%PDF tracked", "cert.pdf"), "waiver": (b"%PDF abandoned", "waiver.pdf")})
+
+    uploads.discard(staged)
+    storage = uploads.stagingStorage()
+    assert storage.exists(tracked["medCert"][0].key)
+    assert not storage.exists(staged["waiver"][0].key)
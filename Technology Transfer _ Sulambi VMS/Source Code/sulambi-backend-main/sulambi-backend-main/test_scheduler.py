@@ -0,0 +1,113 @@
+"""
+Dedupe, cancel and reschedule rules of app.modules.Scheduler.
+
+Jobs are scheduled a day ahead so a dispatcher started by another test module
+never runs them.
+
+    python -m pytest -q test_scheduler.py
+"""
+from uuid import uuid4
+
+import pytest
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+@pytest.fixture
+def scheduler(database):
+    from app.modules import Scheduler
+    return Scheduler
+
+
+def jobRow(query, jobId):
+    rows = query(
+        "SELECT status, runAt, attempts, payload, leaseOwner, lastError FROM scheduled_jobs WHERE id = ?",
+        (jobId,)
+    )
+    status, runAt, attempts, payload, leaseOwner, lastError = rows[0]
+    return {
+        "status": status, "runAt": runAt, "attempts": attempts,
+        "payload": payload, "leaseOwner": leaseOwner, "lastError": lastError,
+    }
+
+
+def test_same_dedupe_key_reschedules_one_job(scheduler, query):
+    key = f"test:{uuid4()}"
+    runAt = scheduler.nowMs() + DAY_MS
+    first = scheduler.schedule("test_job", {"n": 1}, runAt=runAt, dedupeKey=key)
+    second = scheduler.schedule("test_job", {"n": 2}, runAt=runAt + 1000, dedupeKey=key)
+
+    assert first == second
+    assert query("SELECT COUNT(*) FROM scheduled_jobs WHERE dedupeKey = ?", (key,))[0][0] == 1
+    row = jobRow(query, first)
+    assert row["status"] == "pending"
+    assert row["runAt"] == runAt + 1000
+    assert row["payload"] == '{"n": 2}'
+
+
+def test_cancel_only_drops_pending_jobs(scheduler, query):
+    key = f"test:{uuid4()}"
+    jobId = scheduler.schedule("test_job", {}, runAt=scheduler.nowMs() + DAY_MS, dedupeKey=key)
+
+    assert scheduler.cancel(key) is True
+    assert jobRow(query, jobId)["status"] == "cancelled"
+    # nothing left to cancel
+    assert scheduler.cancel(key) is False
+    assert scheduler.cancel(f"test:{uuid4()}") is False
+
+
+def test_accept_reject_accept_schedules_the_job_again(scheduler, query):
+    # accept schedules the mail, reject cancels it, accepting again must revive it
+    key = f"evaluation_mail:{uuid4()}"
+    runAt = scheduler.nowMs() + DAY_MS
+    jobId = scheduler.schedule("evaluation_mail", {"requirementId": "a"}, runAt=runAt, dedupeKey=key)
+    scheduler.cancel(key)
+
+    again = scheduler.schedule("evaluation_mail", {"requirementId": "a"}, runAt=runAt + 5000, dedupeKey=key)
+    assert again == jobId
+    row = jobRow(query, jobId)
+    assert row["status"] == "pending"
+    assert row["runAt"] == runAt + 5000
+    assert row["attempts"] == 0
+
+
+def test_failed_job_is_reset_with_fresh_attempts(scheduler, query):
+    key = f"test:{uuid4()}"
+    jobId = scheduler.schedule("test_job", {}, runAt=scheduler.nowMs() + DAY_MS, dedupeKey=key)
+    query(
+        "UPDATE scheduled_jobs SET status = 'failed', attempts = 5, lastError = 'boom', leaseOwner = 'gone' WHERE id = ?",
+        (jobId,)
+    )
+
+    scheduler.schedule("test_job", {}, runAt=scheduler.nowMs() + DAY_MS, dedupeKey=key)
+    row = jobRow(query, jobId)
+    assert row["status"] == "pending"
+    assert row["attempts"] == 0
+    assert row["lastError"] is None
+    assert row["leaseOwner"] is None
+
+
+def test_running_job_is_left_alone(scheduler, query):
+    key = f"test:{uuid4()}"
+    runAt = scheduler.nowMs() + DAY_MS
+    jobId = scheduler.schedule("test_job", {"n": 1}, runAt=runAt, dedupeKey=key)
+    query("UPDATE scheduled_jobs SET status = 'running', leaseOwner = 'other-worker' WHERE id = ?", (jobId,))
+
+    scheduler.schedule("test_job", {"n": 2}, runAt=runAt + 1000, dedupeKey=key)
+    row = jobRow(query, jobId)
+    assert row["status"] == "running"
+    assert row["payload"] == '{"n": 1}'
+    assert row["leaseOwner"] == "other-worker"
+    assert scheduler.cancel(key) is False
+
+
+def test_schedule_many_revives_cancelled_jobs(scheduler, query):
+    keys = [f"test:{uuid4()}" for _ in range(3)]
+    runAt = scheduler.nowMs() + DAY_MS
+    ids = scheduler.scheduleMany("test_job", [({"n": index}, runAt, key) for index, key in enumerate(keys)])
+    assert len(ids) == 3
+    assert scheduler.cancelMany(keys) == 3
+
+    revived = scheduler.scheduleMany("test_job", [({"n": index}, runAt, key) for index, key in enumerate(keys)])
+    assert sorted(revived) == sorted(ids)
+    assert all(jobRow(query, jobId)["status"] == "pending" for jobId in ids)
@@ -0,0 +1,67 @@
+"""
+Startup import benchmark for the gunicorn entrypoint.
+
+Runs `python -X importtime -c "import server"` in a fresh interpreter and checks
+that the heavy analytics stack stays out of worker boot, and that the total
+import time stays under STARTUP_IMPORT_BUDGET_MS (default 3000ms).
+
+    python -m pytest -q test_startup_imports.py
+    python test_startup_imports.py          # prints the slowest imports
+"""
+import subprocess
+import sys
+import os
+
+BACKEND_ROOT = os.path.dirname(os.path.abspath(__file__))
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 3000))
+
+# modules that must only load on first analytics use or background prewarm
+DEFERRED_MODULES = ["pandas", "numpy", "sklearn", "scipy", "joblib"]
+
+
+def measureImports(statement: str = "import server"):
+    """Return {module: (self_us, cumulative_us)} for a cold import of the app"""
+    env = dict(os.environ, PREWARM_ANALYTICS="False")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BACKEND_ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing the app failed:\n{result.stderr[-2000:]}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        selfUs, cumulativeUs, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(selfUs), int(cumulativeUs))
+    return timings
+
+
+def _requireAppDependencies():
+    import pytest
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+    pytest.importorskip("dotenv")
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    _requireAppDependencies()
+    timings = measureImports()
+    loaded = [name for name in DEFERRED_MODULES if name in timings]
+    assert loaded == [], f"Imported at worker startup: {loaded}"
+
+
+def test_startup_import_time_within_budget():
+    _requireAppDependencies()
+    timings = measureImports()
+    totalMs = timings["server"][1] / 1000
+    assert totalMs <= STARTUP_IMPORT_BUDGET_MS, \
+        f"Importing server took {totalMs:.0f}ms (budget {STARTUP_IMPORT_BUDGET_MS:.0f}ms)"
+
+
+if __name__ == "__main__":
+    timings = measureImports()
+    print(f"server: {timings['server'][1] / 1000:.0f}ms cumulative")
+    for name, (selfUs, cumulativeUs) in sorted(timings.items(), key=lambda item: -item[1][0])[:20]:
+        print(f"  {selfUs / 1000:8.1f}ms self  {cumulativeUs / 1000:8.1f}ms cumulative  {name}")
@@ -0,0 +1,117 @@
+"""
+Caching, range, precompression and offload behaviour of
+app.utils.staticFiles.sendUpload, served from a temporary uploads directory.
+
+    python -m pytest -q test_static_files.py
+"""
+import gzip
+import os
+
+import pytest
+
+DIGEST = "ab" * 32
+SVG = ("<svg xmlns=\"http://www.w3.org/2000/svg\">" + "<rect width=\"1\" height=\"1\"/>" * 100 + "</svg>").encode()
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    pytest.importorskip("flask")
+    pytest.importorskip("dotenv")
+    from flask import Flask, request
+    from app.utils import staticFiles
+
+    monkeypatch.setattr(staticFiles, "uploadsRoot", lambda: str(tmp_path))
+    monkeypatch.setattr(staticFiles, "STATIC_OFFLOAD", "")
+
+    app = Flask(__name__)
+
+    @app.get("/uploads/<path:path>")
+    def uploads(path):
+        return staticFiles.sendUpload(path, request.args.get("variant"))
+
+    return staticFiles, app.test_client(), tmp_path
+
+
+def writeUpload(root, path: str, data: bytes):
+    fullPath = os.path.join(root, *path.split("/"))
+    os.makedirs(os.path.dirname(fullPath), exist_ok=True)
+    with open(fullPath, "wb") as upload:
+        upload.write(data)
+
+
+def test_content_digest_of_upload_names(static):
+    staticFiles, _, _ = static
+    assert staticFiles.contentDigest(f"ab/ab/{DIGEST}.pdf") == DIGEST
+    assert staticFiles.contentDigest(f"variants/{DIGEST}/thumb.webp") == DIGEST
+    legacy = "0f8fad5b-d9cb-469f-a165-70867728950e_report.pdf"
+    assert staticFiles.contentDigest(legacy) == "0f8fad5b-d9cb-469f-a165-70867728950e"
+    assert staticFiles.contentDigest("report.pdf") is None
+
+
+def test_content_addressed_upload_is_immutable_and_revalidates(static):
+    _, client, root = static
+    path = f"ab/ab/{DIGEST}.pdf"
+    writeUpload(root, path, b"%PDF-1.4 report")
+
+    response = client.get(f"/uploads/{path}")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert response.headers["ETag"] == f"\"{DIGEST}-{DIGEST}.pdf\""
+    assert response.headers["Content-Type"] == "application/pdf"
+
+    cached = client.get(f"/uploads/{path}", headers={"If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_other_uploads_are_revalidated(static):
+    staticFiles, client, root = static
+    writeUpload(root, "report.pdf", b"%PDF-1.4 report")
+
+    response = client.get("/uploads/report.pdf")
+    assert response.headers["Cache-Control"] == f"public, max-age={staticFiles.STATIC_MUTABLE_MAX_AGE}, must-revalidate"
+
+
+def test_range_requests_are_honoured(static):
+    _, client, root = static
+    writeUpload(root, "report.pdf", b"0123456789")
+
+    response = client.get("/uploads/report.pdf", headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.get_data() == b"2345"
+    assert response.headers["Content-Range"] == "bytes 2-5/10"
+
+
+def test_paths_outside_uploads_and_precompressed_copies_are_not_served(static):
+    _, client, root = static
+    writeUpload(root, "precompressed/logo.svg.gz", b"gz")
+
+    assert client.get("/uploads/../secret.txt").status_code == 404
+    assert client.get("/uploads/precompressed/logo.svg.gz").status_code == 404
+    assert client.get("/uploads/missing.pdf").status_code == 404
+
+
+def test_text_uploads_are_served_precompressed(static):
+    _, client, root = static
+    writeUpload(root, "logo.svg", SVG)
+
+    response = client.get("/uploads/logo.svg", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.get_data()) == SVG
+    assert os.path.isfile(os.path.join(root, "precompressed", "logo.svg.gz"))
+
+    plain = client.get("/uploads/logo.svg", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_data() == SVG
+
+
+def test_x_accel_offload_leaves_the_body_to_nginx(static, monkeypatch):
+    staticFiles, client, root = static
+    monkeypatch.setattr(staticFiles, "STATIC_OFFLOAD", "x-accel")
+    path = f"ab/ab/{DIGEST}.pdf"
+    writeUpload(root, path, b"%PDF-1.4 report")
+
+    response = client.get(f"/uploads/{path}")
+    assert response.headers["X-Accel-Redirect"] == f"{staticFiles.STATIC_ACCEL_PREFIX}/{path}"
+    assert response.get_data() == b""
+    assert response.headers["ETag"] == f"\"{DIGEST}-{DIGEST}.pdf\""
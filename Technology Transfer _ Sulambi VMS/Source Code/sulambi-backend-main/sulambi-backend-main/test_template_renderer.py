@@ -0,0 +1,58 @@
+"""
+Placeholder rendering and caching of app.modules.TemplateRenderer.
+
+    python -m pytest -q test_template_renderer.py
+"""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def renderer(tmp_path, monkeypatch):
+    pytest.importorskip("dotenv")
+    from app.modules import TemplateRenderer
+
+    monkeypatch.setattr(TemplateRenderer, "TEMPLATES_DIR", str(tmp_path))
+    TemplateRenderer.clearCache()
+    yield TemplateRenderer
+    TemplateRenderer.clearCache()
+
+
+def writeTemplate(directory, name: str, source: str, mtime: int):
+    path = directory / name
+    path.write_text(source, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_values_are_escaped_and_unknown_placeholders_kept(renderer, tmp_path):
+    writeTemplate(tmp_path, "mail.html", "<p>Hi [name], see [event] at [venue]</p>", 1000)
+
+    rendered = renderer.render("mail.html", {"name": "<b>Juan</b>"}, event='Tree "Planting"')
+    assert rendered == "<p>Hi &lt;b&gt;Juan&lt;/b&gt;, see Tree &quot;Planting&quot; at [venue]</p>"
+    assert renderer.getTemplate("mail.html").placeholders == {"name", "event", "venue"}
+
+
+def test_render_many_matches_render(renderer, tmp_path):
+    writeTemplate(tmp_path, "mail.html", "[name]/[count]", 1000)
+    values = [{"name": "A", "count": 1}, {"name": "B", "count": None}]
+    assert renderer.renderMany("mail.html", values) == [renderer.render("mail.html", value) for value in values]
+    assert renderer.renderMany("mail.html", values)[1] == "B/"
+
+
+def test_hot_reload_recompiles_changed_files_only(renderer, tmp_path, monkeypatch):
+    writeTemplate(tmp_path, "mail.html", "old [name]", 1000)
+    monkeypatch.setattr(renderer, "TEMPLATE_HOT_RELOAD", False)
+    assert renderer.render("mail.html", name="x") == "old x"
+
+    writeTemplate(tmp_path, "mail.html", "new [name]", 2000)
+    # compiled once and served from the cache
+    assert renderer.render("mail.html", name="x") == "old x"
+
+    monkeypatch.setattr(renderer, "TEMPLATE_HOT_RELOAD", True)
+    assert renderer.render("mail.html", name="x") == "new x"
+
+
+def test_missing_template_raises(renderer):
+    with pytest.raises(FileNotFoundError):
+        renderer.render("missing.html")
@@ -9,6 +9,12 @@ import { uploadRequirements } from "../../api/requirements";
 import { SnackbarContext } from "../../contexts/SnackbarProvider";
 import { MembershipType } from "../../interface/types";
 
+// One key per opened form, so a retried submission is recognized by the backend
+const newSubmissionKey = () =>
+  typeof crypto !== "undefined" && "randomUUID" in crypto
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
 interface Props {
   open: boolean;
   eventId: number;
@@ -30,6 +36,7 @@ const RequirementForm: React.FC<Props> = ({
 }) => {
   const [forceRefresh, setForceRefresh] = useState(0);
   const [fieldErrors, setFieldErrors] = useState<string[]>([]);
+  const [submissionKey, setSubmissionKey] = useState(newSubmissionKey);
 
   const { formData, setFormData } = useContext(FormDataContext);
   const { showSnackbarMessage } = useContext(SnackbarContext);
@@ -53,6 +60,7 @@ const RequirementForm: React.FC<Props> = ({
     // Only send medCert and waiver - nothing else is required
     const formUploadable = new FormData();
     formUploadable.append("type", eventType);
+    formUploadable.append("idempotencyKey", submissionKey);
 
     // Attach member details when available (used by Requirement Evaluation table)
     // This is optional server-side, but without it officers will see "N/A" for participant name.
@@ -125,6 +133,7 @@ const RequirementForm: React.FC<Props> = ({
     if (open) {
       afterOpen && afterOpen();
       setFieldErrors([]);
+      setSubmissionKey(newSubmissionKey());
       // Clear formData only when uploading (viewOnly needs the passed-in record to view uploaded files)
       if (!viewOnly && !preventLoadingCache) {
         setFormData({});